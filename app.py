@@ -1,28 +1,127 @@
+import hashlib
 import json
 import os
-import random
 import secrets
 import time
-import hashlib
 from datetime import datetime
-from io import BytesIO
+from functools import partial
 import textwrap
-from math import pi
 
-import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
+
+from hackathon import autosave, events, export, history, metrics, publish, radar, robustness, storage
+from hackathon.compute import score_tensor, score_values
+from hackathon.draw import draw_animation_html, draw_seconds, fair_draw_order, order_revealed, sha256_hex
+from hackathon.rubric import DEFAULT_RUBRIC, load_rubric
+from hackathon.storage import (
+    UNSCORED,
+    empty_sheet,
+    get_store,
+    load_state,
+    merge_score_cells,
+    reset_score_sheet,
+    save_state_fields,
+)
+from hackathon.views import LB_CSS, leaderboard_html, leaderboard_rows
+from hackathon.views import order_list_html as build_order_list_html
 
 st.set_page_config(page_title="Hackathon Results", layout="wide")
 
 
 # ---------------- CONFIG ----------------
-MAX_PER_CRITERION = 2
 DATA_FILE = "scores.json"
+DB_FILE = "scores.db"
+JOURNAL_FILE = "scores.journal"
+PACKED_FILE = "scores.bin"
+JOURNAL_FSYNC_INTERVAL = 0.2
+JOURNAL_COMPACT_EVERY = 500
+RADAR_CACHE_SIZE = 64
+
+# "vega": radars are Vega-Lite specs drawn by the browser (vector, sharp on
+# projectors, no server rendering); "png": matplotlib images, as before.
+RADAR_ENGINE = st.secrets.get("RADAR_ENGINE", "vega")
 
 PIN = st.secrets.get("ADMIN_PIN", None)
 PIN_REQUIRED = PIN is not None
 
+# Fullscreen order/leaderboard screens poll for changes this often (seconds);
+# `?refresh=N` overrides it per screen, 0 turns it off.
+AUTO_REFRESH_SECONDS = float(st.secrets.get("AUTO_REFRESH_SECONDS", 3))
+
+# Teams, criteria, labels, aliases and the point scale. A rubric.json here
+# (start one with `python -m hackathon rubric -o rubric.json`) replaces the
+# built-in rubric without a code change; it is compiled once per file version.
+RUBRIC_FILE = st.secrets.get("RUBRIC_FILE", "rubric.json")
+
+# "json" keeps everything in DATA_FILE; "sqlite" uses DB_FILE (WAL) and imports
+# DATA_FILE on first start; "journal" appends changes to JOURNAL_FILE and keeps
+# DATA_FILE as its periodic snapshot; "packed" keeps an int8 cell array in
+# PACKED_FILE (large events) and imports DATA_FILE on first start.
+# scores.json stays the import/export format.
+STORAGE_BACKEND = st.secrets.get("STORAGE_BACKEND", "json")
+
+# A broken rubric.json must not take every screen down: keep the rubric that
+# loaded last in this process (DEFAULT_RUBRIC on a cold start) and say why.
+RUBRIC_ERROR = None
+try:
+    # configure() skips None, so a removed rubric.json must say DEFAULT_RUBRIC.
+    RUBRIC = load_rubric(RUBRIC_FILE) if os.path.exists(RUBRIC_FILE) else DEFAULT_RUBRIC
+except Exception as e:
+    RUBRIC, RUBRIC_ERROR = storage.RUBRIC, e
+
+storage.configure(
+    backend=STORAGE_BACKEND,
+    data_file=DATA_FILE,
+    db_file=DB_FILE,
+    journal_file=JOURNAL_FILE,
+    packed_file=PACKED_FILE,
+    journal_fsync_interval=JOURNAL_FSYNC_INTERVAL,
+    journal_compact_every=JOURNAL_COMPACT_EVERY,
+    rubric=RUBRIC,
+)
+
+# Several events (hackathons/tracks) side by side: EVENTS_DIR/index.json lists
+# them and each has its own shard and rubric (see hackathon/events.py, and
+# `python -m hackathon events create ...`). Without an index the app runs on
+# the single scores.json above.
+EVENTS_DIR = st.secrets.get("EVENTS_DIR", "events")
+events.configure(EVENTS_DIR)
+
+# Phase timings (load, radars, leaderboard, Excel, jury sync/save) for the
+# "Метрикалар" admin page and METRICS_FILE (Prometheus text format). Off by
+# default; when off the hooks are a flag check.
+METRICS_ENABLED = bool(st.secrets.get("METRICS_ENABLED", False))
+METRICS_FILE = st.secrets.get("METRICS_FILE", "metrics.prom")
+metrics.configure(enabled=METRICS_ENABLED, path=METRICS_FILE)
+
+# Static leaderboard/order pages for projectors, rewritten in the background
+# after every save into PUBLISH_DIR; serve that directory with any static file
+# server. Unset = off. PUBLISH_PNG adds leaderboard.png. Events publish into
+# PUBLISH_DIR/<event id>/.
+PUBLISH_DIR = st.secrets.get("PUBLISH_DIR", None)
+PUBLISH_PNG = bool(st.secrets.get("PUBLISH_PNG", False))
+
+# Opt-in jury autosave: slider moves are queued and written in the background
+# once the juror pauses for AUTOSAVE_DELAY seconds, one write per burst. The
+# save buttons still work and flush the queue first.
+AUTOSAVE = bool(st.secrets.get("AUTOSAVE", False))
+AUTOSAVE_DELAY = float(st.secrets.get("AUTOSAVE_DELAY", 1.5))
+autosave.configure(enabled=AUTOSAVE, delay=AUTOSAVE_DELAY)
+
+# Every save is appended to scores.history (a keyframe every
+# HISTORY_KEYFRAME_EVERY saves, cell deltas in between) for the "Тарих" page:
+# the leaderboard at any past version and an animated replay of the ranks.
+HISTORY = bool(st.secrets.get("HISTORY", True))
+HISTORY_KEYFRAME_EVERY = int(st.secrets.get("HISTORY_KEYFRAME_EVERY", 100))
+history.configure(enabled=HISTORY, keyframe_every=HISTORY_KEYFRAME_EVERY)
+
+# Rank robustness: the leaderboard and the Excel export show each team's 95%
+# rank interval over BOOTSTRAP_SAMPLES resamples of jurors and criteria (0 =
+# off). BOOTSTRAP_WORKERS > 1 uses a process pool for very large events.
+BOOTSTRAP_SAMPLES = int(st.secrets.get("BOOTSTRAP_SAMPLES", 2000))
+BOOTSTRAP_WORKERS = int(st.secrets.get("BOOTSTRAP_WORKERS", 0))
+robustness.configure(samples=BOOTSTRAP_SAMPLES, workers=BOOTSTRAP_WORKERS)
+
 LOGO_CANDIDATES = [
     "event_logo.png",
     "Логотип-рус.png",
@@ -31,109 +130,6 @@ LOGO_CANDIDATES = [
     "/mnt/data/ChatGPT Image 19 дек. 2025 г., 19_51_39.png",
 ]
 
-DIRECTIONS = [
-    "Жаратылыстану-ғылыми сауаттылық",
-    "Математикалық сауаттылық",
-    "Мәдениетаралық сауаттылық",
-    "Қаржылық сауаттылық",
-    "Цифрлық сауаттылық",
-    "Оқу сауаттылығы",
-    "Экологиялық сауаттылық",
-]
-DIRECTION_RU = {
-    "Жаратылыстану-ғылыми сауаттылық": "Естественно-научная грамотность",
-    "Математикалық сауаттылық": "Математическая грамотность",
-    "Мәдениетаралық сауаттылық": "Межкультурная грамотность",
-    "Қаржылық сауаттылық": "Финансовая грамотность",
-    "Цифрлық сауаттылық": "Цифровая грамотность",
-    "Оқу сауаттылығы": "Читательская грамотность",
-    "Экологиялық сауаттылық": "Экологическая грамотность",
-}
-
-CRITERIA_BI = {
-    "Жаратылыстану-ғылыми сауаттылық": [
-        {"kk": "Суды сүзудің тиімділігі", "ru": "Эффективность фильтрации воды"},
-        {"kk": "Сүзгінің жұмысын ғылыми тұрғыда түсіндіру", "ru": "Научное объяснение работы фильтра"},
-        {"kk": "Сүзгінің құрылымы және жинақталуы", "ru": "Конструкция и сборка фильтра"},
-        {"kk": "Нәтижені талдау және қорытынды", "ru": "Анализ результата и выводы"},
-        {"kk": "Презентация және командалық жұмыс", "ru": "Презентация и командная работа"},
-    ],
-    "Математикалық сауаттылық": [
-        {"kk": "Жалпы ауданды табу", "ru": "Находит общую площадь"},
-        {"kk": "Камераның бақылауына кірмейтін ауданның пайызын есептеу",
-         "ru": "Вычисляет процент площади не попадающих под камеру"},
-        {"kk": "Камераның бақылауына кіретін аудандарды салыстыру",
-         "ru": "Сравнивает площади, попадающих под камеру"},
-        {"kk": "Камералардың максималды санын есептеу",
-         "ru": "Вычисляет максимальное количество камер"},
-        {"kk": "Камералардың минималды санын есептеу",
-         "ru": "Вычисляет минимальное количество камер"},
-    ],
-    "Мәдениетаралық сауаттылық": [
-        {"kk": "Дұрыс және проблемалы хабарламаларды анықтау",
-         "ru": "Определение корректного и проблемных сообщений"},
-        {"kk": "Мәдениетаралық тәуекелдерді талдау",
-         "ru": "Аргументация и анализ межкультурных рисков"},
-        {"kk": "Мәдениетаралық сауаттылық қағидаттарын түсіну",
-         "ru": "Понимание принципов межкультурной грамотности"},
-        {"kk": "Оқушыларға арналған практикалық ұсынымдар",
-         "ru": "Практические рекомендации обучающимся"},
-        {"kk": "Фестивальге арналған мини-нұсқаулық",
-         "ru": "Мини-инструкция (памятка) для фестиваля"},
-    ],
-    "Қаржылық сауаттылық": [
-        {"kk": "Бюджетті жоспарлау және негіздеу", "ru": "Планирование и обоснование бюджета"},
-        {"kk": "Ресурстарды ұтымды бөлу", "ru": "Логичное и рациональное распределение ресурсов"},
-        {"kk": "Қаржылық тәуекелдерді бағалау", "ru": "Оценка финансовых рисков"},
-        {"kk": "Командалық жұмыс және қорғау мәдениеті", "ru": "Командная работа и культура защиты"},
-        {"kk": "Мектеп үшін білім беру әсері", "ru": "Образовательный эффект для школы"},
-    ],
-    "Цифрлық сауаттылық": [
-        {"kk": "Легитимді хатты анықтау", "ru": "Определение легитимного письма"},
-        {"kk": "Цифрлық тәуекелдерді талдау және аргументация",
-         "ru": "Анализ и аргументация цифровых рисков"},
-        {"kk": "Цифрлық қауіпсіздік қағидаттарын түсіну",
-         "ru": "Понимание принципов цифровой безопасности"},
-        {"kk": "Күмәнді хат алған жағдайда әрекет ету алгоритмі",
-         "ru": "Алгоритм действий при подозрительном письме"},
-        {"kk": "Мектептің киберқауіпсіздігін қамтамасыз ету бойынша ұсыныстар",
-         "ru": "Предложения по обеспечению кибербезопасности школы"},
-    ],
-    "Оқу сауаттылығы": [
-        {"kk": "Мәтінді түсіну және пайдалану", "ru": "Понимание и использование текста"},
-        {"kk": "Шешімнің дәлелділігі мен логикасы", "ru": "Аргументация и логика решения"},
-        {"kk": "Ұсынылған қадамдардың іске асырылу мүмкіндігі", "ru": "Реалистичность предложенных шагов"},
-        {"kk": "Тапсырманың толық орындалуы", "ru": "Полнота выполнения задания"},
-        {"kk": "Топтық жұмыстың үйлесімділігі және рәсімделуі",
-         "ru": "Согласованность командной работы и оформление результата"},
-    ],
-    "Экологиялық сауаттылық": [
-        {"kk": "Шешімнің Негізделуі", "ru": "Обоснованность Решения"},
-        {"kk": "Этикалық Жетілу", "ru": "Этическая Зрелость"},
-        {"kk": "Ымыраның Креативтілігі", "ru": "Креативность Компромисса"},
-        {"kk": "Коммуникация Тиімділігі", "ru": "Эффективность Коммуникации"},
-        {"kk": "Педагогикалық әлеует", "ru": "Педагогический потенциал"},
-    ],
-}
-
-ALIASES = {
-    "Естественно-научная грамотность": "Жаратылыстану-ғылыми сауаттылық",
-    "Жаратылыстану-ғылыми сауаттылық": "Жаратылыстану-ғылыми сауаттылық",
-    "Математическая грамотность": "Математикалық сауаттылық",
-    "Математикалық сауаттылық": "Математикалық сауаттылық",
-    "Межкультурная грамотность": "Мәдениетаралық сауаттылық",
-    "Мәдениетаралық сауаттылық": "Мәдениетаралық сауаттылық",
-    "Финансовая грамотность": "Қаржылық сауаттылық",
-    "Қаржылық сауаттылық": "Қаржылық сауаттылық",
-    "Цифровая грамотность": "Цифрлық сауаттылық",
-    "Цифрлық сауаттылық": "Цифрлық сауаттылық",
-    "Читательская грамотность": "Оқу сауаттылығы",
-    "Оқырмандық сауаттылық": "Оқу сауаттылығы",
-    "Оқу сауаттылығы": "Оқу сауаттылығы",
-    "Экологическая грамотность": "Экологиялық сауаттылық",
-    "Экологиялық сауаттылық": "Экологиялық сауаттылық",
-}
-
 
 # ---------------- Query params ----------------
 def qp_get(key: str, default: str | None = None) -> str | None:
@@ -144,12 +140,38 @@ def qp_get(key: str, default: str | None = None) -> str | None:
 
 def set_view(view: str | None, fs: bool):
     st.query_params.clear()
+    if EVENT is not None:
+        st.query_params["event"] = EVENT
     if view is not None:
         st.query_params["view"] = view
         st.query_params["fs"] = "1" if fs else "0"
 
 def clear_view():
-    st.query_params.clear()
+    set_view(None, False)
+
+def current_event() -> str | None:
+    # `?event=<id>` (projector links) wins, then this session's pick, then the
+    # index's active event, then the first open one; None (no index) is the
+    # legacy single scores.json. Archived events are never opened here.
+    for ev in (qp_get("event", None), st.session_state.get("event")):
+        if ev and events.get_event(ev, include_archived=False):
+            return ev
+    return events.active_event() or next((e["id"] for e in events.list_events()), None)
+
+def pick_event():
+    ev = st.session_state["event_select"]
+    st.session_state["event"] = ev
+    # Sliders of the new event are loaded from scratch.
+    st.session_state.pop("_scores_base", None)
+    st.session_state.pop("_resync_dirs", None)
+    if "event" in st.query_params:
+        st.query_params["event"] = ev
+
+def auto_refresh_seconds() -> float:
+    try:
+        return max(0.0, float(qp_get("refresh", AUTO_REFRESH_SECONDS)))
+    except (TypeError, ValueError):
+        return AUTO_REFRESH_SECONDS
 
 
 # ---------------- SAFE HTML RENDER ----------------
@@ -165,16 +187,7 @@ def apply_base_css():
 .block-container { padding-top: 1.2rem; padding-bottom: 2.0rem; max-width: 1400px; }
 .small-muted { color: #8a8a8a; font-size: 0.92rem; }
 .hr { height: 1px; background: rgba(0,0,0,0.08); border: none; margin: 1.2rem 0; }
-
-.lb { display: flex; flex-direction: column; gap: 10px; margin-top: 12px; }
-.lbrow { display: grid; grid-template-columns: 64px 1fr 110px; align-items: center; gap: 12px; border: 1px solid rgba(0,0,0,0.08); border-radius: 16px; padding: 12px 14px; background: rgba(0,0,0,0.015); }
-.lbrow .rank { font-weight: 950; font-size: 1.05rem; opacity: 0.95; }
-.lbrow .team { line-height: 1.1; }
-.lbrow .team .kk { font-weight: 900; font-size: 1.02rem; }
-.lbrow .team .ru { color:#8a8a8a; font-size: 0.90rem; margin-top: 2px; }
-.lbrow .score { text-align: right; font-weight: 950; font-size: 1.15rem; }
-.badchip { display:inline-block; padding: 2px 10px; border-radius: 999px; border: 1px solid rgba(0,0,0,0.10); background: rgba(0,0,0,0.03); font-size: 0.85rem; color: #6f7680; margin-left: 10px; }
-
+""" + LB_CSS + """
 .drawwrap { display:grid; grid-template-columns: 1fr 1fr; gap: 14px; margin-top: 10px; }
 .drawcard { border: 1px solid rgba(0,0,0,0.08); border-radius: 18px; padding: 14px; background: rgba(0,0,0,0.015); }
 .drawtitle { font-weight: 950; font-size: 1.05rem; margin-bottom: 8px; }
@@ -237,11 +250,6 @@ def bi_h2(kk: str, ru: str):
 def caption_bi(kk: str, ru: str):
     render_html(f"<div class='small-muted'>{kk} • {ru}</div>")
 
-def direction_bi_html(direction_kk: str) -> str:
-    ru = DIRECTION_RU.get(direction_kk, "")
-    return f"<div class='team'><div class='kk'>{direction_kk}</div><div class='ru'>{ru}</div></div>"
-
-
 # ---------------- LOGO ----------------
 def find_logo_path() -> str | None:
     for p in LOGO_CANDIDATES:
@@ -277,288 +285,279 @@ def require_pin_if_needed():
     st.session_state["pin_ok"] = True
 
 
-# ---------------- STORAGE ----------------
-def default_state():
-    scores = {d: [0] * len(CRITERIA_BI[d]) for d in DIRECTIONS}
-    return {
-        "scores": scores,
-        "presentation_order": list(DIRECTIONS),
-        "last_draw": None,
-        "updated_at": None,
-    }
-
-def save_state(state: dict):
-    state["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    tmp = DATA_FILE + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(state, f, ensure_ascii=False, indent=2)
-    os.replace(tmp, DATA_FILE)
-
-def load_state():
-    if not os.path.exists(DATA_FILE):
-        s = default_state()
-        save_state(s)
-        return s
-
-    try:
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            s = json.load(f)
-    except Exception:
-        s = default_state()
-        save_state(s)
-        return s
-
-    if not isinstance(s, dict) or "scores" not in s:
-        s = default_state()
-        save_state(s)
-        return s
-
-    scores_in = s.get("scores")
-    if not isinstance(scores_in, dict):
-        scores_in = {}
-
-    scores_out = {d: [0] * len(CRITERIA_BI[d]) for d in DIRECTIONS}
-
-    for k, v in scores_in.items():
-        kk_name = ALIASES.get(k)
-        if not kk_name or kk_name not in scores_out:
-            continue
-        want_len = len(CRITERIA_BI[kk_name])
-        if isinstance(v, list) and len(v) == want_len:
-            scores_out[kk_name] = [int(x) for x in v]
-        elif isinstance(v, dict):
-            tmp = [0] * want_len
-            for i in range(want_len):
-                tmp[i] = int(v.get(str(i), v.get(i, 0)) or 0)
-            scores_out[kk_name] = tmp
-
-    s["scores"] = scores_out
-
-    po = s.get("presentation_order")
-    if not isinstance(po, list):
-        po = list(DIRECTIONS)
+# ---------------- SESSION SYNC ----------------
+def sync_session_from_file_state(file_state: dict, juror: str | None = None):
+    # Sliders follow the stored sheet cell by cell. A session remembers the
+    # state version it last pulled and only touches the cells saved since
+    # (storage.changes_since), so other jurors' saves cost a few assignments.
+    # A slider moved but not saved yet (value != base) is left alone and keeps
+    # its old base, so saving it later still reports the conflict. The base
+    # keeps storage.UNSCORED for cells nobody scored; their sliders show 0.
+    if juror:
+        sheet = (file_state.get("juror_scores") or {}).get(juror) or empty_sheet(R)
     else:
-        mapped = []
-        for x in po:
-            kk = ALIASES.get(x)
-            if kk and kk in DIRECTIONS and kk not in mapped:
-                mapped.append(kk)
-        for d in DIRECTIONS:
-            if d not in mapped:
-                mapped.append(d)
-        po = mapped
-    s["presentation_order"] = po
-
-    if s.get("last_draw") is not None and not isinstance(s["last_draw"], dict):
-        s["last_draw"] = None
-
-    if "updated_at" not in s:
-        s["updated_at"] = None
-
-    return s
-
-
-# ---------------- KEYS & SESSION SYNC ----------------
-def score_key(direction: str, idx: int) -> str:
-    h = hashlib.md5(f"{direction}|{idx}".encode("utf-8")).hexdigest()
-    return f"score_{h}"
-
-def sync_session_from_file_state(file_state: dict):
-    file_stamp = file_state.get("updated_at")
-    if st.session_state.get("_scores_loaded_at") == file_stamp:
+        sheet = file_state["scores"]
+    version = state_version(file_state)
+    # After a save the saved directions are reloaded as stored, edited or not.
+    forced = st.session_state.pop("_resync_dirs", None) or ()
+    base = st.session_state.get("_scores_base")
+    if base is None or st.session_state.get("_synced_sheet") != (EVENT, juror):
+        base, cells = {}, None
+        forced = R.directions
+        st.session_state["_touched"] = set()
+    elif st.session_state.get("_synced_version") == version and not forced and not AUTOSAVE:
         return
-    for d in DIRECTIONS:
-        arr = file_state["scores"].get(d, [0] * len(CRITERIA_BI[d]))
-        for i in range(len(CRITERIA_BI[d])):
-            st.session_state[score_key(d, i)] = int(arr[i])
-    st.session_state["_scores_loaded_at"] = file_stamp
-
-
-# ---------------- COMPUTE ----------------
-def totals_df(state: dict) -> pd.DataFrame:
-    rows = []
-    for d in DIRECTIONS:
-        total = sum(int(x) for x in state["scores"][d])
-        rows.append({"Бағыт": d, "Total": total})
-    df = pd.DataFrame(rows).sort_values(["Total", "Бағыт"], ascending=[False, True]).reset_index(drop=True)
-    return df
-
-def details_df(state: dict) -> pd.DataFrame:
-    rows = []
-    for d in DIRECTIONS:
-        for i, crit in enumerate(CRITERIA_BI[d], start=1):
-            rows.append({
-                "Бағыт (KK)": d,
-                "Направление (RU)": DIRECTION_RU.get(d, ""),
-                "N": i,
-                "Критерий (KK)": crit["kk"],
-                "Критерий (RU)": crit["ru"],
-                "Score": int(state["scores"][d][i - 1]),
-            })
-    return pd.DataFrame(rows)
-
-def to_excel_bytes(df_totals: pd.DataFrame, df_details: pd.DataFrame, updated_at: str) -> bytes:
-    buf = BytesIO()
-    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-        df_totals.to_excel(writer, index=False, sheet_name="Totals")
-        df_details.to_excel(writer, index=False, sheet_name="Details")
-        pd.DataFrame({"updated_at": [updated_at]}).to_excel(writer, index=False, sheet_name="Meta")
-    buf.seek(0)
-    return buf.getvalue()
-
-
-# ---------------- RANDOMIZER (LIST ONLY) ----------------
-def sha256_hex(s: str) -> str:
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()
-
-def draw_html(picked: list[str], remaining: list[str], highlight_idx: int | None):
-    left = ""
-    if picked:
-        for i, name in enumerate(picked, start=1):
-            left += f"<div class='drawitem picked'>{direction_bi_html(name)}<span class='drawbadge'>{i}</span></div>"
     else:
-        left = "<div class='small-muted'>Әлі таңдалмаған • Пока не выбрано</div>"
-
-    right = ""
-    if remaining:
-        for i, name in enumerate(remaining, start=1):
-            cls = "hl" if (highlight_idx is not None and i - 1 == highlight_idx) else ""
-            right += f"<div class='drawitem {cls}'>{direction_bi_html(name)}</div>"
+        base = {d: list(arr) for d, arr in base.items()}
+        absorb_autosave(base, sheet, juror)
+        cells = storage.changes_since(st.session_state.get("_synced_version"), version, juror, EVENT)
+    if cells is None:
+        # First load, or the change log can't tell: compare every cell.
+        cells = [(d, i) for d in R.directions for i in range(R.n_criteria[R.index[d]])]
+    forced = set(forced)
+    for d in forced:
+        base[d] = [int(x) for x in sheet[d]]
+        for i, key in enumerate(R.widget_keys[d]):
+            st.session_state[key] = slider_value(base[d][i])
+    for d, i in cells:
+        if d in forced:
+            continue
+        key = R.widget_keys[d][i]
+        if int(st.session_state.get(key, slider_value(base[d][i]))) != slider_value(base[d][i]):
+            continue
+        base[d][i] = int(sheet[d][i])
+        st.session_state[key] = slider_value(base[d][i])
+    # What the sliders started from: a save only writes cells that differ from it.
+    st.session_state["_scores_base"] = base
+    st.session_state["_synced_sheet"] = (EVENT, juror)
+    st.session_state["_synced_version"] = version
+
+
+def slider_value(v) -> int:
+    return max(0, int(v))
+
+def slider_changed(d: str, i: int, juror: str | None):
+    # Slider on_change: a touched cell is saved even when it lands on 0, so an
+    # explicit 0 is told apart from a cell never scored.
+    st.session_state.setdefault("_touched", set()).add((d, i))
+    if AUTOSAVE:
+        queue_autosave(d, i, juror)
+
+def autosave_token() -> str:
+    if "_autosave_token" not in st.session_state:
+        st.session_state["_autosave_token"] = secrets.token_hex(8)
+    return st.session_state["_autosave_token"]
+
+def queue_autosave(d: str, i: int, juror: str | None):
+    # Slider on_change: the background writer merges it against the slider's base.
+    base = st.session_state.get("_scores_base") or {}
+    start = base[d][i] if d in base else UNSCORED
+    autosave.queue_cell(autosave_token(), EVENT, juror, (d, i), start, st.session_state[R.widget_keys[d][i]])
+
+def absorb_autosave(base: dict, sheet: dict, juror: str | None):
+    # Cells autosaved since the last rerun become the sliders' new base; a
+    # cell another juror changed first is reset to the stored value.
+    if "_autosave_token" not in st.session_state:
+        return
+    remember_autosave(autosave.status(autosave_token()))
+    applied, conflicts = autosave.take_results(autosave_token())
+    for (ev, j, d, i), v in applied.items():
+        if (ev, j) == (EVENT, juror) and d in base and int(st.session_state.get(R.widget_keys[d][i], v)) == v:
+            base[d][i] = v
+    n = 0
+    for ev, j, d, i in conflicts:
+        if (ev, j) == (EVENT, juror) and d in base:
+            base[d][i] = int(sheet[d][i])
+            st.session_state[R.widget_keys[d][i]] = slider_value(base[d][i])
+            n += 1
+    if n:
+        st.session_state["_save_conflicts"] = st.session_state.get("_save_conflicts", 0) + n
+
+def remember_autosave(s: dict):
+    # take_results() drops a settled result, so the last save shown lives here.
+    if s["version"] is not None:
+        st.session_state["_autosave_saved"] = (s["version"], s["at"])
+
+def render_autosave_status():
+    # Polled fragment; a conflict needs a full rerun to reset its slider.
+    s = autosave.status(autosave_token())
+    if s["conflicts"]:
+        st.rerun()
+    remember_autosave(s)
+    saved = st.session_state.get("_autosave_saved")
+    if s["pending"]:
+        caption_bi("Сақталуда…", "Сохраняется…")
+    elif saved is not None:
+        version, at = saved
+        caption_bi(f"Сақталды: {version}-нұсқа ({at})", f"Сохранено: версия {version} ({at})")
     else:
-        right = "<div class='small-muted'>Аяқталды • Завершено</div>"
-
-    return f"""
-<div class="drawwrap">
-  <div class="drawcard">
-    <div class="drawtitle">Таңдалған кезектілік <span class="small-muted">Выбранный порядок</span></div>
-    {left}
-  </div>
-  <div class="drawcard">
-    <div class="drawtitle">Қалған бағыттар <span class="small-muted">Оставшиеся направления</span></div>
-    {right}
-  </div>
-</div>
-"""
-
-def run_fair_draw_animation_with_seed(seed: str, directions: list[str]) -> list[str]:
-    rng = random.Random(int(seed, 16))
-    final_order = list(directions)
-    rng.shuffle(final_order)
-
-    remaining = list(directions)
-    picked: list[str] = []
-
-    ph_list = st.empty()
-    prog = st.progress(0.0)
-    rng_visual = random.Random()
-
-    for k, chosen in enumerate(final_order, start=1):
-        chosen_idx = remaining.index(chosen)
+        caption_bi("Автосақтау қосулы", "Автосохранение включено")
+    if s["error"]:
+        st.error(f"Автосақтау қатесі / Ошибка автосохранения: {s['error']}")
 
-        for _ in range(20):
-            hi = rng_visual.randrange(len(remaining))
-            with ph_list:
-                render_html(draw_html(picked, remaining, hi))
-            time.sleep(0.05)
+render_autosave_fragment = st.fragment(render_autosave_status, run_every=1.0)
 
-        for _ in range(7):
-            with ph_list:
-                render_html(draw_html(picked, remaining, chosen_idx))
-            time.sleep(0.06)
-
-        picked.append(chosen)
-        remaining.remove(chosen)
-        prog.progress(k / len(final_order))
-
-        with ph_list:
-            render_html(draw_html(picked, remaining, None))
 
+# ---------------- RANDOMIZER (LIST ONLY) ----------------
+def run_fair_draw_animation_with_seed(seed: str, directions: list[str]) -> list[str]:
+    # The order comes from the committed seed on the server; the animation is
+    # sent once and played by the browser, so the script thread never sleeps.
+    final_order = fair_draw_order(seed, directions)
+    st.iframe(draw_animation_html(seed, directions, final_order, R), height=200 + 62 * len(directions))
     return final_order
 
 
 # ---------------- RADAR ----------------
-def wrap_label(s: str, width: int = 22) -> str:
-    return "\n".join(textwrap.wrap(s, width=width)) if len(s) > width else s
-
-def plot_radar(direction_kk: str, values: list[int], max_val: int = 2):
-    crits = CRITERIA_BI[direction_kk]
-    labels = [
-        f"{i+1}. {wrap_label(c['kk'], 22)}\n{wrap_label(c['ru'], 22)}"
-        for i, c in enumerate(crits)
-    ]
-    n = len(labels)
-    angles = [i / float(n) * 2 * pi for i in range(n)]
-    angles += angles[:1]
-    vals = list(values) + [values[0]]
-
-    fig, ax = plt.subplots(figsize=(6.4, 6.4), subplot_kw=dict(polar=True))
-    ax.set_theta_offset(pi / 2)
-    ax.set_theta_direction(-1)
-
-    ax.set_xticks(angles[:-1])
-    ax.set_xticklabels(labels, fontsize=9)
-    ax.tick_params(axis="x", pad=34)
-
-    ax.set_ylim(0, max_val)
-    ax.set_yticks([0, 1, 2])
-    ax.set_yticklabels(["0 ұпай\n0 балл", "1 ұпай\n1 балл", "2 ұпай\n2 балл"], fontsize=10)
-    ax.set_rlabel_position(90)
-
-    ax.grid(alpha=0.22)
-    ax.yaxis.grid(alpha=0.30, linewidth=1.05)
-    ax.spines["polar"].set_alpha(0.25)
-
-    ax.plot(angles, vals, linewidth=2.8, alpha=0.95)
-    ax.fill(angles, vals, alpha=0.12)
-
-    ax.set_title(
-        f"{direction_kk}\n{DIRECTION_RU.get(direction_kk, '')}",
-        fontsize=13,
-        fontweight="bold",
-        pad=28,
-    )
-    fig.subplots_adjust(top=0.86, bottom=0.06, left=0.04, right=0.96)
-    return fig
+@st.cache_data(max_entries=RADAR_CACHE_SIZE, show_spinner=False)
+def radar_png(event: str | None, direction_kk: str, values: tuple[int, ...], max_val: int = 2) -> bytes:
+    # Shared across sessions: only radars whose score vector changed are redrawn.
+    return radar.radar_png_bytes(direction_kk, values, max_val, storage.rubric_for(event))
+
+
+# ---------------- EXPORT ----------------
+@st.cache_data(max_entries=4, show_spinner=False)
+def excel_export_bytes(event: str | None, updated_at: str, scores: tuple) -> bytes:
+    with metrics.phase("results", "excel"):
+        state = export.state_from_scores_key(scores)
+        state["updated_at"] = updated_at
+        return export.state_excel_bytes(state, storage.rubric_for(event))
 
 
 # ---------------- Render helpers ----------------
-def render_order_list(state: dict, show_heading: bool = True):
+def state_version(state: dict) -> int:
+    return int(state.get("version") or 0)
+
+def scores_digest(state: dict) -> str:
+    # What the leaderboard is built from. Not the version: it starts over at
+    # 0 when scores.json is wiped or recreated.
+    sheets = [state["scores"], state.get("juror_scores") or {}]
+    raw = json.dumps(sheets, ensure_ascii=False, separators=storage.JSON_SEPARATORS)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def leaderboard_view(event: str | None, digest: str, rubric_fp: str, _state: dict) -> dict:
+    # Built once per (event, scores, rubric) and shared by every viewer session.
+    rubric = storage.rubric_for(event)
+    with metrics.phase("results", "rank_stats"):
+        stats = robustness.rank_stats(_state, rubric)
+    rows = leaderboard_rows(_state, rubric, stats)
+    return {"rows": rows, "html": leaderboard_html(rows), "stats": stats}
+
+def cached_leaderboard(event: str | None, state: dict) -> dict:
+    return leaderboard_view(event, scores_digest(state), storage.rubric_for(event).fingerprint, state)
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def order_list_html(event: str | None, order: tuple, revealed: bool, rubric_fp: str, _state: dict) -> str:
+    # `revealed` flips without a new save once a draw's animation is over.
+    return build_order_list_html(_state, storage.rubric_for(event))
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def history_leaderboard_html(event: str | None, pos: int, version: int, at: str) -> str:
+    # A past save never changes, so it is rebuilt from the history once.
+    # Versions repeat after a reset: `pos` (timeline index) picks the record,
+    # version and time only keep the cache honest if the file is replaced.
+    return leaderboard_html(history.leaderboard_at(event=event, pos=pos))
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def history_frames(event: str | None, n_saves: int, last_at: str) -> list[dict]:
+    return history.rank_frames(event)
+
+def render_order_list(event: str | None, state: dict, show_heading: bool = True):
     if show_heading:
         bi_h2(
             "Жеребе арқылы анықталған презентациялар кезектілігі:",
             "Очередность презентаций, определенная жеребьёвкой:",
         )
-    order = state.get("presentation_order") or list(DIRECTIONS)
-    rows = "<div class='lb'>"
-    for i, name in enumerate(order, start=1):
-        rows += f"<div class='lbrow'><div class='rank'>{i}</div><div>{direction_bi_html(name)}</div><div class='score'></div></div>"
-    rows += "</div>"
-    render_html(rows)
-
-def render_leaderboard(state: dict, show_heading: bool = True):
-    df_tot = totals_df(state)
+    order = tuple(state.get("presentation_order") or ())
+    fp = storage.rubric_for(event).fingerprint
+    render_html(order_list_html(event, order, order_revealed(state), fp, state))
+
+def render_leaderboard(event: str | None, state: dict, show_heading: bool = True):
     if show_heading:
         bi_h2("Жалпы ұпай (кему ретімен)", "Общий балл (по убыванию)")
-    rows_html = "<div class='lb'>"
-    for i, row in df_tot.reset_index(drop=True).iterrows():
-        rank = i + 1
-        name = row["Бағыт"]
-        total = int(row["Total"])
-        badge = f"{rank}-орын"
-        rows_html += (
-            f"<div class='lbrow'>"
-            f"<div class='rank'>{rank}</div>"
-            f"<div class='team'><div class='kk'>{name}<span class='badchip'>{badge}</span></div>"
-            f"<div class='ru'>{DIRECTION_RU.get(name,'')}</div></div>"
-            f"<div class='score'>{total}</div>"
-            f"</div>"
+    render_html(cached_leaderboard(event, state)["html"])
+
+def render_live_view(event: str | None, view: str):
+    # Runs on every auto-refresh tick: a store stamp probe (a stat or one
+    # indexed row) decides whether the state has to be loaded again.
+    screen = f"screen:{view}"
+    metrics.rerun(screen)
+    with metrics.phase(screen, "load_state"):
+        stamp = (event, get_store(event).stamp())
+        if "_live_state" not in st.session_state or st.session_state.get("_live_stamp") != stamp:
+            st.session_state["_live_state"] = load_state(event)
+            st.session_state["_live_stamp"] = stamp
+    state = st.session_state["_live_state"]
+    with metrics.phase(screen, "render"):
+        if view == "order":
+            render_order_list(event, state, show_heading=True)
+        elif view == "leaderboard":
+            render_leaderboard(event, state, show_heading=True)
+
+def save_session_scores(directions: list[str], juror: str | None):
+    # Writes this session's slider edits for `directions` only (see
+    # merge_score_cells) and marks those directions to be reloaded.
+    if AUTOSAVE:
+        autosave.flush(10.0)
+    base = st.session_state.get("_scores_base") or load_state(EVENT)["scores"]
+    touched = st.session_state.get("_touched") or set()
+    edits = {}
+    for d in directions:
+        for i, key in enumerate(R.widget_keys[d]):
+            v = int(st.session_state.get(key, 0))
+            if v != int(base[d][i]) and (v != slider_value(base[d][i]) or (d, i) in touched):
+                edits[(d, i)] = v
+        touched.difference_update((d, i) for i in range(len(R.widget_keys[d])))
+    with metrics.phase("jury", "save"):
+        _, _, conflicts = merge_score_cells(base, edits, juror, EVENT)
+    st.session_state["_save_conflicts"] = len(conflicts)
+    # Pull the merged cells (ours + other jurors') into these sliders next rerun.
+    st.session_state["_resync_dirs"] = list(directions)
+
+def render_direction_scoring(d: str, juror: str | None):
+    # Run as a fragment: moving a slider reruns only this direction's block.
+    with metrics.phase("jury", "direction"), st.container(border=True):
+        keys = R.widget_keys[d]
+        current_vals = [int(st.session_state.get(key, 0)) for key in keys]
+        total = sum(current_vals)
+        render_html(
+            f"<div style='margin-bottom:8px'><b>{d}</b>"
+            f"<div class='small-muted'>{R.direction_ru.get(d,'')}</div>"
+            f"<div class='small-muted'>Жалпы ұпай: {total} • Общий балл: {total}</div></div>"
         )
-    rows_html += "</div>"
-    render_html(rows_html)
+
+        for i, crit in enumerate(R.criteria[d], start=1):
+            render_html(f"<div><b>{i}. {crit['kk']}</b><div class='small-muted'>{crit['ru']}</div></div>")
+
+            # SHORTER slider line: put slider in a narrower column
+            s_col, _ = st.columns([1.2, 2.8])
+            with s_col:
+                st.slider(
+                    label=f"{d}-{i}",
+                    min_value=0,
+                    max_value=R.max_per_criterion,
+                    value=current_vals[i - 1],
+                    step=1,
+                    key=keys[i - 1],
+                    label_visibility="collapsed",
+                    on_change=slider_changed,
+                    args=(d, i - 1, juror),
+                )
+
+        b_col, _ = st.columns([1.2, 2.8])
+        if b_col.button("Бағытты сақтау", key=f"save_dir_{R.index[d]}", use_container_width=True):
+            save_session_scores([d], juror)
+            st.rerun()
+        b_col.caption("Сохранить направление")
+
+render_direction_fragment = st.fragment(render_direction_scoring)
 
 def render_radars_normal(state: dict, order: list[str]):
-    bi_h2("Бағыттардың профилі (радар диаграмма, шкала 0–2)", "Профиль направлений (радар-диаграмма, шкала 0–2)")
+    scale = f"0–{R.max_per_criterion}"
+    bi_h2(f"Бағыттардың профилі (радар диаграмма, шкала {scale})", f"Профиль направлений (радар-диаграмма, шкала {scale})")
     per_row = 2
+    t = score_tensor(state, R)
+    means = t.criterion_means()
     for start in range(0, len(order), per_row):
         cols = st.columns(per_row)
         for j in range(per_row):
@@ -566,11 +565,48 @@ def render_radars_normal(state: dict, order: list[str]):
             if idx >= len(order):
                 break
             d = order[idx]
-            vals = [int(x) for x in state["scores"][d]]
+            k = t.team_index[d]
+            vals = tuple(score_values(means[k, : t.n_criteria[k]]).tolist())
             with cols[j]:
                 with st.container(border=True):
-                    fig = plot_radar(d, vals, MAX_PER_CRITERION)
-                    st.pyplot(fig, clear_figure=True)
+                    if RADAR_ENGINE == "png":
+                        st.image(radar_png(EVENT, d, vals, R.max_per_criterion), use_container_width=True)
+                    else:
+                        st.vega_lite_chart(spec=radar.radar_spec(d, vals, R.max_per_criterion, R), theme=None)
+
+
+def render_metrics_panel():
+    bi_h1("Метрикалар", "Метрики")
+    snap = metrics.snapshot()
+    since = datetime.fromtimestamp(snap["since"]).strftime("%Y-%m-%d %H:%M:%S")
+    caption_bi(f"Есептеу басталды: {since}", f"Счётчики с: {since}")
+    render_html("<hr class='hr'>")
+
+    bi_h2("Кезеңдер", "Фазы")
+    if snap["phases"]:
+        ms = st.column_config.NumberColumn(format="%.2f")
+        st.dataframe(
+            snap["phases"],
+            hide_index=True,
+            use_container_width=True,
+            column_config={"total_ms": ms, "mean_ms": ms, "max_ms": ms},
+        )
+    else:
+        st.caption("Әзірге дерек жоқ / Данных пока нет")
+
+    bi_h2("Қайта іске қосулар", "Перезапуски")
+    if snap["reruns"]:
+        st.dataframe(snap["reruns"], hide_index=True, use_container_width=True)
+
+    st.caption(f"Prometheus: {METRICS_FILE}")
+    c1, c2, _ = st.columns([1, 1, 2])
+    if c1.button("Жаңарту", key="metrics_refresh_btn", use_container_width=True):
+        st.rerun()
+    c1.caption("Обновить")
+    if c2.button("Нөлдеу", key="metrics_reset_btn", use_container_width=True):
+        metrics.reset()
+        st.rerun()
+    c2.caption("Сбросить")
 
 
 # ---------------- MAIN APP ----------------
@@ -579,22 +615,29 @@ apply_base_css()
 view = qp_get("view", None)
 fs = qp_get("fs", "0") == "1"
 
+EVENT = current_event()
+R = storage.rubric_for(EVENT)
+EVENT_TITLE = events.event_title(EVENT)
+publish.configure(out_dir=PUBLISH_DIR, png=PUBLISH_PNG, reload_seconds=AUTO_REFRESH_SECONDS, event=EVENT)
+
 # Fullscreen view mode ONLY for: order + leaderboard
 if view in {"order", "leaderboard"}:
     if fs:
         apply_fullscreen_css()
 
-    state = load_state()
-
     if view == "order":
         bi_h1("Презентациялар кезектілігі", "Очередность презентаций")
-        render_html("<hr class='hr'>")
-        render_order_list(state, show_heading=True)
-
     elif view == "leaderboard":
         bi_h1("Нәтижелер", "Результаты")
-        render_html("<hr class='hr'>")
-        render_leaderboard(state, show_heading=True)
+    if EVENT_TITLE[0]:
+        caption_bi(*EVENT_TITLE)
+    render_html("<hr class='hr'>")
+
+    refresh = auto_refresh_seconds()
+    if refresh > 0:
+        st.fragment(render_live_view, run_every=refresh)(EVENT, view)
+    else:
+        render_live_view(EVENT, view)
 
     # Bottom-right "Қайту" button (placed at the end, right aligned)
     render_html("<div style='height: 18px'></div>")
@@ -611,15 +654,47 @@ if view in {"order", "leaderboard"}:
 apply_normal_chrome_css_reset()
 show_logo_sidebar_and_main(show_in_main=True)
 
-state = load_state()
+if RUBRIC_ERROR is not None:
+    # Projector screens above keep running on the previous rubric silently.
+    st.error(
+        f"{RUBRIC_FILE} оқылмады, алдыңғы рубрика қолданылады / "
+        f"{RUBRIC_FILE} не прочитан, используется предыдущая рубрика: {RUBRIC_ERROR}"
+    )
+
+open_events = events.list_events()
+if open_events:
+    ids = [e["id"] for e in open_events]
+    titles = {e["id"]: e.get("title_kk") or e["id"] for e in open_events}
+    st.sidebar.markdown("### Іс-шара / Мероприятие")
+    st.sidebar.selectbox(
+        " ",
+        ids,
+        index=ids.index(EVENT) if EVENT in ids else 0,
+        format_func=titles.get,
+        key="event_select",
+        on_change=pick_event,
+    )
+    if EVENT_TITLE[1]:
+        st.sidebar.caption(EVENT_TITLE[1])
+
+MODES = {"Презентациялар кезектілігі": "order", "Бағалау": "jury", "Нәтижелер": "results"}
+if HISTORY:
+    MODES["Тарих"] = "history"
+if METRICS_ENABLED:
+    MODES["Метрикалар"] = "metrics"
 
 st.sidebar.markdown("### Режим / Режим")
 mode = st.sidebar.radio(
     " ",
-    ["Презентациялар кезектілігі", "Бағалау", "Нәтижелер"],
+    list(MODES),
     index=0,
     key="mode_radio",
 )
+mode_view = MODES[mode]
+metrics.rerun(mode_view)
+
+with metrics.phase(mode_view, "load_state"):
+    state = load_state(EVENT)
 
 # ---------------- SETTINGS ----------------
 if mode == "Презентациялар кезектілігі":
@@ -635,7 +710,7 @@ if mode == "Презентациялар кезектілігі":
 <div class="commitbox">
   <div><b>Соңғы жеребе</b> <span class="small-muted">Последняя жеребьёвка</span>: {last.get("time","")}</div>
   <div class="small-muted">Commit: <code>{last.get("commit","")}</code></div>
-  <div class="small-muted">Seed: <code>{last.get("seed","")}</code></div>
+  <div class="small-muted">Seed: <code>{last.get("seed","") if order_revealed(state) else "…"}</code></div>
 </div>
 """)
 
@@ -657,32 +732,33 @@ if mode == "Презентациялар кезектілігі":
 </div>
 """)
 
-        order = run_fair_draw_animation_with_seed(seed, DIRECTIONS)
-
-        state["presentation_order"] = order
-        state["last_draw"] = {
-            "commit": commit,
-            "seed": seed,
-            "method": "random.Random(int(seed,16)).shuffle()",
-            "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        }
-        save_state(state)
-
-        st.success("Жеребе аяқталды. Seed ашылды.")
-        st.caption("Жеребьёвка завершена. Seed раскрыт.")
-        st.info(f"Seed: {seed}")
-        st.rerun()
+        order = run_fair_draw_animation_with_seed(seed, R.directions)
+
+        with metrics.phase("order", "draw_save"):
+            state = save_state_fields(
+                EVENT,
+                presentation_order=order,
+                last_draw={
+                    "commit": commit,
+                    "seed": seed,
+                    "method": "random.Random(int(seed,16)).shuffle()",
+                    "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    # Other screens show the order once the animation is over.
+                    "reveal_at": round(time.time() + draw_seconds(len(order)), 3),
+                },
+            )
 
     if do_reset:
-        state["presentation_order"] = list(DIRECTIONS)
-        state["last_draw"] = None
-        save_state(state)
+        save_state_fields(EVENT, presentation_order=list(R.directions), last_draw=None)
         st.success("Реттілік қалпына келтірілді.")
         st.caption("Порядок сброшен.")
         st.rerun()
 
-    render_html("<hr class='hr'>")
-    render_order_list(state, show_heading=True)
+    if not do_draw:
+        # On the draw run the animation above reveals the order itself.
+        render_html("<hr class='hr'>")
+        with metrics.phase("order", "order_list"):
+            render_order_list(EVENT, state, show_heading=True)
 
     cfs1, _ = st.columns([1, 5])
     if cfs1.button("Толық экран", use_container_width=True, key="fs_order"):
@@ -692,39 +768,34 @@ if mode == "Презентациялар кезектілігі":
 # ---------------- JURY ----------------
 elif mode == "Бағалау":
     require_pin_if_needed()
-    sync_session_from_file_state(state)
+
+    st.sidebar.markdown("**Қазы** <span class='small-muted'>Член жюри</span>", unsafe_allow_html=True)
+    juror = st.sidebar.text_input(
+        "Қазы",
+        key="juror_name",
+        placeholder="Аты-жөні / ФИО",
+        label_visibility="collapsed",
+    ).strip() or None
+    with metrics.phase("jury", "sync"):
+        sync_session_from_file_state(state, juror)
 
     bi_h1("Бағалау", "Оценивание")
     caption_bi(f"Жаңартылды: {state.get('updated_at')}", f"Обновлено: {state.get('updated_at')}")
+    if AUTOSAVE:
+        render_autosave_fragment()
+
+    n_conflicts = st.session_state.pop("_save_conflicts", 0)
+    if n_conflicts:
+        st.warning(
+            f"{n_conflicts} баға сақталмады: оларды басқа қазы өзгертті. Жаңа мәндер көрсетілді.\n\n"
+            f"{n_conflicts} оценок не сохранено: их изменил другой член жюри. Показаны новые значения."
+        )
     render_html("<hr class='hr'>")
 
-    bi_h2("Бағаларды енгізу (0–2)", "Ввод баллов (0–2)")
-
-    for d in DIRECTIONS:
-        with st.container(border=True):
-            current_vals = [int(st.session_state.get(score_key(d, i), 0)) for i in range(len(CRITERIA_BI[d]))]
-            total = sum(current_vals)
-            render_html(
-                f"<div style='margin-bottom:8px'><b>{d}</b>"
-                f"<div class='small-muted'>{DIRECTION_RU.get(d,'')}</div>"
-                f"<div class='small-muted'>Жалпы ұпай: {total} • Общий балл: {total}</div></div>"
-            )
+    bi_h2(f"Бағаларды енгізу (0–{R.max_per_criterion})", f"Ввод баллов (0–{R.max_per_criterion})")
 
-            for i, crit in enumerate(CRITERIA_BI[d], start=1):
-                render_html(f"<div><b>{i}. {crit['kk']}</b><div class='small-muted'>{crit['ru']}</div></div>")
-
-                # SHORTER slider line: put slider in a narrower column
-                s_col, _ = st.columns([1.2, 2.8])
-                with s_col:
-                    st.slider(
-                        label=f"{d}-{i}",
-                        min_value=0,
-                        max_value=MAX_PER_CRITERION,
-                        value=int(st.session_state.get(score_key(d, i - 1), 0)),
-                        step=1,
-                        key=score_key(d, i - 1),
-                        label_visibility="collapsed",
-                    )
+    for d in R.directions:
+        render_direction_fragment(d, juror)
 
     c1, c2, _ = st.columns([1, 1, 2])
     do_save = c1.button("Сақтау", key="save_scores_btn", use_container_width=True)
@@ -733,24 +804,52 @@ elif mode == "Бағалау":
     c2.caption("Сбросить всё в 0")
 
     if do_save:
-        for d in DIRECTIONS:
-            arr = [int(st.session_state.get(score_key(d, i), 0)) for i in range(len(CRITERIA_BI[d]))]
-            state["scores"][d] = arr
-        save_state(state)
+        save_session_scores(R.directions, juror)
         st.success("Сақталды.")
         st.caption("Сохранено.")
         st.rerun()
 
     if do_reset:
-        for d in DIRECTIONS:
-            for i in range(len(CRITERIA_BI[d])):
-                st.session_state[score_key(d, i)] = 0
-            state["scores"][d] = [0] * len(CRITERIA_BI[d])
-        save_state(state)
+        if AUTOSAVE:
+            autosave.flush(10.0)
+        reset_score_sheet(juror, EVENT)
+        # Sliders can't be assigned once drawn; the next rerun reloads them.
+        st.session_state["_resync_dirs"] = list(R.directions)
         st.success("Қайтарылды.")
         st.caption("Сброс выполнен.")
         st.rerun()
 
+# ---------------- HISTORY ----------------
+elif mode_view == "history":
+    bi_h1("Нәтижелер тарихы", "История результатов")
+    line = history.timeline(EVENT)
+    if not line:
+        st.info("Тарих әлі бос / История пока пуста")
+    else:
+        caption_bi(f"{len(line)} сақтау, {line[0][1]} – {line[-1][1]}", f"{len(line)} сохранений, {line[0][1]} – {line[-1][1]}")
+        render_html("<hr class='hr'>")
+
+        bi_h2("Ойнату", "Воспроизведение")
+        frames = history_frames(EVENT, len(line), line[-1][1])
+        st.iframe(history.replay_html(frames, R), height=80 + 76 * len(R.directions))
+
+        render_html("<hr class='hr'>")
+        bi_h2("Таңдалған сәттегі нәтижелер", "Результаты на выбранный момент")
+        # By position: versions start over after a reset and can repeat.
+        pos = st.select_slider(
+            "Нұсқа / Версия",
+            options=list(range(len(line))),
+            value=len(line) - 1,
+            format_func=lambda k: f"{line[k][0]} • {line[k][1]}",
+            key=f"history_version:{EVENT}",
+        )
+        render_html(history_leaderboard_html(EVENT, pos, *line[pos]))
+
+# ---------------- METRICS ----------------
+elif mode_view == "metrics":
+    require_pin_if_needed()
+    render_metrics_panel()
+
 # ---------------- RESULTS ----------------
 else:
     bi_h1("Нәтижелер", "Результаты")
@@ -760,25 +859,34 @@ else:
     )
 
     updated_at = state.get("updated_at") or ""
-    order = state.get("presentation_order") or list(DIRECTIONS)
+    order = (state.get("presentation_order") if order_revealed(state) else None) or list(R.directions)
 
     render_html("<hr class='hr'>")
     # Fullscreen for radars removed (requested). Only show normal radars.
-    render_radars_normal(state, order)
+    with metrics.phase("results", "radars"):
+        render_radars_normal(state, order)
 
     render_html("<hr class='hr'>")
-    render_leaderboard(state, show_heading=True)
+    with metrics.phase("results", "leaderboard"):
+        render_leaderboard(EVENT, state, show_heading=True)
+
+    stats = cached_leaderboard(EVENT, state)["stats"]
+    if stats is not None:
+        with st.expander(f"Орындардың тұрақтылығы / Устойчивость мест ({stats['samples']} bootstrap)"):
+            caption_bi(
+                "Қазылар мен критерийлерді қайта іріктеу: 95% аралық және әр орынның ықтималдығы",
+                "Перевыборка жюри и критериев: 95% интервал и вероятность каждого места",
+            )
+            st.dataframe(robustness.stats_df(stats), hide_index=True, use_container_width=True)
 
     cfs3, _ = st.columns([1, 5])
     if cfs3.button("Толық экран", use_container_width=True, key="fs_leaderboard"):
         set_view("leaderboard", True)
         st.rerun()
 
-    # Download at very bottom
-    df_tot = totals_df(state)
-    df_det = details_df(state)
-    excel_bytes = to_excel_bytes(df_tot.copy(), df_det.copy(), updated_at)
-    filename = f"hackathon_results_{updated_at.replace(':','-').replace(' ','_') or 'export'}.xlsx"
+    # Download at very bottom; the workbook is only built when the button is clicked
+    excel_bytes = partial(excel_export_bytes, EVENT, updated_at, export.scores_key(state, R))
+    filename = f"{EVENT or 'hackathon'}_results_{updated_at.replace(':','-').replace(' ','_') or 'export'}.xlsx"
 
     render_html("<hr class='hr'>")
     st.download_button(
@@ -0,0 +1,207 @@
+# Hot-path benchmarks on synthetic events.
+#
+#   python bench/hot_paths.py                          # print results
+#   python bench/hot_paths.py --save bench/baseline.json
+#   python bench/hot_paths.py --compare bench/baseline.json [--tolerance 1.25]
+#
+# Each size (7 = the real rubric, 100 and 1000 synthetic teams) gets its own
+# rubric and a state with --jurors juror sheets of random scores in a temp
+# directory. Every case is timed --repeat times (median/min ms), then run
+# once more under tracemalloc for its peak allocation. --compare exits
+# non-zero if a case's median is slower than the baseline by more than the
+# tolerance.
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from hackathon import storage  # noqa: E402
+from hackathon.compute import details_df, totals_df  # noqa: E402
+from hackathon.export import to_excel_bytes  # noqa: E402
+from hackathon.radar import radar_png_bytes, radar_spec  # noqa: E402
+from hackathon.robustness import rank_stats  # noqa: E402
+from hackathon.rubric import DEFAULT_RUBRIC, Rubric  # noqa: E402
+from hackathon.views import leaderboard_html, leaderboard_rows  # noqa: E402
+
+STORAGE_CASES = {"load_state_cold", "load_state_warm", "save_state"}
+
+
+def synthetic_rubric(n_teams: int) -> Rubric:
+    # The real teams plus synthetic ones reusing the real criteria round-robin.
+    real = DEFAULT_RUBRIC.directions
+    directions = list(real[:n_teams])
+    direction_ru = {d: DEFAULT_RUBRIC.direction_ru[d] for d in directions}
+    criteria = {d: DEFAULT_RUBRIC.criteria[d] for d in directions}
+    for k in range(len(real), n_teams):
+        name = f"Команда {k + 1:04d}"
+        directions.append(name)
+        direction_ru[name] = f"Команда {k + 1:04d} (RU)"
+        criteria[name] = DEFAULT_RUBRIC.criteria[real[k % len(real)]]
+    aliases = {d: d for d in directions}
+    return Rubric(directions, direction_ru, criteria, aliases, DEFAULT_RUBRIC.max_per_criterion)
+
+def synthetic_state(rubric: Rubric, n_jurors: int, seed: int = 0) -> dict:
+    rnd = random.Random(seed)
+    state = storage.default_state(rubric)
+    state["juror_scores"] = {
+        f"juror{j + 1}": {
+            d: [rnd.randint(0, rubric.max_per_criterion) for _ in rubric.criteria[d]]
+            for d in rubric.directions
+        }
+        for j in range(n_jurors)
+    }
+    return state
+
+def cases(state: dict, rubric: Rubric) -> dict:
+    d0 = rubric.directions[0]
+    radar_vals = [1] * len(rubric.criteria[d0])
+
+    def load_cold():
+        storage._cache_put(storage._shard(), None, {})
+        storage.load_state()
+
+    def save():
+        s = storage.load_state()
+        sheet = s["juror_scores"]["juror1"][d0]
+        sheet[0] = (sheet[0] + 1) % (rubric.max_per_criterion + 1)
+        storage.save_state(s)
+
+    return {
+        "load_state_cold": load_cold,
+        "load_state_warm": storage.load_state,
+        "save_state": save,
+        "totals_df": lambda: totals_df(state, rubric),
+        "details_df": lambda: details_df(state, rubric),
+        "leaderboard_html": lambda: leaderboard_html(leaderboard_rows(state, rubric)),
+        "plot_radar": lambda: radar_png_bytes(d0, radar_vals, rubric.max_per_criterion, rubric),
+        "radar_spec": lambda: radar_spec(d0, radar_vals, rubric.max_per_criterion, rubric),
+        "rank_stats": lambda: rank_stats(state, rubric),
+        "to_excel_bytes": lambda: to_excel_bytes(totals_df(state, rubric), details_df(state, rubric), "bench"),
+    }
+
+def measure(fn, repeat: int) -> dict:
+    fn()  # warm-up: lazy imports, first-touch caches
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t) * 1000)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "median_ms": round(statistics.median(times), 3),
+        "min_ms": round(min(times), 3),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+def run(sizes: list[int], jurors: int, backends: list[str], repeat: int, only: set[str]) -> dict:
+    results = {}
+    for n in sizes:
+        rubric = synthetic_rubric(n)
+        for backend in backends:
+            with tempfile.TemporaryDirectory() as tmp:
+                storage.configure(
+                    rubric=rubric,
+                    backend=backend,
+                    data_file=os.path.join(tmp, "scores.json"),
+                    db_file=os.path.join(tmp, "scores.db"),
+                    journal_file=os.path.join(tmp, "scores.journal"),
+                    packed_file=os.path.join(tmp, "scores.bin"),
+                )
+                storage.save_state(synthetic_state(rubric, jurors))
+                state = storage.load_state()
+                for name, fn in cases(state, rubric).items():
+                    if only and name not in only:
+                        continue
+                    # Storage cases per backend; the rest only once per size.
+                    if name in STORAGE_CASES:
+                        key = f"{n}/{backend}/{name}"
+                    elif backend == backends[0]:
+                        key = f"{n}/{name}"
+                    else:
+                        continue
+                    results[key] = measure(fn, repeat)
+                    print(f"{key:40s} {results[key]['median_ms']:10.3f} ms {results[key]['peak_kib']:10.1f} KiB", file=sys.stderr)
+                storage.get_store().close()
+    storage.configure(rubric=DEFAULT_RUBRIC)
+    return results
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    slower = []
+    for key, base in baseline.get("results", {}).items():
+        cur = results.get(key)
+        if not cur or not base["median_ms"]:
+            continue
+        ratio = cur["median_ms"] / base["median_ms"]
+        mark = "SLOWER" if ratio > tolerance else ""
+        print(f"{key:40s} {base['median_ms']:10.3f} -> {cur['median_ms']:10.3f} ms  x{ratio:5.2f} {mark}")
+        if mark:
+            slower.append(key)
+    return slower
+
+def environment() -> dict:
+    import matplotlib
+    import numpy
+    import openpyxl
+    import pandas
+
+    return {
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "matplotlib": matplotlib.__version__,
+        "openpyxl": openpyxl.__version__,
+    }
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="7,100,1000", help="team counts, comma separated")
+    ap.add_argument("--jurors", type=int, default=5)
+    ap.add_argument("--backends", default="json,sqlite,journal,packed")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--only", default="", help="comma separated case names")
+    ap.add_argument("--save", help="write results to this JSON baseline")
+    ap.add_argument("--compare", help="compare against this JSON baseline")
+    ap.add_argument("--tolerance", type=float, default=1.25, help="allowed median slowdown ratio")
+    args = ap.parse_args()
+
+    sizes = [int(x) for x in args.sizes.split(",") if x]
+    backends = [b for b in args.backends.split(",") if b]
+    only = {x for x in args.only.split(",") if x}
+    params = {"sizes": sizes, "jurors": args.jurors, "backends": backends, "repeat": args.repeat}
+    results = run(sizes, args.jurors, backends, args.repeat, only)
+    doc = {"environment": environment(), "params": params, "results": results}
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        slower = compare(results, baseline, args.tolerance)
+        if slower:
+            print(f"FAIL: {len(slower)} case(s) slower than x{args.tolerance}", file=sys.stderr)
+            return 1
+    if not args.save and not args.compare:
+        print(json.dumps(doc, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# Cold-import budget for the projector path (view=order / view=leaderboard).
+#
+#   python bench/import_budget.py [--budget-ms 250] [--runs 5]
+#
+# Each run imports the hackathon modules app.py imports at module level (read
+# from app.py itself, so the list can't fall behind the app) in a fresh
+# interpreter and records the wall time. Exits non-zero if the median exceeds
+# the budget or if pandas, matplotlib or openpyxl were pulled in eagerly.
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APP = os.path.join(ROOT, "app.py")
+HEAVY_MODULES = ["pandas", "matplotlib", "openpyxl"]
+
+PROBE = """
+import json, sys, time
+t = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+ms = (time.perf_counter() - t) * 1000
+print(json.dumps({{"ms": ms, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def app_modules(path: str = APP) -> list[str]:
+    # `import hackathon.x`, `from hackathon import x` and `from hackathon.x
+    # import y` at the top level of app.py, in order.
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    found = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            found += [a.name for a in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module == "hackathon":
+            found += [f"hackathon.{a.name}" for a in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            found.append(node.module)
+    mods = [m for m in found if m.startswith("hackathon.")]
+    return list(dict.fromkeys(mods))
+
+
+def measure(modules: list[str], runs: int) -> tuple[list[float], list[str]]:
+    code = PROBE.format(modules=modules, heavy=HEAVY_MODULES)
+    times, heavy = [], set()
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout
+        res = json.loads(out.strip().splitlines()[-1])
+        times.append(res["ms"])
+        heavy.update(res["heavy"])
+    return times, sorted(heavy)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--budget-ms", type=float, default=250.0)
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+
+    core = app_modules()
+    core_times, heavy = measure(core, args.runs)
+    eager_times, _ = measure(core + ["pandas", "matplotlib.pyplot", "openpyxl"], args.runs)
+    core_ms = statistics.median(core_times)
+    eager_ms = statistics.median(eager_times)
+
+    print(json.dumps({
+        "core_median_ms": round(core_ms, 1),
+        "with_heavy_median_ms": round(eager_ms, 1),
+        "budget_ms": args.budget_ms,
+        "modules": core,
+        "heavy_loaded": heavy,
+    }, indent=2))
+
+    if heavy:
+        print(f"FAIL: core import pulled in {', '.join(heavy)}", file=sys.stderr)
+        return 1
+    if core_ms > args.budget_ms:
+        print(f"FAIL: core import {core_ms:.1f} ms > budget {args.budget_ms:.1f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
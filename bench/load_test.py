@@ -0,0 +1,208 @@
+# Event-day load test: simulated jurors and projector tabs against one app
+# process and a fresh scores.json.
+#
+#   python bench/load_test.py [--jurors 10] [--viewers 30] [--duration 30]
+#                             [--sheets named|shared] [--out report.json]
+#
+# Every session is a headless AppTest driven from its own thread:
+# - jurors move 1-3 random sliders, then press save_scores_btn;
+# - viewers re-run view=leaderboard&fs=1 every --poll seconds.
+# AppTest swaps a process-global mock Runtime for each run, so script runs
+# are serialized through RUN_LOCK. Sessions still interleave between runs.
+# The time a run spends queued is reported apart from the run itself.
+# With --sheets named each juror types a name and scores their own sheet. With
+# --sheets shared everyone scores the shared sheet, each juror owning a
+# disjoint set of directions. At the end the store is read back. A lost
+# update is a cell whose stored value differs from the last value its owner
+# saved.
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from hackathon import storage  # noqa: E402
+from hackathon.rubric import CRITERIA_BI, DIRECTIONS, MAX_PER_CRITERION  # noqa: E402
+
+APP = os.path.join(ROOT, "app.py")
+JURY_MODE = "Бағалау"
+RUN_LOCK = threading.Lock()
+
+# Sliders are drawn direction by direction, criterion by criterion.
+SLIDER_CELLS = [(d, i) for d in DIRECTIONS for i in range(len(CRITERIA_BI[d]))]
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = {}  # kind -> [seconds]
+        self.wait = []
+        self.errors = []
+
+    def timed_run(self, kind: str, fn):
+        t0 = time.perf_counter()
+        with RUN_LOCK:
+            t = time.perf_counter()
+            try:
+                at = fn()
+            except Exception as e:  # a failed rerun is a result, not a crash
+                with self.lock:
+                    self.errors.append(f"{kind}: {type(e).__name__}: {e}")
+                return None
+            dt = time.perf_counter() - t
+        with self.lock:
+            self.wait.append(t - t0)
+            self.latency.setdefault(kind, []).append(dt)
+            if at is not None and at.exception:
+                self.errors.append(f"{kind}: {at.exception[0].message}")
+        return at
+
+def new_session(timeout: float, query: dict | None = None) -> AppTest:
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    for k, v in (query or {}).items():
+        at.query_params[k] = v
+    return at
+
+def juror_loop(k: int, args, rec: Recorder, stop: threading.Event, saved: dict):
+    rnd = random.Random(k)
+    name = f"juror{k + 1:02d}" if args.sheets == "named" else None
+    if name:
+        cells = list(range(len(SLIDER_CELLS)))
+    else:
+        own = set(DIRECTIONS[k::args.jurors])
+        cells = [n for n, (d, _) in enumerate(SLIDER_CELLS) if d in own]
+    if not cells:
+        return
+
+    at = new_session(args.timeout)
+    at = rec.timed_run("juror_open", at.run)
+    at = rec.timed_run("juror_open", at.sidebar.radio(key="mode_radio").set_value(JURY_MODE).run)
+    if name:
+        at = rec.timed_run("juror_open", at.sidebar.text_input(key="juror_name").input(name).run)
+    mine = {}
+    while at is not None and not stop.is_set():
+        pending = {}
+        for _ in range(rnd.randint(1, 3)):
+            n = rnd.choice(cells)
+            v = rnd.randint(0, MAX_PER_CRITERION)
+            pending[SLIDER_CELLS[n]] = v
+            at = rec.timed_run("slider", at.slider[n].set_value(v).run)
+            if at is None:
+                return
+        at = rec.timed_run("save", at.button(key="save_scores_btn").click().run)
+        if at is None:
+            return
+        mine.update(pending)
+        with rec.lock:
+            saved[name or f"shared:{k}"] = dict(mine)
+        time.sleep(args.think)
+
+def viewer_loop(k: int, args, rec: Recorder, stop: threading.Event):
+    at = new_session(args.timeout, {"view": "leaderboard", "fs": "1"})
+    while at is not None and not stop.is_set():
+        at = rec.timed_run("viewer_poll", at.run)
+        time.sleep(args.poll)
+
+def percentiles(xs: list[float]) -> dict:
+    xs = sorted(xs)
+    if not xs:
+        return {}
+
+    def pct(p: float) -> float:
+        return xs[min(len(xs) - 1, int(round(p / 100 * (len(xs) - 1))))] * 1000
+
+    return {
+        "n": len(xs),
+        "p50_ms": round(pct(50), 1),
+        "p90_ms": round(pct(90), 1),
+        "p99_ms": round(pct(99), 1),
+        "max_ms": round(xs[-1] * 1000, 1),
+        "mean_ms": round(statistics.fmean(xs) * 1000, 1),
+    }
+
+def lost_updates(state: dict, saved: dict) -> list[str]:
+    lost = []
+    for owner, cells in saved.items():
+        if owner.startswith("shared:"):
+            sheet = state["scores"]
+        else:
+            sheet = (state.get("juror_scores") or {}).get(owner) or {}
+        for (d, i), v in cells.items():
+            # A 0 left on a never-scored cell stays unscored (shown as 0).
+            got = max(0, int((sheet.get(d) or [0] * (i + 1))[i]))
+            if got != v:
+                lost.append(f"{owner} {d}[{i}]: saved {v}, stored {got}")
+    return lost
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jurors", type=int, default=10)
+    ap.add_argument("--viewers", type=int, default=30)
+    ap.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    ap.add_argument("--sheets", choices=["named", "shared"], default="named")
+    ap.add_argument("--think", type=float, default=0.5, help="juror pause after a save (s)")
+    ap.add_argument("--poll", type=float, default=3.0, help="viewer poll interval (s)")
+    ap.add_argument("--timeout", type=float, default=60.0, help="per-rerun AppTest timeout (s)")
+    ap.add_argument("--out", help="also write the report as JSON")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as work:
+        # The app resolves scores.json and .streamlit/secrets.toml from the cwd.
+        os.chdir(work)
+        os.makedirs(".streamlit")
+        with open(os.path.join(".streamlit", "secrets.toml"), "w", encoding="utf-8") as f:
+            f.write('STORAGE_BACKEND = "json"\n')
+
+        rec, stop, saved = Recorder(), threading.Event(), {}
+        threads = [
+            threading.Thread(target=juror_loop, args=(k, args, rec, stop, saved), daemon=True)
+            for k in range(args.jurors)
+        ] + [
+            threading.Thread(target=viewer_loop, args=(k, args, rec, stop), daemon=True)
+            for k in range(args.viewers)
+        ]
+        t0 = time.perf_counter()
+        for t in threads:
+            t.start()
+        time.sleep(args.duration)
+        stop.set()
+        for t in threads:
+            t.join(timeout=args.timeout)
+        elapsed = time.perf_counter() - t0
+
+        state = storage.read_state(os.path.join(work, "scores.json"))
+        lost = lost_updates(state, saved)
+        n_saves = len(rec.latency.get("save", []))
+        report = {
+            "params": vars(args),
+            "elapsed_s": round(elapsed, 1),
+            "latency": {kind: percentiles(xs) for kind, xs in sorted(rec.latency.items())},
+            "queue_wait": percentiles(rec.wait),
+            "saves": n_saves,
+            "saves_per_s": round(n_saves / elapsed, 2),
+            "final_version": state.get("version"),
+            "lost_updates": len(lost),
+            "first_lost": lost[:5],
+            "errors": len(rec.errors),
+            "first_errors": rec.errors[:5],
+        }
+        os.chdir(ROOT)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 1 if report["lost_updates"] or report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+# Scoring core for the Streamlit app: importable without Streamlit and without
+# side effects. Heavy libraries (pandas, matplotlib, openpyxl) are imported
+# lazily by the functions that need them.
@@ -0,0 +1,166 @@
+import threading
+import time
+from datetime import datetime
+
+from . import storage
+
+# Opt-in autosave for the jury page. Slider changes are queued per session
+# (queue_cell) and a background thread writes each (session, event, juror)
+# job once that job has been quiet for DELAY seconds (at most MAX_DELAY after
+# its first change), so one juror's steady edits never hold back another's:
+# one merge_score_cells() call, i.e. one write, per burst instead of one per
+# click. Results wait in take_results() for the session's next rerun.
+#
+#   autosave.configure(enabled=True, delay=1.5)
+#   autosave.queue_cell(token, event, juror, (d, i), base_value, value)
+#   autosave.status(token) -> {"pending", "version", "at", "error", "conflicts"}
+
+ENABLED = False
+DELAY = 1.5
+MAX_DELAY = 6.0
+# A session that never reruns again (tab closed) leaves its results behind;
+# they are dropped this long after its last save.
+RESULT_TTL = 3600.0
+
+_LOCK = threading.Lock()
+_WAKE = threading.Event()
+_IDLE = threading.Event()
+_IDLE.set()
+_PENDING = {}  # (token, event, juror) -> {"cells": {(d, i): (base, value)}, "first", "last", "flush"}
+_WRITTEN = {}  # token -> {(event, juror, d, i): value} saved, not yet taken
+_RESULTS = {}  # token -> {"version", "at", "applied", "conflicts", "error", "t"}
+_THREAD = None
+
+
+def configure(enabled: bool = False, delay: float | None = None, max_delay: float | None = None):
+    global ENABLED, DELAY, MAX_DELAY
+    ENABLED = bool(enabled)
+    if delay is not None:
+        DELAY = float(delay)
+    if max_delay is not None:
+        MAX_DELAY = float(max_delay)
+
+def queue_cell(token: str, event: str | None, juror: str | None, cell: tuple, base: int, value: int):
+    # `base` is what the session's slider started from; a cell this session
+    # already autosaved uses the saved value instead, so a second burst on the
+    # same slider isn't taken for someone else's change.
+    global _THREAD
+    d, i = cell
+    with _LOCK:
+        base = _WRITTEN.get(token, {}).get((event, juror, d, i), base)
+        job = _job((token, event, juror))
+        if cell in job["cells"]:
+            base = job["cells"][cell][0]
+        job["cells"][cell] = (int(base), int(value))
+        job["last"] = time.monotonic()
+        _IDLE.clear()
+        if _THREAD is None:
+            _THREAD = threading.Thread(target=_worker, name="score-autosave", daemon=True)
+            _THREAD.start()
+    _WAKE.set()
+
+def _job(key: tuple) -> dict:
+    # Under _LOCK.
+    job = _PENDING.get(key)
+    if job is None:
+        now = time.monotonic()
+        job = _PENDING[key] = {"cells": {}, "first": now, "last": now, "flush": False}
+    return job
+
+def _due_at(job: dict) -> float:
+    return min(job["last"] + DELAY, job["first"] + MAX_DELAY)
+
+def _save(key: tuple, cells: dict):
+    token, event, juror = key
+    base, edits = {}, {}
+    for (d, i), (b, v) in cells.items():
+        base.setdefault(d, {})[i] = b
+        edits[(d, i)] = v
+    try:
+        latest, _, conflicts = storage.merge_score_cells(base, edits, juror, event)
+        error = None
+    except Exception as e:  # keep the edits queued; the next burst retries
+        latest, conflicts, error = None, {}, f"{type(e).__name__}: {e}"
+    with _LOCK:
+        if error:
+            retry = _job(key)["cells"]
+            for cell, edit in cells.items():
+                retry.setdefault(cell, edit)
+        written = _WRITTEN.setdefault(token, {})
+        for (d, i), v in edits.items():
+            if (d, i) not in conflicts:
+                written[(event, juror, d, i)] = v
+        res = _RESULTS.setdefault(token, {"applied": {}, "conflicts": {}})
+        res["applied"].update({(event, juror, d, i): v for (d, i), v in edits.items() if (d, i) not in conflicts})
+        res["conflicts"].update({(event, juror, d, i): v for (d, i), v in conflicts.items()})
+        res["error"] = error
+        res["t"] = time.monotonic()
+        if latest is not None:
+            res["version"] = int(latest.get("version") or 0)
+            res["at"] = datetime.now().strftime("%H:%M:%S")
+        _retire(res["t"] - RESULT_TTL)
+
+def _retire(before: float):
+    # Under _LOCK.
+    for token in [t for t, res in _RESULTS.items() if res["t"] < before and not _pending(t)]:
+        del _RESULTS[token]
+        _WRITTEN.pop(token, None)
+
+def _pending(token: str) -> bool:
+    # Under _LOCK.
+    return any(k[0] == token for k in _PENDING)
+
+def _worker():
+    while True:
+        with _LOCK:
+            now = time.monotonic()
+            due = [key for key, job in _PENDING.items() if job["flush"] or _due_at(job) <= now]
+            batch = {key: _PENDING.pop(key)["cells"] for key in due}
+            if not batch:
+                if not _PENDING:
+                    _IDLE.set()
+                # Sleep until the next job is due or a new edit comes in.
+                wait = min((_due_at(job) - now for job in _PENDING.values()), default=None)
+                _WAKE.clear()
+        if not batch:
+            _WAKE.wait(wait)
+            continue
+        # A failed job is put back as a fresh one: retried after another window.
+        for key, cells in batch.items():
+            _save(key, cells)
+
+def flush(timeout: float | None = None) -> bool:
+    # Wait until everything queued so far is written (manual save, tests).
+    with _LOCK:
+        for job in _PENDING.values():
+            job["flush"] = True  # end the debounce windows now
+    _WAKE.set()
+    return _IDLE.wait(timeout)
+
+def status(token: str) -> dict:
+    with _LOCK:
+        res = _RESULTS.get(token) or {}
+        return {
+            "pending": _pending(token),
+            "version": res.get("version"),
+            "at": res.get("at"),
+            "error": res.get("error"),
+            "conflicts": len(res.get("conflicts") or ()),
+        }
+
+def take_results(token: str) -> tuple[dict, dict]:
+    # ({(event, juror, d, i): value} saved, {...: stored value} conflicts)
+    # since the last call; the session folds them into its slider bases. Once
+    # read, a settled result is dropped; status() then reports nothing saved
+    # and the session shows what it last saw. A failed job keeps its error
+    # until the retry succeeds.
+    with _LOCK:
+        res = _RESULTS.get(token)
+        if not res:
+            return {}, {}
+        applied, conflicts = res["applied"], res["conflicts"]
+        res["applied"], res["conflicts"] = {}, {}
+        _WRITTEN.pop(token, None)
+        if not res["error"] and not _pending(token):
+            del _RESULTS[token]
+        return applied, conflicts
@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+from . import events, history, publish, storage
+from .compute import details_df, totals_df
+from .draw import verify_draw
+from .export import state_excel_bytes
+from .rubric import DEFAULT_RUBRIC, load_rubric
+
+# Headless batch operations on score files, e.g.
+#
+#   python -m hackathon show scores.json
+#   python -m hackathon totals --csv events/*.json
+#   python -m hackathon export -o reports/ events/*.json
+#   python -m hackathon verify-draw events/*.json
+#   python -m hackathon publish -o site/ scores.json
+#   python -m hackathon show --backend sqlite scores.db
+#   python -m hackathon show --backend packed scores.bin
+#   python -m hackathon history scores.json [--version N | --at "2025-12-20 15:00:00"]
+#
+# Every command takes any number of files and processes them in this one
+# process; files are only read, never rewritten. A file inside an event
+# directory is read with that event's rubric.json.
+#
+# Events (see hackathon/events.py) are managed with
+#
+#   python -m hackathon events list [--all]
+#   python -m hackathon events create spring25 --title-kk "..." [--rubric r.json] [--from scores.json]
+#   python -m hackathon events activate spring25
+#   python -m hackathon events archive spring25
+#
+# and a rubric file is started from the built-in one and checked with
+#
+#   python -m hackathon rubric -o rubric.json
+#   python -m hackathon rubric rubric.json
+
+
+def _excel_name(path: str, state: dict) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    stamp = (state.get("updated_at") or "").replace(":", "-").replace(" ", "_")
+    return f"{stem}_{stamp or 'export'}.xlsx"
+
+def cmd_show(path: str, state: dict, args) -> bool:
+    jurors = sorted(state.get("juror_scores") or {})
+    print(f"== {path}")
+    print(f"version: {state.get('version')}  updated_at: {state.get('updated_at')}")
+    print(f"jurors: {', '.join(jurors) if jurors else '-'}")
+    print("presentation_order:")
+    for i, d in enumerate(state["presentation_order"], start=1):
+        print(f"  {i}. {d}")
+    last = state.get("last_draw") or {}
+    if last:
+        print(f"last_draw: {last.get('time', '')}  commit={last.get('commit', '')}")
+    print(totals_df(state, args.rubric).to_string(index=False))
+    return True
+
+def cmd_totals(path: str, state: dict, args) -> bool:
+    df = details_df(state, args.rubric) if args.details else totals_df(state, args.rubric)
+    df.insert(0, "file", path)
+    if args.csv:
+        df.to_csv(sys.stdout, index=False, header=args.first)
+    else:
+        print(df.to_string(index=False))
+    return True
+
+def cmd_export(path: str, state: dict, args) -> bool:
+    out = os.path.join(args.out, _excel_name(path, state))
+    with open(out, "wb") as f:
+        f.write(state_excel_bytes(state, args.rubric))
+    print(out)
+    return True
+
+def cmd_verify_draw(path: str, state: dict, args) -> bool:
+    problems = verify_draw(state, args.rubric.directions)
+    print(f"{path}: {'OK' if not problems else 'FAIL: ' + '; '.join(problems)}")
+    return not problems
+
+def cmd_publish(path: str, state: dict, args) -> bool:
+    out = args.out if len(args.files) == 1 else os.path.join(args.out, os.path.splitext(os.path.basename(path))[0])
+    publish.write_snapshots(state, out, png=args.png, rubric=args.rubric)
+    print(out)
+    return True
+
+def cmd_history(path: str, state: dict, args) -> bool:
+    # The save history next to `path` (scores.history): every change, or the
+    # leaderboard as of --version / --at.
+    hist = os.path.splitext(path)[0] + ".history"
+    if not os.path.exists(hist):
+        print(f"{hist}: no history", file=sys.stderr)
+        return False
+    print(f"== {hist}")
+    if args.version is not None or args.at:
+        rows = history.leaderboard_at(args.version, args.at, rubric=args.rubric, path=hist)
+        if not rows:
+            print("no saves recorded by then")
+        for r in rows:
+            print(f"{r['rank']:3d}. {r['total']:>8s}  {r['name']}")
+        return True
+    for v, t, cells, meta in history.changes(path=hist):
+        changed = ", ".join(f"{j or '*'}:{d}[{i}]={x}" for j, d, i, x in cells)
+        print(f"v{v:<6d} {t}  {len(cells)} cells  {' '.join(sorted(meta))}  {changed[:200]}")
+    return True
+
+def cmd_dump(path: str, state: dict, args) -> bool:
+    json.dump(state, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    return True
+
+COMMANDS = {
+    "show": cmd_show,
+    "totals": cmd_totals,
+    "export": cmd_export,
+    "verify-draw": cmd_verify_draw,
+    "publish": cmd_publish,
+    "dump": cmd_dump,
+    "history": cmd_history,
+}
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m hackathon", description="Batch operations on score files.")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    def add(name: str, help: str) -> argparse.ArgumentParser:
+        p = sub.add_parser(name, help=help)
+        p.add_argument("files", nargs="+", help="state files (scores.json, scores.db, ...)")
+        p.add_argument("--backend", choices=sorted(storage.STORES), default="json")
+        return p
+
+    add("show", "print version, order, last draw and totals")
+    p = add("totals", "print the leaderboard (or per-criterion details)")
+    p.add_argument("--details", action="store_true", help="one row per criterion")
+    p.add_argument("--csv", action="store_true", help="CSV on stdout, one header for all files")
+    p = add("export", "write the Excel export of each file")
+    p.add_argument("-o", "--out", default=".", help="output directory")
+    add("verify-draw", "check commit = sha256(seed) and that the seed reproduces the order")
+    p = add("publish", "write the static leaderboard/order pages")
+    p.add_argument("-o", "--out", default="site", help="output directory (one subdirectory per file if several)")
+    p.add_argument("--png", action="store_true", help="also write leaderboard.png")
+    add("dump", "print the normalized state as JSON")
+    p = add("history", "print the save history (scores.history) or the leaderboard at a past point")
+    p.add_argument("--version", type=int, help="leaderboard as of this state version")
+    p.add_argument("--at", help="leaderboard as of this time (YYYY-mm-dd HH:MM:SS)")
+
+    p = sub.add_parser("events", help="list, create, activate or archive events")
+    p.add_argument("action", choices=["list", "create", "activate", "archive"])
+    p.add_argument("id", nargs="?", help="event id (lowercase letters, digits, - and _)")
+    p.add_argument("--dir", default=events.EVENTS_DIR, help="events directory")
+    p.add_argument("--all", action="store_true", help="list archived events too")
+    p.add_argument("--title-kk", default="")
+    p.add_argument("--title-ru", default="")
+    p.add_argument("--rubric", help="rubric JSON for the new event (default: the built-in one)")
+    p.add_argument("--from", dest="source", help="seed the new event with this scores.json")
+    p.add_argument("--activate", action="store_true", help="make the new event the active one")
+
+    p = sub.add_parser("rubric", help="check a rubric file, or write out the built-in rubric")
+    p.add_argument("file", nargs="?", help="rubric JSON (default: the built-in rubric)")
+    p.add_argument("-o", "--out", help="write the rubric JSON here instead of stdout")
+    return ap
+
+def cmd_rubric(args) -> int:
+    try:
+        rubric = load_rubric(args.file) if args.file else DEFAULT_RUBRIC
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"{args.file}: {e}", file=sys.stderr)
+        return 1
+    text = json.dumps(rubric.to_dict(), ensure_ascii=False, indent=2) + "\n"
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    print(
+        f"{len(rubric.directions)} directions, {rubric.n_cells} criteria, 0-{rubric.max_per_criterion} points, "
+        f"{len(rubric.aliases)} aliases, fingerprint {rubric.fingerprint}",
+        file=sys.stderr,
+    )
+    return 0
+
+def cmd_events(args) -> int:
+    events.configure(args.dir)
+    if args.action == "list":
+        active = events.active_event()
+        for e in events.list_events(args.all):
+            mark = "*" if e["id"] == active else " "
+            print(f"{mark} {e['id']:20s} {e.get('status', ''):9s} {e.get('title_kk', '')} / {e.get('title_ru', '')}")
+        return 0
+    if not args.id:
+        print("events: an event id is required", file=sys.stderr)
+        return 1
+    try:
+        if args.action == "create":
+            rubric = load_rubric(args.rubric) if args.rubric else None
+            events.create_event(args.id, args.title_kk, args.title_ru, rubric, args.activate)
+            if args.source:
+                # Normalized against the new event's rubric, not the source's.
+                seed = storage.read_state(args.source, rubric=rubric or storage.RUBRIC)
+                storage.export_json(seed, events.event_paths(args.id)["data_file"])
+            print(events.event_dir(args.id))
+        elif args.action == "activate":
+            events.set_active(args.id)
+        else:
+            events.archive_event(args.id)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "events":
+        return cmd_events(args)
+    if args.command == "rubric":
+        return cmd_rubric(args)
+    cmd = COMMANDS[args.command]
+    if args.command == "export":
+        os.makedirs(args.out, exist_ok=True)
+    ok = True
+    for n, path in enumerate(args.files):
+        args.first = n == 0
+        try:
+            state = storage.read_state(path, args.backend)
+        except FileNotFoundError:
+            print(f"{path}: no such file", file=sys.stderr)
+            ok = False
+            continue
+        except (OSError, ValueError) as e:
+            print(e, file=sys.stderr)
+            ok = False
+            continue
+        except sqlite3.Error as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            ok = False
+            continue
+        args.rubric = storage.file_rubric(path)
+        ok = cmd(path, state, args) and ok
+    return 0 if ok else 1
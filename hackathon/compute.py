@@ -0,0 +1,103 @@
+import numpy as np
+
+from .rubric import DEFAULT_RUBRIC, Rubric
+
+# pandas is imported inside totals_df()/details_df(): the leaderboard and
+# order screens only need the tensor.
+
+
+class ScoreTensor:
+    # values[j, t, c] = score of sheet j for team (direction) t on criterion c;
+    # sheet 0 is the shared sheet ("" in `jurors`), then one per juror. Teams
+    # with fewer criteria than the widest one are zero-padded; `mask` marks
+    # the real cells and `scored` the cells a sheet has actually scored
+    # (storage.UNSCORED is negative).
+    def __init__(self, teams: list[str], jurors: list[str], n_criteria, values: np.ndarray):
+        self.teams = list(teams)
+        self.jurors = list(jurors)
+        self.team_index = {t: k for k, t in enumerate(self.teams)}
+        self.n_criteria = np.asarray(n_criteria, dtype=np.int32)
+        self.values = values
+        self.mask = np.arange(values.shape[2])[None, :] < self.n_criteria[:, None]
+        self.scored = (values >= 0) & self.mask[None, :, :]
+        # Tie-break rank of each team name, matching the old sort on "Бағыт".
+        self.name_rank = np.empty(len(self.teams), dtype=np.int64)
+        self.name_rank[np.argsort(np.array(self.teams, dtype=object))] = np.arange(len(self.teams))
+
+    @classmethod
+    def from_state(cls, state: dict, rubric: Rubric | None = None) -> "ScoreTensor":
+        rubric = rubric or DEFAULT_RUBRIC
+        directions, n_criteria = rubric.directions, rubric.n_criteria
+        jurors = sorted(state.get("juror_scores") or {})
+        sheets = [state["scores"]] + [state["juror_scores"][j] for j in jurors]
+        values = np.zeros((len(sheets), len(directions), max(n_criteria, default=0)), dtype=np.int8)
+        for j, sheet in enumerate(sheets):
+            for t, d in enumerate(directions):
+                arr = sheet.get(d)
+                if arr:
+                    values[j, t, : len(arr)] = arr
+        return cls(directions, [""] + jurors, n_criteria, values)
+
+    def totals(self) -> np.ndarray:
+        return self.criterion_means().sum(axis=1)
+
+    def criterion_means(self) -> np.ndarray:
+        # Each cell averaged over the sheets that scored it; 0 if none did.
+        sums = np.where(self.scored, self.values, 0).sum(axis=0, dtype=np.float64)
+        counts = self.scored.sum(axis=0)
+        return np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+    def order(self) -> np.ndarray:
+        # Team indices by total (desc), then name (asc).
+        return np.lexsort((self.name_rank, -tie_totals(self.totals())))
+
+    def ranks(self) -> np.ndarray:
+        ranks = np.empty(len(self.teams), dtype=np.int32)
+        ranks[self.order()] = np.arange(1, len(self.teams) + 1)
+        return ranks
+
+def tie_totals(totals: np.ndarray) -> np.ndarray:
+    # Totals as compared for ranking: means that are equal on paper (31/6
+    # summed two ways) must tie and fall back to the name order, not differ
+    # in the last float bit.
+    return np.round(totals, 9)
+
+def score_tensor(state: dict, rubric: Rubric | None = None) -> ScoreTensor:
+    rubric = rubric or DEFAULT_RUBRIC
+    return ScoreTensor.from_state(state, rubric)
+
+def score_values(arr: np.ndarray) -> np.ndarray:
+    # Whole numbers stay ints (single juror); juror means keep two decimals.
+    if np.all(arr == np.round(arr)):
+        return arr.astype(np.int64)
+    return np.round(arr, 2)
+
+def fmt_score(x) -> str:
+    return f"{float(x):g}"
+
+def totals_df(state: dict, rubric: Rubric | None = None):
+    import pandas as pd
+
+    t = score_tensor(state, rubric)
+    order = t.order()
+    return pd.DataFrame({
+        "Бағыт": np.array(t.teams, dtype=object)[order],
+        "Total": score_values(t.totals()[order]),
+    })
+
+def details_df(state: dict, rubric: Rubric | None = None):
+    import pandas as pd
+
+    rubric = rubric or DEFAULT_RUBRIC
+    t = score_tensor(state, rubric)
+    team_idx, crit_idx = np.nonzero(t.mask)
+    crits = [c for d in t.teams for c in rubric.criteria[d]]
+    teams = np.array(t.teams, dtype=object)[team_idx]
+    return pd.DataFrame({
+        "Бағыт (KK)": teams,
+        "Направление (RU)": [rubric.direction_ru.get(d, "") for d in teams],
+        "N": crit_idx + 1,
+        "Критерий (KK)": [c["kk"] for c in crits],
+        "Критерий (RU)": [c["ru"] for c in crits],
+        "Score": score_values(t.criterion_means()[t.mask]),
+    })
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import random
+import time
+
+from .rubric import DEFAULT_RUBRIC, Rubric
+
+
+def sha256_hex(s: str) -> str:
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+def fair_draw_order(seed: str, directions: list[str]) -> list[str]:
+    rng = random.Random(int(seed, 16))
+    final_order = list(directions)
+    rng.shuffle(final_order)
+    return final_order
+
+def draw_seconds(n_directions: int) -> float:
+    # How long the browser animation runs (see DRAW_ANIMATION_JS).
+    return n_directions * (DRAW_SPINS * DRAW_SPIN_MS + DRAW_HOLDS * DRAW_HOLD_MS) / 1000
+
+def order_revealed(state: dict, now: float | None = None) -> bool:
+    # A fresh draw's order stays off the other screens (order list, static
+    # pages, results) until its animation has played: last_draw["reveal_at"].
+    reveal_at = (state.get("last_draw") or {}).get("reveal_at") or 0
+    return float(reveal_at) <= (time.time() if now is None else now)
+
+def verify_draw(state: dict, directions: list[str]) -> list[str]:
+    # Re-checks a committed draw: the seed must hash to the published commit
+    # and must reproduce the stored presentation order. Returns the problems.
+    last = state.get("last_draw")
+    if not last:
+        return ["no draw recorded"]
+    seed, commit = last.get("seed") or "", last.get("commit") or ""
+    problems = []
+    if sha256_hex(seed) != commit:
+        problems.append("commit != sha256(seed)")
+    try:
+        order = fair_draw_order(seed, directions)
+    except ValueError:
+        return problems + ["seed is not hex"]
+    if order != state.get("presentation_order"):
+        problems.append("presentation_order does not match the seed")
+    return problems
+
+DRAW_SPINS, DRAW_SPIN_MS = 20, 50
+DRAW_HOLDS, DRAW_HOLD_MS = 7, 60
+
+DRAW_ANIMATION_JS = """
+const P = JSON.parse(document.getElementById("payload").textContent);
+const root = document.getElementById("draw");
+const bar = document.getElementById("bar");
+const done = document.getElementById("done");
+const item = (n, cls, badge) =>
+  `<div class="drawitem ${cls}"><div class="team"><div class="kk">${n.kk}</div><div class="ru">${n.ru}</div></div>` +
+  (badge ? `<span class="drawbadge">${badge}</span>` : "") + `</div>`;
+function paint(picked, remaining, hi) {
+  const left = picked.length
+    ? picked.map((k, i) => item(P.names[k], "picked", i + 1)).join("")
+    : "<div class='small-muted'>Әлі таңдалмаған • Пока не выбрано</div>";
+  const right = remaining.length
+    ? remaining.map((k, i) => item(P.names[k], i === hi ? "hl" : "", null)).join("")
+    : "<div class='small-muted'>Аяқталды • Завершено</div>";
+  root.innerHTML =
+    `<div class="drawcard"><div class="drawtitle">Таңдалған кезектілік <span class="small-muted">Выбранный порядок</span></div>${left}</div>` +
+    `<div class="drawcard"><div class="drawtitle">Қалған бағыттар <span class="small-muted">Оставшиеся направления</span></div>${right}</div>`;
+}
+const sleep = (ms) => new Promise((r) => setTimeout(r, ms));
+(async () => {
+  const picked = [], remaining = P.names.map((_, k) => k);
+  paint(picked, remaining, null);
+  for (const chosen of P.order) {
+    for (let s = 0; s < P.spins; s++) {
+      paint(picked, remaining, Math.floor(Math.random() * remaining.length));
+      await sleep(P.spin_ms);
+    }
+    for (let s = 0; s < P.holds; s++) {
+      paint(picked, remaining, remaining.indexOf(chosen));
+      await sleep(P.hold_ms);
+    }
+    picked.push(chosen);
+    remaining.splice(remaining.indexOf(chosen), 1);
+    bar.style.width = (100 * picked.length / P.order.length) + "%";
+    paint(picked, remaining, null);
+  }
+  done.style.display = "block";
+})();
+"""
+
+DRAW_ANIMATION_CSS = """
+body { margin: 0; font-family: "Source Sans Pro", sans-serif; color: #31333f; }
+.small-muted { color: #8a8a8a; font-size: 0.92rem; }
+.team { line-height: 1.1; }
+.team .kk { font-weight: 900; font-size: 1.02rem; }
+.team .ru { color:#8a8a8a; font-size: 0.90rem; margin-top: 2px; }
+.drawwrap { display:grid; grid-template-columns: 1fr 1fr; gap: 14px; margin-top: 10px; }
+.drawcard { border: 1px solid rgba(0,0,0,0.08); border-radius: 18px; padding: 14px; background: rgba(0,0,0,0.015); }
+.drawtitle { font-weight: 950; font-size: 1.05rem; margin-bottom: 8px; }
+.drawitem { border: 1px solid rgba(0,0,0,0.08); border-radius: 14px; padding: 10px 12px; margin: 8px 0; background: rgba(0,0,0,0.01); }
+.drawitem.hl { border-color: rgba(34,197,94,0.50); box-shadow: 0 0 0 3px rgba(34,197,94,0.12); background: rgba(34,197,94,0.06); }
+.drawitem.picked { border-color: rgba(59,130,246,0.30); background: rgba(59,130,246,0.05); }
+.drawbadge { display:inline-block; font-size: 0.82rem; color:#6f7680; border:1px solid rgba(0,0,0,0.08); padding:2px 10px; border-radius:999px; margin-left: 10px; }
+.progress { height: 6px; border-radius: 3px; background: rgba(0,0,0,0.06); margin-top: 12px; }
+.progress div { height: 100%; width: 0; border-radius: 3px; background: #ff4b4b; transition: width 0.2s; }
+.done { display: none; margin-top: 12px; padding: 10px 12px; border-radius: 10px; background: rgba(34,197,94,0.10); }
+"""
+
+def draw_animation_html(
+    seed: str,
+    directions: list[str],
+    final_order: list[str],
+    rubric: Rubric | None = None,
+) -> str:
+    # Everything the browser needs in one message; the spin/highlight timing
+    # is the one the server-side loop used to sleep through.
+    direction_ru = (rubric or DEFAULT_RUBRIC).direction_ru
+    payload = {
+        "names": [{"kk": d, "ru": direction_ru.get(d, "")} for d in directions],
+        "order": [directions.index(d) for d in final_order],
+        "spins": DRAW_SPINS,
+        "spin_ms": DRAW_SPIN_MS,
+        "holds": DRAW_HOLDS,
+        "hold_ms": DRAW_HOLD_MS,
+    }
+    payload_json = json.dumps(payload, ensure_ascii=False).replace("</", "<\\/")
+    return f"""
+<style>{DRAW_ANIMATION_CSS}</style>
+<div id="draw" class="drawwrap"></div>
+<div class="progress"><div id="bar"></div></div>
+<div id="done" class="done">
+  <b>Жеребе аяқталды. Seed ашылды.</b> <span class="small-muted">Жеребьёвка завершена. Seed раскрыт.</span>
+  <div class="small-muted">Seed: <code>{seed}</code></div>
+</div>
+<script id="payload" type="application/json">{payload_json}</script>
+<script>{DRAW_ANIMATION_JS}</script>
+"""
@@ -0,0 +1,168 @@
+import json
+import os
+import re
+import threading
+from datetime import datetime
+
+from .rubric import DEFAULT_RUBRIC, Rubric, load_rubric
+
+# Several hackathons/tracks in one app. Each event is a directory
+#
+#   events/index.json          {"active": id, "events": [{id, title_kk, title_ru, status, created_at}]}
+#   events/<id>/scores.json    its own state shard (scores.db / .journal / .bin per backend)
+#   events/<id>/scores.history its save history (hackathon/history.py)
+#   events/<id>/rubric.json    optional; the built-in rubric otherwise
+#
+# Only the index (a few hundred bytes, cached by mtime) and the shards of the
+# events actually opened are ever read; archived events stay on disk untouched.
+# Without an index the app keeps using the single legacy scores.json.
+
+EVENTS_DIR = "events"
+INDEX_FILE = "index.json"
+RUBRIC_FILE = "rubric.json"
+
+EVENT_ID_RE = re.compile(r"^[a-z0-9][a-z0-9_-]{0,63}$")
+
+_LOCK = threading.Lock()
+_INDEX_CACHE = {"stamp": None, "index": None}
+
+
+def configure(events_dir: str | None = None):
+    global EVENTS_DIR
+    if events_dir is None or events_dir == EVENTS_DIR:
+        return
+    with _LOCK:
+        EVENTS_DIR = events_dir
+        _INDEX_CACHE.update(stamp=None, index=None)
+
+def _stamp(path: str):
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return (info.st_ino, info.st_mtime_ns, info.st_size)
+
+def _write_json(path: str, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+def index_path() -> str:
+    return os.path.join(EVENTS_DIR, INDEX_FILE)
+
+def read_index() -> dict:
+    path = index_path()
+    stamp = _stamp(path)
+    with _LOCK:
+        if stamp is None:
+            return {"active": None, "events": []}
+        if _INDEX_CACHE["stamp"] == stamp:
+            return _INDEX_CACHE["index"]
+    with open(path, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    index.setdefault("active", None)
+    index.setdefault("events", [])
+    with _LOCK:
+        _INDEX_CACHE.update(stamp=stamp, index=index)
+    return index
+
+def _update_index(fn) -> dict:
+    # Read-modify-write of the index; events are created/archived rarely and
+    # only by an admin, so a process lock is enough.
+    with _LOCK:
+        path = index_path()
+        index = {"active": None, "events": []}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        fn(index)
+        os.makedirs(EVENTS_DIR, exist_ok=True)
+        _write_json(path, index)
+        _INDEX_CACHE.update(stamp=None, index=None)
+        return index
+
+def list_events(include_archived: bool = False) -> list[dict]:
+    return [e for e in read_index()["events"] if include_archived or e.get("status") != "archived"]
+
+def get_event(event_id: str, include_archived: bool = True) -> dict | None:
+    for e in read_index()["events"]:
+        if e["id"] == event_id:
+            return e if include_archived or e.get("status") != "archived" else None
+    return None
+
+def active_event() -> str | None:
+    active = read_index().get("active")
+    return active if active and get_event(active, include_archived=False) else None
+
+def event_title(event_id: str | None) -> tuple[str, str]:
+    e = get_event(event_id) if event_id else None
+    if not e:
+        return "", ""
+    return e.get("title_kk") or e["id"], e.get("title_ru") or ""
+
+def event_dir(event_id: str) -> str:
+    if not EVENT_ID_RE.match(event_id or ""):
+        raise ValueError(f"bad event id: {event_id!r}")
+    return os.path.join(EVENTS_DIR, event_id)
+
+def event_paths(event_id: str) -> dict:
+    d = event_dir(event_id)
+    return {
+        "data_file": os.path.join(d, "scores.json"),
+        "db_file": os.path.join(d, "scores.db"),
+        "journal_file": os.path.join(d, "scores.journal"),
+        "packed_file": os.path.join(d, "scores.bin"),
+        "history_file": os.path.join(d, "scores.history"),
+    }
+
+def event_rubric(event_id: str) -> Rubric:
+    path = os.path.join(event_dir(event_id), RUBRIC_FILE)
+    return load_rubric(path) if os.path.exists(path) else DEFAULT_RUBRIC
+
+def create_event(
+    event_id: str,
+    title_kk: str = "",
+    title_ru: str = "",
+    rubric: Rubric | None = None,
+    activate: bool = False,
+) -> dict:
+    d = event_dir(event_id)
+    if get_event(event_id):
+        raise ValueError(f"event {event_id!r} already exists")
+    os.makedirs(d, exist_ok=True)
+    if rubric is not None:
+        _write_json(os.path.join(d, RUBRIC_FILE), rubric.to_dict())
+    entry = {
+        "id": event_id,
+        "title_kk": title_kk or event_id,
+        "title_ru": title_ru,
+        "status": "open",
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+    def add(index):
+        index["events"].append(entry)
+        if activate or not index.get("active"):
+            index["active"] = event_id
+
+    _update_index(add)
+    return entry
+
+def set_active(event_id: str):
+    if not get_event(event_id, include_archived=False):
+        raise ValueError(f"no open event {event_id!r}")
+    _update_index(lambda index: index.update(active=event_id))
+
+def archive_event(event_id: str):
+    if not get_event(event_id):
+        raise ValueError(f"no event {event_id!r}")
+
+    def archive(index):
+        for e in index["events"]:
+            if e["id"] == event_id:
+                e["status"] = "archived"
+        if index.get("active") == event_id:
+            index["active"] = None
+
+    _update_index(archive)
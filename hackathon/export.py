@@ -0,0 +1,52 @@
+from io import BytesIO
+
+from .compute import details_df, totals_df
+from .robustness import robustness_df
+from .rubric import DEFAULT_RUBRIC, Rubric
+
+# pandas/openpyxl are imported inside the functions so that importing this
+# module stays cheap.
+
+
+def _write_sheet(wb, title: str, df):
+    # Write-only sheets stream rows to disk instead of holding cell objects.
+    ws = wb.create_sheet(title)
+    ws.append(list(df.columns))
+    for row in df.itertuples(index=False, name=None):
+        ws.append(list(row))
+
+def to_excel_bytes(df_totals, df_details, updated_at: str, df_robustness=None) -> bytes:
+    import pandas as pd
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    _write_sheet(wb, "Totals", df_totals)
+    _write_sheet(wb, "Details", df_details)
+    if df_robustness is not None:
+        _write_sheet(wb, "Robustness", df_robustness)
+    _write_sheet(wb, "Meta", pd.DataFrame({"updated_at": [updated_at]}))
+    buf = BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+def scores_key(state: dict, rubric: Rubric | None = None) -> tuple:
+    directions = (rubric or DEFAULT_RUBRIC).directions
+    shared = tuple((d, tuple(int(x) for x in state["scores"][d])) for d in directions)
+    jurors = tuple(
+        (j, tuple((d, tuple(int(x) for x in sheet[d])) for d in directions))
+        for j, sheet in sorted((state.get("juror_scores") or {}).items())
+    )
+    return (shared, jurors)
+
+def state_from_scores_key(scores: tuple) -> dict:
+    shared, jurors = scores
+    return {
+        "scores": {d: list(v) for d, v in shared},
+        "juror_scores": {j: {d: list(v) for d, v in sheet} for j, sheet in jurors},
+    }
+
+def state_excel_bytes(state: dict, rubric: Rubric | None = None) -> bytes:
+    updated_at = state.get("updated_at") or ""
+    return to_excel_bytes(
+        totals_df(state, rubric), details_df(state, rubric), updated_at, robustness_df(state, rubric)
+    )
@@ -0,0 +1,419 @@
+import bisect
+import itertools
+import json
+import os
+import threading
+from datetime import datetime
+
+from . import storage
+from .compute import ScoreTensor, fmt_score
+from .rubric import DEFAULT_RUBRIC, Rubric
+from .views import LB_CSS, leaderboard_rows
+
+# Save history, one JSON line per persisted state next to the shard
+# (scores.history, events/<id>/scores.history):
+#
+#   {"v": 1, "t": "...", "key": {"dirs": [[name, n], ...], "scores": ..., "juror_scores": ...,
+#                                "presentation_order": ..., "last_draw": ..., "fp": ...}}
+#   {"v": 2, "t": "...", "c": [[juror, k, i, value], ...], "j": [new jurors], "m": {key: value}}
+#
+# A keyframe ("key") is a full copy, written first and then every
+# KEYFRAME_EVERY saves; every other save is a delta: the cells that changed
+# (k = index into the last keyframe's dirs), jurors that appeared and changed
+# meta fields. state_at() seeks to the keyframe before the wanted version or
+# time and replays at most KEYFRAME_EVERY deltas. Recorded by a save hook
+# (configure(enabled=True)), so every backend gets it; a save of a few cells
+# is diffed on those cells only.
+#
+# Versions restart when scores.json is reset or recreated. The first record
+# after the version goes backwards is a keyframe with "g": <generation>;
+# version lookups search the latest generation, and records are otherwise
+# addressed by position (timeline() index).
+
+ENABLED = False
+KEYFRAME_EVERY = 100
+MAX_FRAMES = 120
+META_KEYS = ("presentation_order", "last_draw")
+
+_LOCK = threading.Lock()
+_LAST = {}  # history path -> what the last record left: {"dirs", "flat", "jurors", "meta", "fp", "v", "g", "since_key"}
+_INDEX = {}  # history path -> {"offset", "v", "t", "pos", "key", "g", "gen"} of the lines read so far
+
+
+def configure(enabled: bool = False, keyframe_every: int | None = None):
+    global ENABLED, KEYFRAME_EVERY
+    ENABLED = bool(enabled)
+    if keyframe_every is not None:
+        KEYFRAME_EVERY = max(1, int(keyframe_every))
+    if ENABLED and record not in storage.SAVE_HOOKS:
+        storage.SAVE_HOOKS.append(record)
+
+def _sheets(state: dict):
+    yield None, state["scores"]
+    for j, sheet in sorted((state.get("juror_scores") or {}).items()):
+        yield j, sheet
+
+def _flat(state: dict) -> dict:
+    return {(j, d, i): int(v) for j, sheet in _sheets(state) for d, arr in sheet.items() for i, v in enumerate(arr)}
+
+def _keyframe(state: dict) -> dict:
+    return {
+        "dirs": [[d, len(arr)] for d, arr in state["scores"].items()],
+        "scores": state["scores"],
+        "juror_scores": state.get("juror_scores") or {},
+        **{k: state.get(k) for k in META_KEYS},
+        "fp": state.get("rubric_fp"),
+    }
+
+def _apply(s: dict, dirs: list, rec: dict):
+    # Folds one record into `s` (and the keyframe's `dirs`), in place.
+    if "key" in rec:
+        key = rec["key"]
+        dirs[:] = [tuple(x) for x in key["dirs"]]
+        s.clear()
+        s.update(
+            scores=key["scores"],
+            juror_scores=key["juror_scores"],
+            rubric_fp=key.get("fp"),
+            **{k: key.get(k) for k in META_KEYS},
+        )
+    else:
+        for j in rec.get("j", ()):
+            s["juror_scores"][j] = {d: [storage.UNSCORED] * n for d, n in dirs}
+        for j, k, i, v in rec.get("c", ()):
+            sheet = s["scores"] if j is None else s["juror_scores"][j]
+            sheet[dirs[k][0]][i] = v
+        s.update(rec.get("m") or {})
+    s["version"] = rec["v"]
+    s["updated_at"] = rec["t"]
+
+def _read_last(path: str) -> dict | None:
+    # Where an existing file left off, for the first record of this process.
+    idx = _index(path)
+    if not idx["v"]:
+        return None
+    n = len(idx["v"]) - 1
+    first = idx["key"][-1]
+    s, dirs = _replay(path, idx["pos"][first], n - first + 1)
+    return {
+        "dirs": dirs,
+        "flat": _flat(s),
+        "jurors": set(s["juror_scores"]),
+        "meta": {k: s.get(k) for k in META_KEYS},
+        "fp": s.get("rubric_fp"),
+        "v": idx["v"][-1],
+        "g": idx["g"][-1],
+        "since_key": n - first,
+    }
+
+def record(state: dict, event: str | None = None, cells: dict | None = None, juror: str | None = None):
+    # Save hook (runs under the storage write lock): appends one line. With
+    # `cells` ({(direction, idx): value} on `juror`'s sheet) only those cells
+    # are compared; a full write (cells=None) is diffed cell by cell.
+    if not ENABLED:
+        return
+    path = storage.history_file(event)
+    with _LOCK:
+        last = _LAST.get(path)
+    if last is None:
+        last = _read_last(path)
+    dirs = [(d, len(arr)) for d, arr in state["scores"].items()]
+    jurors = set(state.get("juror_scores") or {})
+    meta = {k: state.get(k) for k in META_KEYS}
+    fp = state.get("rubric_fp")
+    version = int(state.get("version") or 0)
+    rec = {"v": version, "t": state.get("updated_at") or ""}
+    gen = last["g"] if last else 0
+    if last is not None and version < last["v"]:
+        # The shard was reset or recreated: its versions start over.
+        gen += 1
+        rec["g"] = gen
+    if (
+        last is None
+        or "g" in rec
+        or last["dirs"] != dirs
+        or last["fp"] != fp
+        or last["since_key"] + 1 >= KEYFRAME_EVERY
+        or not last["jurors"] <= jurors
+    ):
+        rec["key"] = _keyframe(state)
+        flat, changed = _flat(state), ()
+        since_key = 0
+    else:
+        flat = last["flat"]
+        if cells is None:
+            changed = [(c, v) for c, v in _flat(state).items() if flat.get(c, storage.UNSCORED) != v]
+        else:
+            changed = [
+                ((juror, d, i), int(v)) for (d, i), v in cells.items()
+                if flat.get((juror, d, i), storage.UNSCORED) != int(v)
+            ]
+        k_of = {d: k for k, (d, _) in enumerate(dirs)}
+        rec["c"] = [[j, k_of[d], i, v] for (j, d, i), v in changed]
+        new_jurors = sorted(jurors - last["jurors"])
+        if new_jurors:
+            rec["j"] = new_jurors
+        meta_changed = {k: v for k, v in meta.items() if last["meta"].get(k) != v}
+        if meta_changed:
+            rec["m"] = meta_changed
+        since_key = last["since_key"] + 1
+    _append(path, json.dumps(rec, ensure_ascii=False, separators=storage.JSON_SEPARATORS) + "\n")
+    flat.update(changed)
+    with _LOCK:
+        _LAST[path] = {
+            "dirs": dirs,
+            "flat": flat,
+            "jurors": jurors,
+            "meta": meta,
+            "fp": fp,
+            "v": version,
+            "g": gen,
+            "since_key": since_key,
+        }
+
+def _append(path: str, line: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    storage.drop_torn_line(path)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line)
+
+def _parse(line: bytes) -> dict | None:
+    # None for a line still being written or a damaged one.
+    if not line.endswith(b"\n"):
+        return None
+    try:
+        rec = json.loads(line)
+    except ValueError:
+        return None
+    return rec if isinstance(rec, dict) and "v" in rec else None
+
+def _records(f):
+    # The readable records from the current position, as _index() counts them.
+    for line in f:
+        if not line.endswith(b"\n"):
+            return
+        rec = _parse(line)
+        if rec is not None:
+            yield rec
+
+def _index(path: str) -> dict:
+    # Version, time and byte offset of every record, read incrementally: only
+    # the lines appended since the last call are parsed.
+    with _LOCK:
+        idx = _INDEX.get(path)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        if idx is None or size < idx["offset"]:
+            idx = _INDEX[path] = {"offset": 0, "v": [], "t": [], "pos": [], "key": [], "g": [], "gen": []}
+        if size > idx["offset"]:
+            offset = idx["offset"]
+            with open(path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # a record still being written
+                    rec = _parse(line)
+                    if rec is not None:
+                        n = len(idx["v"])
+                        if "key" in rec:
+                            idx["key"].append(n)
+                        g = rec.get("g", idx["g"][-1] if n else 0)
+                        if not n or g != idx["g"][-1]:
+                            idx["gen"].append(n)
+                        idx["v"].append(rec["v"])
+                        idx["t"].append(rec["t"])
+                        idx["pos"].append(offset)
+                        idx["g"].append(g)
+                    offset += len(line)
+            idx["offset"] = offset
+        return {k: list(v) if isinstance(v, list) else v for k, v in idx.items()}
+
+def _replay(path: str, offset: int, count: int) -> tuple[dict, list]:
+    s, dirs = {}, []
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for rec in itertools.islice(_records(f), count):
+            _apply(s, dirs, rec)
+    return s, dirs
+
+def _path(event: str | None, path: str | None) -> str:
+    return path or storage.history_file(event)
+
+def _rubric(event: str | None, path: str | None) -> Rubric:
+    # A bare history file (CLI) uses the rubric.json next to it, like file_rubric().
+    return storage.file_rubric(path) if path else storage.rubric_for(event)
+
+def _time_key(at) -> str:
+    return at.strftime("%Y-%m-%d %H:%M:%S") if isinstance(at, datetime) else str(at)
+
+def timeline(event: str | None = None, path: str | None = None) -> list[tuple[int, str]]:
+    # [(version, updated_at)] of every recorded save, oldest first; a save's
+    # index in this list is its `pos` for state_at().
+    idx = _index(_path(event, path))
+    return list(zip(idx["v"], idx["t"]))
+
+def state_at(
+    version: int | None = None,
+    at=None,
+    event: str | None = None,
+    path: str | None = None,
+    pos: int | None = None,
+) -> dict | None:
+    # The state as of `version` in the latest generation (or the last save
+    # at or before time `at`, a datetime or "YYYY-mm-dd HH:MM:SS", or record
+    # number `pos`); the latest one by default. None before the first
+    # recorded save.
+    path = _path(event, path)
+    idx = _index(path)
+    if pos is not None:
+        n = int(pos) if 0 <= int(pos) < len(idx["v"]) else -1
+    elif version is not None:
+        start = idx["gen"][-1] if idx["gen"] else 0
+        n = bisect.bisect_right(idx["v"], int(version), lo=start) - 1
+        if n < start:
+            n = -1
+    elif at is not None:
+        n = bisect.bisect_right(idx["t"], _time_key(at)) - 1
+    else:
+        n = len(idx["v"]) - 1
+    if n < 0:
+        return None
+    k = idx["key"][bisect.bisect_right(idx["key"], n) - 1]
+    return _replay(path, idx["pos"][k], n - k + 1)[0]
+
+def leaderboard_at(
+    version: int | None = None,
+    at=None,
+    event: str | None = None,
+    rubric: Rubric | None = None,
+    path: str | None = None,
+    pos: int | None = None,
+) -> list[dict]:
+    state = state_at(version, at, event, path, pos)
+    if state is None:
+        return []
+    return leaderboard_rows(state, rubric or _rubric(event, path))
+
+def changes(event: str | None = None, path: str | None = None):
+    # Audit trail: (version, time, [(juror, direction, idx, value)], meta) per
+    # save, keyframes reported as every cell that differs from the previous state.
+    path = _path(event, path)
+    if not os.path.exists(path):
+        return
+    s, dirs, prev = {}, [], {}
+    with open(path, "rb") as f:
+        for rec in _records(f):
+            _apply(s, dirs, rec)
+            if "key" in rec:
+                flat = _flat(s)
+                cells = [(j, d, i, v) for (j, d, i), v in flat.items() if prev.get((j, d, i), storage.UNSCORED) != v]
+                meta = {k: s.get(k) for k in META_KEYS}
+                prev = flat
+            else:
+                cells = [(j, dirs[k][0], i, v) for j, k, i, v in rec.get("c", ())]
+                meta = rec.get("m") or {}
+                for j, d, i, v in cells:
+                    prev[(j, d, i)] = v
+            yield rec["v"], rec["t"], cells, meta
+
+def rank_frames(
+    event: str | None = None,
+    rubric: Rubric | None = None,
+    max_frames: int = MAX_FRAMES,
+    path: str | None = None,
+) -> list[dict]:
+    # Standings at up to `max_frames` saves spread over the latest generation,
+    # in one pass over the file: [{"v", "t", "totals": [..], "ranks": [..]}],
+    # both in rubric.directions order.
+    rubric = rubric or _rubric(event, path)
+    path = _path(event, path)
+    idx = _index(path)
+    start, end = (idx["gen"][-1] if idx["gen"] else 0), len(idx["v"])
+    n = end - start
+    if not n:
+        return []
+    m = max(1, min(n, max_frames))
+    picks = {start + round(x * (n - 1) / max(1, m - 1)) for x in range(m)}
+    frames, s, dirs = [], {}, []
+    with open(path, "rb") as f:
+        f.seek(idx["pos"][start])
+        for r, rec in zip(range(start, end), _records(f)):
+            _apply(s, dirs, rec)
+            if r in picks:
+                t = ScoreTensor.from_state(s, rubric)
+                frames.append({
+                    "v": idx["v"][r],
+                    "t": idx["t"][r],
+                    "totals": [fmt_score(x) for x in t.totals()],
+                    "ranks": t.ranks().tolist(),
+                })
+    return frames
+
+REPLAY_JS = """
+const P = JSON.parse(document.getElementById("payload").textContent);
+const board = document.getElementById("board");
+const label = document.getElementById("label");
+const scrub = document.getElementById("scrub");
+const play = document.getElementById("play");
+const rows = P.names.map((n) => {
+  const el = document.createElement("div");
+  el.className = "lbrow";
+  el.innerHTML = `<div class="rank"></div><div class="team"><div class="kk">${n.kk}</div><div class="ru">${n.ru}</div></div><div class="score"></div>`;
+  board.appendChild(el);
+  return el;
+});
+board.style.height = (P.names.length * P.row_px) + "px";
+let at = 0, timer = null;
+function show(k) {
+  at = k;
+  const f = P.frames[k];
+  rows.forEach((el, t) => {
+    el.style.top = ((f.ranks[t] - 1) * P.row_px) + "px";
+    el.children[0].textContent = f.ranks[t];
+    el.children[2].textContent = f.totals[t];
+  });
+  scrub.value = k;
+  label.textContent = `${f.v}-нұсқа • версия ${f.v} • ${f.t}`;
+}
+function stop() { clearInterval(timer); timer = null; play.textContent = "▶"; }
+play.onclick = () => {
+  if (timer) { stop(); return; }
+  if (at >= P.frames.length - 1) show(0);
+  play.textContent = "❚❚";
+  timer = setInterval(() => { if (at >= P.frames.length - 1) stop(); else show(at + 1); }, P.step_ms);
+};
+scrub.max = P.frames.length - 1;
+scrub.oninput = () => { stop(); show(+scrub.value); };
+show(0);
+"""
+
+REPLAY_CSS = """
+body { margin: 0; font-family: "Source Sans Pro", sans-serif; color: #31333f; }
+.bar { display: flex; align-items: center; gap: 12px; margin-bottom: 10px; }
+.bar button { border: 1px solid rgba(0,0,0,0.15); background: #fff; border-radius: 8px; padding: 4px 14px; cursor: pointer; }
+.bar input { flex: 1; }
+.label { color: #8a8a8a; font-size: 0.92rem; min-width: 260px; }
+.board { position: relative; }
+.board .lbrow { position: absolute; left: 0; right: 0; box-sizing: border-box; transition: top 0.6s ease; background: #fff; }
+"""
+
+def replay_html(frames: list[dict], rubric: Rubric | None = None, step_ms: int = 700, row_px: int = 76) -> str:
+    # Self-contained animation for st.iframe(): one row per team that
+    # slides to its rank in each frame.
+    rubric = rubric or DEFAULT_RUBRIC
+    payload = {
+        "names": [{"kk": d, "ru": rubric.direction_ru.get(d, "")} for d in rubric.directions],
+        "frames": frames,
+        "step_ms": step_ms,
+        "row_px": row_px,
+    }
+    payload_json = json.dumps(payload, ensure_ascii=False).replace("</", "<\\/")
+    return f"""
+<style>{LB_CSS}{REPLAY_CSS}</style>
+<div class="bar"><button id="play">▶</button><input id="scrub" type="range" min="0" value="0"><span id="label" class="label"></span></div>
+<div id="board" class="board"></div>
+<script id="payload" type="application/json">{payload_json}</script>
+<script>{REPLAY_JS}</script>
+"""
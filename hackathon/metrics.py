@@ -0,0 +1,172 @@
+import contextlib
+import os
+import threading
+import time
+from collections import deque
+
+# Per-process phase timings for the app: wall time, call count and max per
+# (view, phase), plus full reruns per view. Disabled by default; then phase()
+# hands back one shared no-op context manager and rerun() returns at once.
+#
+#   metrics.configure(enabled=True, path="metrics.prom")
+#   metrics.rerun("results")
+#   with metrics.phase("results", "radars"):
+#       ...
+#
+# The Prometheus text file is rewritten (atomically) at most every
+# FLUSH_INTERVAL seconds, from whichever script thread records next.
+
+ENABLED = False
+METRICS_FILE = None
+FLUSH_INTERVAL = 5.0
+RATE_WINDOW = 60.0
+
+_NULL = contextlib.nullcontext()
+_LOCK = threading.Lock()
+_PHASES = {}  # (view, phase) -> [calls, seconds, max_seconds]
+_RERUNS = {}  # view -> [count, deque of recent timestamps]
+_STARTED = time.time()
+_LAST_FLUSH = 0.0
+
+
+def configure(enabled: bool = False, path: str | None = None, flush_interval: float | None = None):
+    global ENABLED, METRICS_FILE, FLUSH_INTERVAL
+    ENABLED = bool(enabled)
+    METRICS_FILE = path
+    if flush_interval is not None:
+        FLUSH_INTERVAL = float(flush_interval)
+
+def reset():
+    global _STARTED
+    with _LOCK:
+        _PHASES.clear()
+        _RERUNS.clear()
+        _STARTED = time.time()
+
+class _Timer:
+    __slots__ = ("key", "t0")
+
+    def __init__(self, key: tuple):
+        self.key = key
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        dt = time.perf_counter() - self.t0
+        with _LOCK:
+            rec = _PHASES.get(self.key)
+            if rec is None:
+                rec = _PHASES[self.key] = [0, 0.0, 0.0]
+            rec[0] += 1
+            rec[1] += dt
+            if dt > rec[2]:
+                rec[2] = dt
+        _maybe_flush()
+        return False
+
+def phase(view: str, name: str):
+    if not ENABLED:
+        return _NULL
+    return _Timer((view, name))
+
+def rerun(view: str):
+    if not ENABLED:
+        return
+    now = time.time()
+    with _LOCK:
+        rec = _RERUNS.get(view)
+        if rec is None:
+            rec = _RERUNS[view] = [0, deque()]
+        rec[0] += 1
+        rec[1].append(now)
+        while rec[1] and rec[1][0] < now - RATE_WINDOW:
+            rec[1].popleft()
+    _maybe_flush()
+
+def snapshot() -> dict:
+    now = time.time()
+    with _LOCK:
+        phases = [
+            {
+                "view": view,
+                "phase": name,
+                "calls": calls,
+                "total_ms": secs * 1000,
+                "mean_ms": secs * 1000 / calls if calls else 0.0,
+                "max_ms": mx * 1000,
+            }
+            for (view, name), (calls, secs, mx) in sorted(_PHASES.items())
+        ]
+        reruns = [
+            {
+                "view": view,
+                "reruns": count,
+                "per_min": sum(1 for t in recent if t >= now - RATE_WINDOW) * 60.0 / RATE_WINDOW,
+            }
+            for view, (count, recent) in sorted(_RERUNS.items())
+        ]
+    return {"since": _STARTED, "phases": phases, "reruns": reruns}
+
+def _label(s: str) -> str:
+    return s.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def prometheus_text() -> str:
+    snap = snapshot()
+    out = [
+        "# HELP hackathon_phase_seconds_total Wall time spent in each app phase.",
+        "# TYPE hackathon_phase_seconds_total counter",
+    ]
+    for p in snap["phases"]:
+        out.append(f'hackathon_phase_seconds_total{{view="{_label(p["view"])}",phase="{_label(p["phase"])}"}} {p["total_ms"] / 1000:.6f}')
+    out += [
+        "# HELP hackathon_phase_calls_total Calls of each app phase.",
+        "# TYPE hackathon_phase_calls_total counter",
+    ]
+    for p in snap["phases"]:
+        out.append(f'hackathon_phase_calls_total{{view="{_label(p["view"])}",phase="{_label(p["phase"])}"}} {p["calls"]}')
+    out += [
+        "# HELP hackathon_phase_seconds_max Slowest single call of each app phase.",
+        "# TYPE hackathon_phase_seconds_max gauge",
+    ]
+    for p in snap["phases"]:
+        out.append(f'hackathon_phase_seconds_max{{view="{_label(p["view"])}",phase="{_label(p["phase"])}"}} {p["max_ms"] / 1000:.6f}')
+    out += [
+        "# HELP hackathon_reruns_total Script reruns per view.",
+        "# TYPE hackathon_reruns_total counter",
+    ]
+    for r in snap["reruns"]:
+        out.append(f'hackathon_reruns_total{{view="{_label(r["view"])}"}} {r["reruns"]}')
+    out += [
+        "# HELP hackathon_reruns_per_minute Reruns per view over the last minute.",
+        "# TYPE hackathon_reruns_per_minute gauge",
+    ]
+    for r in snap["reruns"]:
+        out.append(f'hackathon_reruns_per_minute{{view="{_label(r["view"])}"}} {r["per_min"]:g}')
+    out += [
+        "# HELP hackathon_metrics_start_time_seconds When these counters were last reset.",
+        "# TYPE hackathon_metrics_start_time_seconds gauge",
+        f"hackathon_metrics_start_time_seconds {snap['since']:.0f}",
+    ]
+    return "\n".join(out) + "\n"
+
+def write_prometheus(path: str):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+
+def _maybe_flush():
+    global _LAST_FLUSH
+    if not METRICS_FILE:
+        return
+    now = time.monotonic()
+    with _LOCK:
+        if now - _LAST_FLUSH < FLUSH_INTERVAL:
+            return
+        _LAST_FLUSH = now
+    try:
+        write_prometheus(METRICS_FILE)
+    except OSError:
+        pass
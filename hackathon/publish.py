@@ -0,0 +1,217 @@
+import copy
+import html
+import json
+import os
+import threading
+import time
+
+from . import events, storage
+from .draw import order_revealed
+from .rubric import Rubric
+from .views import LB_CSS, leaderboard_html, leaderboard_rows, order_list_html
+
+# Static projector pages. After every save the latest state is handed to a
+# background thread that rewrites, each atomically:
+#   leaderboard.html, order.html  self-contained pages (inline CSS, no app)
+#   leaderboard.png               optional, PUBLISH_PNG
+#   version.json                  written last; the pages poll it and reload
+# A fresh draw's order is held back until its animation has played (see
+# draw.order_revealed); the pages are published again at that moment.
+# Any static file server (python -m http.server, nginx) can then serve the
+# projectors without a Streamlit session each. Events other than the legacy
+# one publish into PUBLISH_DIR/<event id>/.
+
+PUBLISH_DIR = None
+PUBLISH_PNG = False
+RELOAD_SECONDS = 3.0
+
+_LOCK = threading.Lock()
+_WAKE = threading.Event()
+_IDLE = threading.Event()
+_PENDING = {}  # event -> latest state not yet written
+_THREAD = None
+
+PAGE_CSS = """
+body { font-family: -apple-system, "Segoe UI", Roboto, Arial, sans-serif; margin: 0; padding: 1.2rem 2rem; color: #31333f; background: #fff; }
+.wrap { max-width: 1600px; margin: 0 auto; }
+h1 { margin: 0; font-size: 2.2rem; font-weight: 900; }
+h1 .ru { display: block; color: #8a8a8a; font-size: 1.1rem; font-weight: 600; margin-top: 4px; }
+.small-muted { color: #8a8a8a; font-size: 0.92rem; }
+.hr { height: 1px; background: rgba(0,0,0,0.08); border: none; margin: 1.2rem 0; }
+"""
+
+# Polls version.json (a few bytes, no-store) and reloads once it changes.
+RELOAD_JS = """
+(function () {
+  var current = %(version)d, revealed = %(revealed)s;
+  function poll() {
+    fetch("version.json", {cache: "no-store"})
+      .then(function (r) { return r.json(); })
+      .then(function (v) { if (v.version !== current || v.revealed !== revealed) { location.reload(); } })
+      .catch(function () {});
+  }
+  setInterval(poll, %(interval)d);
+})();
+"""
+
+PAGES = {
+    "leaderboard": ("Нәтижелер", "Результаты"),
+    "order": ("Презентациялар кезектілігі", "Очередность презентаций"),
+}
+
+
+def page_html(
+    view: str,
+    state: dict,
+    reload_seconds: float = RELOAD_SECONDS,
+    rubric: Rubric | None = None,
+    title: tuple[str, str] = ("", ""),
+) -> str:
+    kk, ru = PAGES[view]
+    if title[0]:
+        kk, ru = f"{title[0]}: {kk}", f"{title[1] or title[0]}: {ru}"
+    if view == "leaderboard":
+        body = leaderboard_html(leaderboard_rows(state, rubric))
+    else:
+        body = order_list_html(state, rubric)
+    version = int(state.get("version") or 0)
+    updated = html.escape(str(state.get("updated_at") or ""))
+    refresh = max(1, int(round(reload_seconds)))
+    revealed = "true" if order_revealed(state) else "false"
+    script = RELOAD_JS % {"version": version, "revealed": revealed, "interval": refresh * 1000}
+    return (
+        "<!DOCTYPE html>\n"
+        "<html><head><meta charset='utf-8'>"
+        "<meta name='viewport' content='width=device-width, initial-scale=1'>"
+        f"<title>{kk} / {ru}</title>"
+        f"<noscript><meta http-equiv='refresh' content='{refresh}'></noscript>"
+        f"<style>{PAGE_CSS}{LB_CSS}</style></head>"
+        f"<body><div class='wrap'><h1>{kk}<span class='ru'>{ru}</span></h1>"
+        "<hr class='hr'>"
+        f"{body}"
+        f"<div class='small-muted' style='margin-top:14px'>Жаңартылды / Обновлено: {updated}</div>"
+        f"</div><script>{script}</script></body></html>\n"
+    )
+
+def leaderboard_png(state: dict, rubric: Rubric | None = None) -> bytes:
+    from io import BytesIO
+
+    from matplotlib.figure import Figure
+
+    rows = leaderboard_rows(state, rubric)
+    fig = Figure(figsize=(10, 0.6 * len(rows) + 1.2))
+    ax = fig.add_subplot()
+    ax.axis("off")
+    table = ax.table(
+        cellText=[[r["rank"], f"{r['name']}\n{r['ru']}", r["total"]] for r in rows],
+        colLabels=["#", "Бағыт / Направление", "Ұпай / Балл"],
+        colWidths=[0.08, 0.74, 0.18],
+        cellLoc="left",
+        loc="upper center",
+    )
+    table.auto_set_font_size(False)
+    table.set_fontsize(12)
+    table.scale(1, 2.4)
+    buf = BytesIO()
+    fig.savefig(buf, format="png", dpi=120, bbox_inches="tight")
+    return buf.getvalue()
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def write_snapshots(
+    state: dict,
+    out_dir: str,
+    png: bool = False,
+    reload_seconds: float = RELOAD_SECONDS,
+    rubric: Rubric | None = None,
+    title: tuple[str, str] = ("", ""),
+):
+    os.makedirs(out_dir, exist_ok=True)
+    for view in PAGES:
+        page = page_html(view, state, reload_seconds, rubric, title)
+        _write_atomic(os.path.join(out_dir, f"{view}.html"), page.encode("utf-8"))
+    if png:
+        _write_atomic(os.path.join(out_dir, "leaderboard.png"), leaderboard_png(state, rubric))
+    version = {
+        "version": int(state.get("version") or 0),
+        "updated_at": state.get("updated_at"),
+        "revealed": order_revealed(state),
+    }
+    _write_atomic(os.path.join(out_dir, "version.json"), json.dumps(version, ensure_ascii=False).encode("utf-8"))
+
+def _worker():
+    while True:
+        _WAKE.wait()
+        with _LOCK:
+            _WAKE.clear()
+            pending = dict(_PENDING)
+            _PENDING.clear()
+            out_dir, png, reload_seconds = PUBLISH_DIR, PUBLISH_PNG, RELOAD_SECONDS
+        for event, state in pending.items():
+            if not out_dir:
+                break
+            try:
+                target = out_dir if event is None else os.path.join(out_dir, event)
+                rubric = storage.rubric_for(event)
+                write_snapshots(state, target, png, reload_seconds, rubric, events.event_title(event))
+            except Exception:
+                # A failed publish must never affect scoring; the next save retries.
+                pass
+        with _LOCK:
+            if not _PENDING:
+                _IDLE.set()
+
+def publish(state: dict, event: str | None = None, cells: dict | None = None, juror: str | None = None):
+    # Save hook: only queues a copy; bursts of saves collapse into one write.
+    global _THREAD
+    if not PUBLISH_DIR:
+        return
+    with _LOCK:
+        _PENDING[event] = copy.deepcopy(state)
+        _IDLE.clear()
+        if _THREAD is None:
+            _THREAD = threading.Thread(target=_worker, name="snapshot-publisher", daemon=True)
+            _THREAD.start()
+    _WAKE.set()
+    wait = float((state.get("last_draw") or {}).get("reveal_at") or 0) - time.time()
+    if wait > 0:
+        # Publish again once the draw animation has revealed the order.
+        timer = threading.Timer(wait + 0.05, _republish, (event,))
+        timer.daemon = True
+        timer.start()
+
+def _republish(event: str | None):
+    try:
+        publish(storage.load_state(event), event)
+    except Exception:
+        pass
+
+def flush(timeout: float | None = None) -> bool:
+    # Wait for the queued snapshot to be written (tests, CLI, shutdown).
+    if not PUBLISH_DIR:
+        return True
+    return _IDLE.wait(timeout)
+
+def configure(
+    out_dir: str | None = None,
+    png: bool = False,
+    reload_seconds: float | None = None,
+    event: str | None = None,
+):
+    # Like storage.configure(): a no-op when nothing changed, so the app can
+    # call it on every rerun. Turning publishing on writes `event`'s current
+    # state right away, so its pages exist before the first save.
+    global PUBLISH_DIR, PUBLISH_PNG, RELOAD_SECONDS
+    reload_seconds = RELOAD_SECONDS if reload_seconds is None else float(reload_seconds)
+    if (out_dir, bool(png), reload_seconds) == (PUBLISH_DIR, PUBLISH_PNG, RELOAD_SECONDS):
+        return
+    with _LOCK:
+        PUBLISH_DIR, PUBLISH_PNG, RELOAD_SECONDS = out_dir, bool(png), reload_seconds
+    if publish not in storage.SAVE_HOOKS:
+        storage.SAVE_HOOKS.append(publish)
+    if out_dir:
+        publish(storage.load_state(event), event)
@@ -0,0 +1,167 @@
+import textwrap
+from io import BytesIO
+from math import cos, pi, sin
+
+from .rubric import DEFAULT_RUBRIC, Rubric
+
+# Two engines: radar_spec() builds a Vega-Lite spec (a few KB of JSON, drawn
+# by the browser as vectors, no server rendering), radar_png_bytes() a
+# matplotlib PNG. matplotlib is imported inside the functions: only the PNG
+# path pays for it.
+
+
+def wrap_label(s: str, width: int = 22) -> str:
+    return "\n".join(textwrap.wrap(s, width=width)) if len(s) > width else s
+
+def plot_radar(direction_kk: str, values: list[int], max_val: int = 2, rubric: Rubric | None = None):
+    from matplotlib.figure import Figure
+
+    rubric = rubric or DEFAULT_RUBRIC
+    crits = rubric.criteria[direction_kk]
+    labels = [
+        f"{i+1}. {wrap_label(c['kk'], 22)}\n{wrap_label(c['ru'], 22)}"
+        for i, c in enumerate(crits)
+    ]
+    n = len(labels)
+    angles = [i / float(n) * 2 * pi for i in range(n)]
+    angles += angles[:1]
+    vals = list(values) + [values[0]]
+
+    # Figure() instead of pyplot: no global figure registry shared between
+    # the sessions' script threads.
+    fig = Figure(figsize=(6.4, 6.4))
+    ax = fig.add_subplot(polar=True)
+    ax.set_theta_offset(pi / 2)
+    ax.set_theta_direction(-1)
+
+    ax.set_xticks(angles[:-1])
+    ax.set_xticklabels(labels, fontsize=9)
+    ax.tick_params(axis="x", pad=34)
+
+    ax.set_ylim(0, max_val)
+    ax.set_yticks(list(range(max_val + 1)))
+    ax.set_yticklabels([f"{k} ұпай\n{k} балл" for k in range(max_val + 1)], fontsize=10)
+    ax.set_rlabel_position(90)
+
+    ax.grid(alpha=0.22)
+    ax.yaxis.grid(alpha=0.30, linewidth=1.05)
+    ax.spines["polar"].set_alpha(0.25)
+
+    ax.plot(angles, vals, linewidth=2.8, alpha=0.95)
+    ax.fill(angles, vals, alpha=0.12)
+
+    ax.set_title(
+        f"{direction_kk}\n{rubric.direction_ru.get(direction_kk, '')}",
+        fontsize=13,
+        fontweight="bold",
+        pad=28,
+    )
+    fig.subplots_adjust(top=0.86, bottom=0.06, left=0.04, right=0.96)
+    return fig
+
+def radar_png_bytes(direction_kk: str, values, max_val: int = 2, rubric: Rubric | None = None) -> bytes:
+    fig = plot_radar(direction_kk, list(values), max_val, rubric)
+    buf = BytesIO()
+    fig.savefig(buf, format="png", dpi=200, bbox_inches="tight")
+    return buf.getvalue()
+
+def _point(k: int, n: int, r: float) -> tuple[float, float]:
+    # Criterion k of n at radius r: first on top, then clockwise, as in plot_radar().
+    a = 2 * pi * k / n
+    return round(r * sin(a), 4), round(r * cos(a), 4)
+
+def radar_spec(direction_kk: str, values, max_val: int = 2, rubric: Rubric | None = None, size: int = 420) -> dict:
+    # Plain Vega-Lite (st.vega_lite_chart / any vega-embed), no Altair objects:
+    # building it is a few dozen trig calls. Polar coordinates are laid out
+    # here on a square x/y plane: rings and spokes for the 0..max_val grid, a
+    # closed filled line for the scores, wrapped bilingual labels outside.
+    rubric = rubric or DEFAULT_RUBRIC
+    crits = rubric.criteria[direction_kk]
+    n = len(crits)
+    values = [float(v) for v in values]
+    reach = max_val * 1.55  # room for the labels around the outer ring
+
+    rings = [
+        {"ring": k, "order": j, "x": x, "y": y}
+        for k in range(1, max_val + 1)
+        for j, (x, y) in enumerate(_point(i, n, k) for i in range(n))
+    ]
+    spokes = [{"x": 0, "y": 0, "x2": x, "y2": y} for x, y in (_point(i, n, max_val) for i in range(n))]
+    ticks = [{"y": k, "text": f"{k} ұпай / {k} балл"} for k in range(max_val + 1)]
+    labels = []
+    for i, c in enumerate(crits):
+        x, y = _point(i, n, max_val * 1.12)
+        align = "center" if abs(x) < 1e-6 else ("left" if x > 0 else "right")
+        text = f"{i+1}. {wrap_label(c['kk'], 22)}\n{wrap_label(c['ru'], 22)}"
+        labels.append({"x": x, "y": y, "align": align, "baseline": "bottom" if y > 0.5 else "middle", "text": text})
+    points = [
+        {"order": i, "x": x, "y": y, "n": i + 1, "kk": c["kk"], "ru": c["ru"], "value": v}
+        for i, (c, v) in enumerate(zip(crits, values))
+        for x, y in [_point(i, n, v)]
+    ]
+
+    scale = {"domain": [-reach, reach], "nice": False, "zero": False}
+    xy = {
+        "x": {"field": "x", "type": "quantitative", "scale": scale, "axis": None},
+        "y": {"field": "y", "type": "quantitative", "scale": scale, "axis": None},
+    }
+    label_layers = [
+        {
+            "data": {"values": [lb for lb in labels if lb["align"] == align]},
+            "mark": {"type": "text", "align": align, "lineBreak": "\n", "fontSize": 10, "color": "#31333f"},
+            "encoding": {**xy, "text": {"field": "text"}},
+        }
+        for align in ("left", "right", "center")
+    ]
+    return {
+        "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
+        "title": {
+            "text": direction_kk,
+            "subtitle": rubric.direction_ru.get(direction_kk, ""),
+            "fontSize": 15,
+            "subtitleColor": "#8a8a8a",
+        },
+        "width": size,
+        "height": size,
+        "view": {"stroke": None},
+        "layer": [
+            {
+                "data": {"values": rings},
+                "mark": {"type": "line", "interpolate": "linear-closed", "color": "#b9bcc4", "strokeWidth": 1},
+                "encoding": {**xy, "detail": {"field": "ring"}, "order": {"field": "order"}},
+            },
+            {
+                "data": {"values": spokes},
+                "mark": {"type": "rule", "color": "#d5d7dc"},
+                "encoding": {**xy, "x2": {"field": "x2"}, "y2": {"field": "y2"}},
+            },
+            {
+                "data": {"values": ticks},
+                "mark": {"type": "text", "align": "left", "dx": 4, "dy": -6, "fontSize": 10, "color": "#8a8a8a"},
+                "encoding": {"x": {"datum": 0, "scale": scale, "axis": None}, "y": xy["y"], "text": {"field": "text"}},
+            },
+            {
+                "data": {"values": points},
+                "mark": {
+                    "type": "line",
+                    "interpolate": "linear-closed",
+                    "color": "#1f77b4",
+                    "strokeWidth": 2.8,
+                    "fill": "#1f77b4",
+                    "fillOpacity": 0.12,
+                    "point": {"size": 40},
+                },
+                "encoding": {
+                    **xy,
+                    "order": {"field": "order"},
+                    "tooltip": [
+                        {"field": "n", "title": "#"},
+                        {"field": "kk", "title": "Критерий (KK)"},
+                        {"field": "ru", "title": "Критерий (RU)"},
+                        {"field": "value", "title": "Ұпай / Балл"},
+                    ],
+                },
+            },
+            *label_layers,
+        ],
+    }
@@ -0,0 +1,159 @@
+import numpy as np
+
+from .compute import ScoreTensor, score_tensor, tie_totals
+from .rubric import DEFAULT_RUBRIC, Rubric
+
+# How stable is each rank? The leaderboard is recomputed on SAMPLES bootstrap
+# replicates of the score tensor: jurors drawn with replacement (each cell
+# is a weighted mean over the drawn jurors who scored it, one matmul for all
+# replicates)
+# and, per team, criteria drawn with replacement within that team's rubric.
+# Ties break by name exactly as ScoreTensor.order() does. Replicates are
+# generated in fixed chunks with their own seeds, so the result only depends
+# on (state, SAMPLES, SEED), never on WORKERS; WORKERS > 1 farms the chunks
+# out to a process pool once an event is large enough to be worth it.
+#
+#   stats = rank_stats(state, rubric)
+#   stats["probs"][t, r]   P(team t ends up at rank r + 1)
+#   stats["lo"], stats["hi"]  95% rank interval, stats["p_rank"] P(shown rank)
+
+SAMPLES = 2000
+SEED = 0
+WORKERS = 0
+MODES = ("both", "jurors", "criteria")
+POOL_MIN_CELLS = 5_000_000  # samples * jurors * teams * criteria below this stay in-process
+CHUNK_CELLS = 2_000_000
+
+_POOL = None
+
+
+def configure(samples: int | None = None, workers: int | None = None, seed: int | None = None):
+    global SAMPLES, WORKERS, SEED
+    if samples is not None:
+        SAMPLES = max(0, int(samples))
+    if seed is not None:
+        SEED = int(seed)
+    if workers is not None and int(workers) != WORKERS:
+        _close_pool()
+        WORKERS = max(0, int(workers))
+
+def _close_pool():
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown(wait=False, cancel_futures=True)
+        _POOL = None
+
+def _pool():
+    # Spawned, not forked: the app process has server threads running.
+    global _POOL
+    if _POOL is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        _POOL = ProcessPoolExecutor(WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _POOL
+
+def _chunk(values: np.ndarray, n_criteria: np.ndarray, name_rank: np.ndarray, mode: str, n: int, seed) -> np.ndarray:
+    # Rank histogram [team, rank - 1] of `n` replicates.
+    rng = np.random.default_rng(seed)
+    n_jurors, n_teams, width = values.shape
+    scored = (values >= 0).reshape(n_jurors, -1).astype(np.float64)
+    v = np.where(values >= 0, values, 0).reshape(n_jurors, -1).astype(np.float64)
+    if mode in ("both", "jurors") and n_jurors > 1:
+        w = rng.multinomial(n_jurors, np.full(n_jurors, 1.0 / n_jurors), size=n) / n_jurors
+    else:
+        w = np.full((n, n_jurors), 1.0 / n_jurors)
+    # Each cell's weighted mean over the drawn sheets that scored it.
+    num, den = w @ v, w @ scored
+    per_cell = np.divide(num, den, out=np.zeros_like(num), where=den > 0).reshape(n, n_teams, width)
+    if mode in ("both", "criteria"):
+        # Each team's criteria redrawn by index (a gather, far cheaper than
+        # per-team multinomials).
+        picks = (rng.random((n, n_teams, width)) * n_criteria[None, :, None]).astype(np.intp)
+        mask = np.arange(width)[None, :] < n_criteria[:, None]
+        totals = np.where(mask, np.take_along_axis(per_cell, picks, axis=2), 0.0).sum(axis=2)
+    else:
+        totals = per_cell.sum(axis=2)
+    totals = tie_totals(totals)
+    order = np.lexsort((np.broadcast_to(name_rank, totals.shape), -totals), axis=-1)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.broadcast_to(np.arange(n_teams), order.shape), axis=-1)
+    flat = (np.arange(n_teams)[None, :] * n_teams + ranks).ravel()
+    return np.bincount(flat, minlength=n_teams * n_teams).reshape(n_teams, n_teams)
+
+def _chunks(values, n_criteria, name_rank, mode: str, jobs: list) -> np.ndarray:
+    # A pool worker's share: several chunks, summed before the result is sent back.
+    return sum(_chunk(values, n_criteria, name_rank, mode, n, seed) for n, seed in jobs)
+
+def rank_counts(t: ScoreTensor, samples: int | None = None, mode: str = "both", seed: int | None = None) -> np.ndarray:
+    if mode not in MODES:
+        raise ValueError(f"unknown bootstrap mode: {mode}")
+    samples = SAMPLES if samples is None else int(samples)
+    # Only sheets that scored something are resampled (an unused shared
+    # sheet would just thin out the draws).
+    active = t.scored.any(axis=(1, 2))
+    values = t.values[active] if active.any() else t.values
+    n_jurors, n_teams, width = values.shape
+    per_chunk = max(16, CHUNK_CELLS // max(1, n_jurors * n_teams * width))
+    sizes = [min(per_chunk, samples - k) for k in range(0, samples, per_chunk)]
+    seeds = np.random.SeedSequence(SEED if seed is None else seed).spawn(len(sizes))
+    jobs = list(zip(sizes, seeds))
+    args = (values, t.n_criteria, t.name_rank, mode)
+    if WORKERS > 1 and len(jobs) > 1 and samples * n_jurors * n_teams * width >= POOL_MIN_CELLS:
+        shares = [jobs[k::WORKERS] for k in range(min(WORKERS, len(jobs)))]
+        futures = [_pool().submit(_chunks, *args, share) for share in shares]
+        return sum(f.result() for f in futures)
+    return _chunks(*args, jobs)
+
+def rank_stats(
+    state: dict,
+    rubric: Rubric | None = None,
+    samples: int | None = None,
+    mode: str = "both",
+    level: float = 0.95,
+) -> dict | None:
+    # None when SAMPLES is 0 (turned off) or there is nothing to rank.
+    rubric = rubric or DEFAULT_RUBRIC
+    samples = SAMPLES if samples is None else int(samples)
+    t = score_tensor(state, rubric)
+    if samples <= 0 or not t.teams:
+        return None
+    probs = rank_counts(t, samples, mode) / samples
+    cdf = np.cumsum(probs, axis=1)
+    tail = (1.0 - level) / 2
+    rank = t.ranks()
+    return {
+        "teams": t.teams,
+        "samples": samples,
+        "mode": mode,
+        "level": level,
+        "rank": rank,
+        "probs": probs,
+        "lo": (cdf < tail - 1e-12).sum(axis=1) + 1,
+        "hi": (cdf < 1.0 - tail - 1e-12).sum(axis=1) + 1,
+        "mean": probs @ np.arange(1, len(t.teams) + 1),
+        "p_rank": probs[np.arange(len(t.teams)), rank - 1],
+    }
+
+def robustness_df(state: dict, rubric: Rubric | None = None, samples: int | None = None, top: int = 10):
+    # One row per team in leaderboard order: rank, 95% interval, mean rank and
+    # P(rank = 1..top); None when turned off.
+    return stats_df(rank_stats(state, rubric, samples), top)
+
+def stats_df(stats: dict | None, top: int = 10):
+    import pandas as pd
+
+    if stats is None:
+        return None
+    order = np.argsort(stats["rank"])
+    df = pd.DataFrame({
+        "Бағыт": np.array(stats["teams"], dtype=object)[order],
+        "Rank": stats["rank"][order],
+        "Rank CI low": stats["lo"][order],
+        "Rank CI high": stats["hi"][order],
+        "Mean rank": np.round(stats["mean"][order], 2),
+        "P(rank)": np.round(stats["p_rank"][order], 3),
+    })
+    for r in range(min(top, len(order))):
+        df[f"P({r + 1})"] = np.round(stats["probs"][order, r], 3)
+    return df
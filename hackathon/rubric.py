@@ -0,0 +1,212 @@
+import hashlib
+import json
+import os
+import threading
+from itertools import accumulate
+
+MAX_PER_CRITERION = 2
+# Cells are int8 in ScoreTensor and PackedStore; 0 leaves nothing to score.
+SCALE_RANGE = range(1, 128)
+
+DIRECTIONS = [
+    "Жаратылыстану-ғылыми сауаттылық",
+    "Математикалық сауаттылық",
+    "Мәдениетаралық сауаттылық",
+    "Қаржылық сауаттылық",
+    "Цифрлық сауаттылық",
+    "Оқу сауаттылығы",
+    "Экологиялық сауаттылық",
+]
+DIRECTION_RU = {
+    "Жаратылыстану-ғылыми сауаттылық": "Естественно-научная грамотность",
+    "Математикалық сауаттылық": "Математическая грамотность",
+    "Мәдениетаралық сауаттылық": "Межкультурная грамотность",
+    "Қаржылық сауаттылық": "Финансовая грамотность",
+    "Цифрлық сауаттылық": "Цифровая грамотность",
+    "Оқу сауаттылығы": "Читательская грамотность",
+    "Экологиялық сауаттылық": "Экологическая грамотность",
+}
+
+CRITERIA_BI = {
+    "Жаратылыстану-ғылыми сауаттылық": [
+        {"kk": "Суды сүзудің тиімділігі", "ru": "Эффективность фильтрации воды"},
+        {"kk": "Сүзгінің жұмысын ғылыми тұрғыда түсіндіру", "ru": "Научное объяснение работы фильтра"},
+        {"kk": "Сүзгінің құрылымы және жинақталуы", "ru": "Конструкция и сборка фильтра"},
+        {"kk": "Нәтижені талдау және қорытынды", "ru": "Анализ результата и выводы"},
+        {"kk": "Презентация және командалық жұмыс", "ru": "Презентация и командная работа"},
+    ],
+    "Математикалық сауаттылық": [
+        {"kk": "Жалпы ауданды табу", "ru": "Находит общую площадь"},
+        {"kk": "Камераның бақылауына кірмейтін ауданның пайызын есептеу",
+         "ru": "Вычисляет процент площади не попадающих под камеру"},
+        {"kk": "Камераның бақылауына кіретін аудандарды салыстыру",
+         "ru": "Сравнивает площади, попадающих под камеру"},
+        {"kk": "Камералардың максималды санын есептеу",
+         "ru": "Вычисляет максимальное количество камер"},
+        {"kk": "Камералардың минималды санын есептеу",
+         "ru": "Вычисляет минимальное количество камер"},
+    ],
+    "Мәдениетаралық сауаттылық": [
+        {"kk": "Дұрыс және проблемалы хабарламаларды анықтау",
+         "ru": "Определение корректного и проблемных сообщений"},
+        {"kk": "Мәдениетаралық тәуекелдерді талдау",
+         "ru": "Аргументация и анализ межкультурных рисков"},
+        {"kk": "Мәдениетаралық сауаттылық қағидаттарын түсіну",
+         "ru": "Понимание принципов межкультурной грамотности"},
+        {"kk": "Оқушыларға арналған практикалық ұсынымдар",
+         "ru": "Практические рекомендации обучающимся"},
+        {"kk": "Фестивальге арналған мини-нұсқаулық",
+         "ru": "Мини-инструкция (памятка) для фестиваля"},
+    ],
+    "Қаржылық сауаттылық": [
+        {"kk": "Бюджетті жоспарлау және негіздеу", "ru": "Планирование и обоснование бюджета"},
+        {"kk": "Ресурстарды ұтымды бөлу", "ru": "Логичное и рациональное распределение ресурсов"},
+        {"kk": "Қаржылық тәуекелдерді бағалау", "ru": "Оценка финансовых рисков"},
+        {"kk": "Командалық жұмыс және қорғау мәдениеті", "ru": "Командная работа и культура защиты"},
+        {"kk": "Мектеп үшін білім беру әсері", "ru": "Образовательный эффект для школы"},
+    ],
+    "Цифрлық сауаттылық": [
+        {"kk": "Легитимді хатты анықтау", "ru": "Определение легитимного письма"},
+        {"kk": "Цифрлық тәуекелдерді талдау және аргументация",
+         "ru": "Анализ и аргументация цифровых рисков"},
+        {"kk": "Цифрлық қауіпсіздік қағидаттарын түсіну",
+         "ru": "Понимание принципов цифровой безопасности"},
+        {"kk": "Күмәнді хат алған жағдайда әрекет ету алгоритмі",
+         "ru": "Алгоритм действий при подозрительном письме"},
+        {"kk": "Мектептің киберқауіпсіздігін қамтамасыз ету бойынша ұсыныстар",
+         "ru": "Предложения по обеспечению кибербезопасности школы"},
+    ],
+    "Оқу сауаттылығы": [
+        {"kk": "Мәтінді түсіну және пайдалану", "ru": "Понимание и использование текста"},
+        {"kk": "Шешімнің дәлелділігі мен логикасы", "ru": "Аргументация и логика решения"},
+        {"kk": "Ұсынылған қадамдардың іске асырылу мүмкіндігі", "ru": "Реалистичность предложенных шагов"},
+        {"kk": "Тапсырманың толық орындалуы", "ru": "Полнота выполнения задания"},
+        {"kk": "Топтық жұмыстың үйлесімділігі және рәсімделуі",
+         "ru": "Согласованность командной работы и оформление результата"},
+    ],
+    "Экологиялық сауаттылық": [
+        {"kk": "Шешімнің Негізделуі", "ru": "Обоснованность Решения"},
+        {"kk": "Этикалық Жетілу", "ru": "Этическая Зрелость"},
+        {"kk": "Ымыраның Креативтілігі", "ru": "Креативность Компромисса"},
+        {"kk": "Коммуникация Тиімділігі", "ru": "Эффективность Коммуникации"},
+        {"kk": "Педагогикалық әлеует", "ru": "Педагогический потенциал"},
+    ],
+}
+
+ALIASES = {
+    "Естественно-научная грамотность": "Жаратылыстану-ғылыми сауаттылық",
+    "Жаратылыстану-ғылыми сауаттылық": "Жаратылыстану-ғылыми сауаттылық",
+    "Математическая грамотность": "Математикалық сауаттылық",
+    "Математикалық сауаттылық": "Математикалық сауаттылық",
+    "Межкультурная грамотность": "Мәдениетаралық сауаттылық",
+    "Мәдениетаралық сауаттылық": "Мәдениетаралық сауаттылық",
+    "Финансовая грамотность": "Қаржылық сауаттылық",
+    "Қаржылық сауаттылық": "Қаржылық сауаттылық",
+    "Цифровая грамотность": "Цифрлық сауаттылық",
+    "Цифрлық сауаттылық": "Цифрлық сауаттылық",
+    "Читательская грамотность": "Оқу сауаттылығы",
+    "Оқырмандық сауаттылық": "Оқу сауаттылығы",
+    "Оқу сауаттылығы": "Оқу сауаттылығы",
+    "Экологическая грамотность": "Экологиялық сауаттылық",
+    "Экологиялық сауаттылық": "Экологиялық сауаттылық",
+}
+
+
+class Rubric:
+    # One event's teams (directions), criteria and scale. The constants above
+    # are the built-in rubric, DEFAULT_RUBRIC; a rubric.json (RUBRIC_FILE, or
+    # events/<id>/rubric.json, see events.py) replaces it via load_rubric().
+    # Treat instances as immutable: the lookups below are compiled once.
+    def __init__(self, directions, direction_ru, criteria, aliases=None, max_per_criterion=MAX_PER_CRITERION):
+        if not directions or not all(criteria.get(d) for d in directions):
+            raise ValueError("rubric needs directions, each with criteria")
+        try:
+            max_per_criterion = int(max_per_criterion)
+        except (TypeError, ValueError):
+            raise ValueError(f"max_per_criterion must be a whole number, not {max_per_criterion!r}") from None
+        if max_per_criterion not in SCALE_RANGE:
+            raise ValueError(f"max_per_criterion must be {SCALE_RANGE.start}..{SCALE_RANGE.stop - 1}, not {max_per_criterion}")
+        self.directions = directions
+        self.direction_ru = direction_ru
+        self.criteria = criteria
+        self.aliases = aliases if aliases is not None else {}
+        self.max_per_criterion = max_per_criterion
+        # Identifies the shape of a normalized state (team names, criteria
+        # per team); stored in the state so loads can skip normalization.
+        shape = [[d, len(criteria[d])] for d in directions]
+        self.fingerprint = hashlib.sha1(json.dumps(shape, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+        # Integer ids: team k's cells are offsets[k] .. offsets[k] + n_criteria[k]
+        # in a flat row of n_cells.
+        self.index = {d: k for k, d in enumerate(directions)}
+        self.n_criteria = [len(criteria[d]) for d in directions]
+        self.offsets = list(accumulate(self.n_criteria, initial=0))[:-1]
+        self.n_cells = sum(self.n_criteria)
+        # Any known name (KK, RU, old spellings) -> team id.
+        self.alias_ids = {a: self.index[kk] for a, kk in self.aliases.items() if kk in self.index}
+        # Slider keys per team, so render loops don't hash names per widget.
+        self.widget_keys = {
+            d: [f"score_{self.fingerprint[:8]}_{k}_{i}" for i in range(n)]
+            for k, (d, n) in enumerate(zip(directions, self.n_criteria))
+        }
+
+    def resolve(self, name) -> str | None:
+        # The KK team name for any alias, None if unknown.
+        k = self.alias_ids.get(name)
+        return None if k is None else self.directions[k]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Rubric":
+        # {"directions": [{"kk": ..., "ru": ..., "criteria": [{"kk", "ru"}, ...]}, ...],
+        #  "aliases": {"old name": "kk name"}, "max_per_criterion": 2}
+        items = data.get("directions") or []
+        if not items:
+            raise ValueError("rubric has no directions")
+        directions, direction_ru, criteria = [], {}, {}
+        for item in items:
+            kk = str(item["kk"]).strip()
+            crits = [{"kk": str(c["kk"]), "ru": str(c.get("ru", ""))} for c in item.get("criteria") or []]
+            if not kk or not crits:
+                raise ValueError(f"rubric direction {kk!r} needs a name and criteria")
+            if kk in criteria:
+                raise ValueError(f"rubric direction {kk!r} listed twice")
+            directions.append(kk)
+            direction_ru[kk] = str(item.get("ru", ""))
+            criteria[kk] = crits
+        aliases = {d: d for d in directions}
+        aliases.update({ru: kk for kk, ru in direction_ru.items() if ru})
+        aliases.update({str(k): v for k, v in (data.get("aliases") or {}).items() if v in criteria})
+        return cls(directions, direction_ru, criteria, aliases, data.get("max_per_criterion", MAX_PER_CRITERION))
+
+    def to_dict(self) -> dict:
+        own = {d: d for d in self.directions} | {ru: kk for kk, ru in self.direction_ru.items() if ru}
+        return {
+            "directions": [
+                {"kk": d, "ru": self.direction_ru.get(d, ""), "criteria": self.criteria[d]}
+                for d in self.directions
+            ],
+            "aliases": {k: v for k, v in self.aliases.items() if own.get(k) != v},
+            "max_per_criterion": self.max_per_criterion,
+        }
+
+
+DEFAULT_RUBRIC = Rubric(DIRECTIONS, DIRECTION_RU, CRITERIA_BI, ALIASES, MAX_PER_CRITERION)
+
+_LOCK = threading.Lock()
+_LOADED = {}  # abspath -> ((mtime_ns, size), Rubric)
+
+
+def load_rubric(path: str) -> Rubric:
+    # Compiled once per file version and shared by the whole process; editing
+    # the file yields a new Rubric on the next call.
+    path = os.path.abspath(path)
+    info = os.stat(path)
+    stamp = (info.st_mtime_ns, info.st_size)
+    with _LOCK:
+        cached = _LOADED.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+    with open(path, "r", encoding="utf-8") as f:
+        rubric = Rubric.from_dict(json.load(f))
+    with _LOCK:
+        _LOADED[path] = (stamp, rubric)
+    return rubric
@@ -0,0 +1,1053 @@
+import copy
+import json
+import os
+import sqlite3
+import struct
+import threading
+import time
+import urllib.parse
+from array import array
+from collections import deque
+from datetime import datetime
+
+from . import events
+from .rubric import DEFAULT_RUBRIC, Rubric, load_rubric
+
+# Module state is process-wide: the Streamlit server imports this once and
+# every session and rerun shares the shards (store + state cache per event)
+# and the write lock. event=None everywhere below is the legacy single-file
+# setup configured here; other events live in their own shard (events.py).
+STORAGE_BACKEND = "json"
+DATA_FILE = "scores.json"
+DB_FILE = "scores.db"
+JOURNAL_FILE = "scores.journal"
+PACKED_FILE = "scores.bin"
+HISTORY_FILE = "scores.history"
+JOURNAL_FSYNC_INTERVAL = 0.2
+JOURNAL_COMPACT_EVERY = 500
+RUBRIC = DEFAULT_RUBRIC
+# Score cells remembered per event for changes_since(); older history makes
+# sessions fall back to comparing every cell.
+CHANGE_LOG_SIZE = 10000
+
+# Stored states carry schema_version and the fingerprint of the rubric they
+# were normalized against. A state with both current loads as is; anything
+# else (older files, hand edits, a changed rubric.json) goes through
+# normalize_state() once and is written back. Version 1 is the unversioned
+# pretty-printed format; versions 1-2 stored unscored cells as 0, which the
+# migration to 3 turns into UNSCORED.
+SCHEMA_VERSION = 3
+JSON_SEPARATORS = (",", ":")
+# A cell nobody has scored on a sheet yet. Totals average each cell over the
+# sheets (shared and per juror) that did score it; the sliders show it as 0.
+UNSCORED = -1
+
+
+def empty_sheet(rubric: Rubric | None = None) -> dict:
+    rubric = rubric or RUBRIC
+    return {d: [UNSCORED] * len(rubric.criteria[d]) for d in rubric.directions}
+
+def score_sheet(state: dict, juror: str | None = None, rubric: Rubric | None = None) -> dict:
+    # The shared sheet (juror=None) or one juror's own sheet; aggregates take
+    # every sheet into account (see compute.ScoreTensor).
+    if juror is None:
+        return state["scores"]
+    return state.setdefault("juror_scores", {}).setdefault(juror, empty_sheet(rubric))
+
+def default_state(rubric: Rubric | None = None):
+    rubric = rubric or RUBRIC
+    return {
+        "scores": empty_sheet(rubric),
+        "juror_scores": {},
+        "presentation_order": list(rubric.directions),
+        "last_draw": None,
+        "updated_at": None,
+        "version": 0,
+        "schema_version": SCHEMA_VERSION,
+        "rubric_fp": rubric.fingerprint,
+    }
+
+def is_current(s: dict, rubric: Rubric | None = None) -> bool:
+    rubric = rubric or RUBRIC
+    return s.get("schema_version") == SCHEMA_VERSION and s.get("rubric_fp") == rubric.fingerprint
+
+def migrate_state(s: dict, rubric: Rubric | None = None) -> tuple[dict, bool]:
+    # (state, True) when `s` had to be normalized, i.e. is worth writing back.
+    if is_current(s, rubric):
+        return s, False
+    return normalize_state(s, rubric), True
+
+_SHARDS = {}
+_SHARDS_LOCK = threading.Lock()
+_STORE_LOCK = threading.Lock()
+_WRITE_LOCK = threading.RLock()
+# Called as hook(state, event, cells, juror) with every persisted state, under
+# the write lock: keep them cheap (hand the work to a thread, see publish.py).
+# `cells` ({(direction, idx): value} on `juror`'s sheet) is what this save
+# wrote, or None for a full write.
+SAVE_HOOKS = []
+
+def _file_stamp(path: str):
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+def drop_torn_line(path: str):
+    # Cuts a torn last line (a crash mid-append) back to the previous newline,
+    # so the next append starts a line of its own instead of being glued to
+    # the fragment and lost with it. Used by the journal and the history.
+    try:
+        f = open(path, "rb+")
+    except FileNotFoundError:
+        return
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        if not end:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        pos = end
+        while pos > 0:
+            step = min(pos, 65536)
+            f.seek(pos - step)
+            k = f.read(step).rfind(b"\n")
+            if k >= 0:
+                f.truncate(pos - step + k + 1)
+                return
+            pos -= step
+        f.truncate(0)
+
+def _cache_writes(shard) -> int:
+    cache = shard.cache
+    with cache["lock"]:
+        return cache["writes"]
+
+def _cache_put(shard, stamp, state: dict, writes: int | None = None):
+    # Writers pass writes=None. Readers pass the write count they saw before
+    # reading: if a write landed meanwhile, their copy may be older than the
+    # file. File stamps (coarse mtime + size) can repeat across two quick
+    # same-size writes, so caching it could pin stale data to the current stamp.
+    cache = shard.cache
+    with cache["lock"]:
+        if writes is None:
+            cache["writes"] += 1
+        elif writes != cache["writes"]:
+            return
+        cache["stamp"] = stamp
+        # Kept serialized: json.loads of a compact string is several times
+        # cheaper than copy.deepcopy of the dict, and every caller still gets
+        # its own copy to mutate.
+        cache["state"] = json.dumps(state, ensure_ascii=False, separators=JSON_SEPARATORS) if stamp is not None else None
+
+def _cache_get(shard, stamp):
+    if stamp is None:
+        return None
+    cache = shard.cache
+    with cache["lock"]:
+        if cache["stamp"] != stamp or cache["state"] is None:
+            return None
+        text = cache["state"]
+    return json.loads(text)
+
+class JsonStore:
+    # Whole-document store: scores.json rewritten through a temp file.
+    name = "json"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def stamp(self):
+        return _file_stamp(self.path)
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def write(self, state: dict):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, separators=JSON_SEPARATORS)
+        # os.replace keeps the inode, so the tmp stamp is the stamp of the data
+        # file without a window for another writer to slip in between.
+        stamp = _file_stamp(tmp)
+        os.replace(tmp, self.path)
+        return stamp
+
+    def write_cells(self, state: dict, cells: dict, juror: str | None = None):
+        return self.write(state)
+
+    def close(self):
+        pass
+
+
+class SqliteStore:
+    # One row per score cell; WAL lets readers run while a writer commits.
+    name = "sqlite"
+
+    def __init__(
+        self,
+        path: str,
+        import_from: str | None = None,
+        rubric: Rubric | None = None,
+        read_only: bool = False,
+    ):
+        # read_only (read_state): opened with mode=ro, no tables created.
+        self.path = path
+        self.rubric = rubric or RUBRIC
+        self.read_only = read_only
+        self.local = threading.local()
+        if read_only:
+            return
+        con = self._con()
+        with con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                "direction TEXT NOT NULL, idx INTEGER NOT NULL, value INTEGER NOT NULL, "
+                "PRIMARY KEY (direction, idx)) WITHOUT ROWID"
+            )
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS juror_scores ("
+                "juror TEXT NOT NULL, direction TEXT NOT NULL, idx INTEGER NOT NULL, "
+                "value INTEGER NOT NULL, PRIMARY KEY (juror, direction, idx)) WITHOUT ROWID"
+            )
+            con.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        if import_from and self.stamp() is None and os.path.exists(import_from):
+            import_json(import_from, self, self.rubric)
+
+    def _con(self) -> sqlite3.Connection:
+        # sqlite3 connections are bound to the thread that opened them.
+        con = getattr(self.local, "con", None)
+        if con is None and self.read_only:
+            uri = "file:" + urllib.parse.quote(os.path.abspath(self.path)) + "?mode=ro"
+            con = self.local.con = sqlite3.connect(uri, uri=True, timeout=10, isolation_level=None)
+        elif con is None:
+            con = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self.local.con = con
+        return con
+
+    def stamp(self):
+        row = self._con().execute("SELECT value FROM meta WHERE key = 'rev'").fetchone()
+        return int(row[0]) if row else None
+
+    def read(self):
+        con = self._con()
+        con.execute("BEGIN")
+        try:
+            meta = dict(con.execute("SELECT key, value FROM meta").fetchall())
+            cells = con.execute("SELECT direction, idx, value FROM scores").fetchall()
+            juror_cells = con.execute("SELECT juror, direction, idx, value FROM juror_scores").fetchall()
+        finally:
+            con.execute("COMMIT")
+        if "rev" not in meta:
+            return None
+        state = {k: json.loads(v) for k, v in meta.items() if k != "rev"}
+        if is_current(state, self.rubric):
+            # Rows already match the rubric: fill the lists directly.
+            scores = empty_sheet(self.rubric)
+            for d, i, v in cells:
+                scores[d][i] = v
+            juror_scores = {}
+            for j, d, i, v in juror_cells:
+                sheet = juror_scores.get(j)
+                if sheet is None:
+                    sheet = juror_scores[j] = empty_sheet(self.rubric)
+                sheet[d][i] = v
+        else:
+            scores: dict[str, dict[int, int]] = {}
+            for d, i, v in cells:
+                scores.setdefault(d, {})[i] = v
+            juror_scores: dict[str, dict[str, dict[int, int]]] = {}
+            for j, d, i, v in juror_cells:
+                juror_scores.setdefault(j, {}).setdefault(d, {})[i] = v
+        state["scores"] = scores
+        state["juror_scores"] = juror_scores
+        return state
+
+    def _commit(self, state: dict, cells, juror_cells=(), replace: bool = False) -> int:
+        con = self._con()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            if replace:
+                # A whole-state write drops rows the state no longer has
+                # (renamed teams, removed jurors), so reads can trust the shape.
+                con.execute("DELETE FROM scores")
+                con.execute("DELETE FROM juror_scores")
+            con.executemany(
+                "INSERT INTO scores (direction, idx, value) VALUES (?, ?, ?) "
+                "ON CONFLICT (direction, idx) DO UPDATE SET value = excluded.value",
+                [(d, i, int(v)) for (d, i), v in cells],
+            )
+            con.executemany(
+                "INSERT INTO juror_scores (juror, direction, idx, value) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (juror, direction, idx) DO UPDATE SET value = excluded.value",
+                [(j, d, i, int(v)) for (j, d, i), v in juror_cells],
+            )
+            meta = [
+                (k, json.dumps(v, ensure_ascii=False))
+                for k, v in state.items()
+                if k not in ("scores", "juror_scores")
+            ]
+            con.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", meta)
+            con.execute(
+                "INSERT INTO meta (key, value) VALUES ('rev', '1') "
+                "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+            )
+            rev = int(con.execute("SELECT value FROM meta WHERE key = 'rev'").fetchone()[0])
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        return rev
+
+    def write(self, state: dict):
+        cells = [((d, i), v) for d, arr in state["scores"].items() for i, v in enumerate(arr)]
+        juror_cells = [
+            ((j, d, i), v)
+            for j, sheet in (state.get("juror_scores") or {}).items()
+            for d, arr in sheet.items()
+            for i, v in enumerate(arr)
+        ]
+        return self._commit(state, cells, juror_cells, replace=True)
+
+    def write_cells(self, state: dict, cells: dict, juror: str | None = None):
+        if juror is None:
+            return self._commit(state, cells.items())
+        return self._commit(state, (), [((juror, d, i), v) for (d, i), v in cells.items()])
+
+    def close(self):
+        con = getattr(self.local, "con", None)
+        if con is not None:
+            con.close()
+            self.local.con = None
+
+
+class JournalStore:
+    # DATA_FILE holds the latest snapshot; every save only appends its score
+    # and meta events to the journal. The Streamlit server process is the
+    # single writer. A background thread batches fsyncs and folds the journal
+    # into a new snapshot once it grows past compact_every events.
+    name = "journal"
+
+    def __init__(
+        self,
+        path: str,
+        journal_path: str,
+        fsync_interval: float,
+        compact_every: int,
+        rubric: Rubric | None = None,
+        read_only: bool = False,
+    ):
+        # read_only (read_state): old snapshots are migrated in memory only;
+        # no journal file is opened or created and no flusher thread runs.
+        self.path = path
+        self.read_only = read_only
+        self.rubric = rubric or RUBRIC
+        self.journal_path = journal_path
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.lock = threading.RLock()
+        self.wake = threading.Event()
+        self.seq = 0
+        self.base_seq = 0
+        self.last = None
+        self.dirty = False
+        self.compact_due = False
+        self.closed = False
+        self.f = None
+        if read_only:
+            return
+        try:
+            self.read()
+        except Exception:
+            self.last = None
+        drop_torn_line(self.journal_path)
+        self.f = open(self.journal_path, "a", encoding="utf-8")
+        threading.Thread(target=self._background, name="score-journal", daemon=True).start()
+
+    def stamp(self):
+        snap, jour = _file_stamp(self.path), _file_stamp(self.journal_path)
+        if snap is None and not (jour and jour[1]):
+            return None
+        return (snap, jour)
+
+    def _tail(self, after_seq: int) -> list[dict]:
+        events = []
+        if not os.path.exists(self.journal_path):
+            return events
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    # Torn last line after a crash: everything before it is intact.
+                    break
+                if e.get("seq", 0) > after_seq:
+                    events.append(e)
+        return events
+
+    def _apply(self, s: dict, e: dict):
+        if e.get("type") == "score":
+            arr = score_sheet(s, e.get("juror"), self.rubric).get(e["d"])
+            if arr is not None and 0 <= e["i"] < len(arr):
+                arr[e["i"]] = int(e["v"])
+        elif e.get("type") == "meta":
+            s[e["key"]] = e["value"]
+
+    def read(self):
+        with self.lock:
+            s = None
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    s = json.load(f)
+            base_seq = int(s.pop("journal_seq", 0)) if isinstance(s, dict) else 0
+            events = self._tail(base_seq)
+            if s is None and not events:
+                self.last = None
+                return None
+            s, migrated = migrate_state(s if isinstance(s, dict) else default_state(self.rubric), self.rubric)
+            if migrated and os.path.exists(self.path) and not self.read_only:
+                # Rewrite the old snapshot in the current schema once.
+                self.compact_due = True
+                self.wake.set()
+            for e in events:
+                self._apply(s, e)
+            self.base_seq = base_seq
+            self.seq = max([base_seq] + [e["seq"] for e in events])
+            self.last = copy.deepcopy(s)
+            return s
+
+    def _append(self, state: dict, events: list[dict]):
+        with self.lock:
+            for e in events:
+                self.seq += 1
+                e["seq"] = self.seq
+                self.f.write(json.dumps(e, ensure_ascii=False) + "\n")
+            # Flushed to the OS right away (survives a process crash); the
+            # fsync for power loss is batched by the background thread.
+            self.f.flush()
+            self.last = copy.deepcopy(state)
+            self.dirty = True
+            if self.seq - self.base_seq >= self.compact_every:
+                self.compact_due = True
+            self.wake.set()
+            return self.stamp()
+
+    def _write_snapshot(self, tmp: str, state: dict, seq: int):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(dict(state, journal_seq=seq), f, ensure_ascii=False, separators=JSON_SEPARATORS)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _snapshot(self, state: dict):
+        tmp = self.path + ".tmp"
+        self._write_snapshot(tmp, state, self.seq)
+        os.replace(tmp, self.path)
+        # A crash before the truncate is harmless: replay skips seq <= journal_seq.
+        self.f.close()
+        self.f = open(self.journal_path, "w", encoding="utf-8")
+        self.base_seq = self.seq
+        self.last = copy.deepcopy(state)
+        self.dirty = False
+        self.compact_due = False
+
+    def _swap_snapshot(self, tmp: str, seq: int):
+        # Under the lock, with a snapshot of seq already on disk.
+        os.replace(tmp, self.path)
+        self.f.close()
+        if self.seq == seq:
+            self.f = open(self.journal_path, "w", encoding="utf-8")
+        else:
+            # Saves landed while the snapshot was written: keep their lines.
+            kept = self._tail(seq)
+            with open(self.journal_path + ".tmp", "w", encoding="utf-8") as f:
+                f.writelines(json.dumps(e, ensure_ascii=False) + "\n" for e in kept)
+            os.replace(self.journal_path + ".tmp", self.journal_path)
+            self.f = open(self.journal_path, "a", encoding="utf-8")
+            self.dirty = True
+        self.base_seq = seq
+        self.compact_due = self.seq - seq >= self.compact_every
+
+    def _background(self):
+        # The lock is held only to read the counters and to swap files; the
+        # fsync and the snapshot write run without it, so saves and
+        # load_state never queue behind the disk.
+        tmp = self.path + ".compact"
+        while not self.closed:
+            self.wake.wait()
+            time.sleep(self.fsync_interval)
+            with self.lock:
+                self.wake.clear()
+                if self.closed:
+                    return
+                fd = os.dup(self.f.fileno()) if self.dirty else None
+                self.dirty = False
+                # self.last is replaced on every save, never mutated in place.
+                state = self.last if self.compact_due else None
+                seq = self.seq
+            if fd is not None:
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            if state is None:
+                continue
+            self._write_snapshot(tmp, state, seq)
+            with self.lock:
+                if self.closed or self.base_seq >= seq:
+                    # close() or a first-save snapshot already covered it.
+                    os.remove(tmp)
+                    continue
+                self._swap_snapshot(tmp, seq)
+
+    def write(self, state: dict):
+        with self.lock:
+            if self.last is None:
+                self._snapshot(state)
+                return self.stamp()
+            events = []
+            last_jurors = self.last.get("juror_scores") or {}
+            sheets = [(None, state["scores"], self.last["scores"])] + [
+                (j, sheet, last_jurors.get(j, {}))
+                for j, sheet in (state.get("juror_scores") or {}).items()
+            ]
+            for juror, sheet, last_sheet in sheets:
+                cells = {
+                    (d, i): v
+                    for d, arr in sheet.items()
+                    for i, v in enumerate(arr)
+                    if last_sheet.get(d, [None] * len(arr))[i] != v
+                }
+                events += self._score_events(state, cells, juror)
+            for k, v in state.items():
+                if k not in ("scores", "juror_scores", "updated_at") and self.last.get(k) != v:
+                    events.append({"type": "meta", "key": k, "value": v, "t": state.get("updated_at")})
+            events.append({"type": "meta", "key": "updated_at", "value": state.get("updated_at"), "t": state.get("updated_at")})
+            if len(events) >= self.compact_every:
+                # A bulk save (import, first fill): one snapshot beats replaying
+                # thousands of lines on every cold read until compaction.
+                self._snapshot(state)
+                return self.stamp()
+            return self._append(state, events)
+
+    def write_cells(self, state: dict, cells: dict, juror: str | None = None):
+        with self.lock:
+            if self.last is None:
+                self._snapshot(state)
+                return self.stamp()
+            events = self._score_events(state, cells, juror)
+            for k in ("version", "updated_at"):
+                events.append({"type": "meta", "key": k, "value": state.get(k), "t": state.get("updated_at")})
+            return self._append(state, events)
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            if self.f is None:
+                self.closed = True
+                return
+            if self.compact_due and self.last is not None:
+                self._snapshot(self.last)
+            self.f.flush()
+            os.fsync(self.f.fileno())
+            self.f.close()
+            self.closed = True
+            self.wake.set()
+
+    def _score_events(self, state: dict, cells: dict, juror: str | None) -> list[dict]:
+        t = state.get("updated_at")
+        return [
+            {"type": "score", "d": d, "i": i, "v": int(v), "juror": juror, "t": t}
+            for (d, i), v in cells.items()
+        ]
+
+
+class PackedStore:
+    # Compact binary snapshot for large events:
+    #   b"HKP1" | u32 header length | header JSON | int8 cells
+    # The header has the non-score fields, the team names with their number
+    # of criteria and the juror names; the cells are one row for the shared
+    # sheet and one per juror, in header order. Rewritten whole on every save.
+    name = "packed"
+    MAGIC = b"HKP1"
+
+    def __init__(self, path: str, import_from: str | None = None, rubric: Rubric | None = None):
+        self.path = path
+        self.rubric = rubric or RUBRIC
+        if import_from and self.stamp() is None and os.path.exists(import_from):
+            import_json(import_from, self, self.rubric)
+
+    def stamp(self):
+        return _file_stamp(self.path)
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as f:
+            data = f.read()
+        if data[:4] != self.MAGIC:
+            raise ValueError(f"{self.path}: not a packed score file")
+        (n,) = struct.unpack_from("<I", data, 4)
+        header = json.loads(data[8 : 8 + n])
+        cells = array("b")
+        cells.frombytes(data[8 + n :])
+        layout = list(zip(header["directions"], header["lengths"]))
+        width = sum(header["lengths"])
+        sheets = []
+        for row in range(1 + len(header["jurors"])):
+            values = cells[row * width : (row + 1) * width].tolist()
+            sheet, pos = {}, 0
+            for d, k in layout:
+                sheet[d] = values[pos : pos + k]
+                pos += k
+            sheets.append(sheet)
+        state = header["meta"]
+        state["scores"] = sheets[0]
+        state["juror_scores"] = dict(zip(header["jurors"], sheets[1:]))
+        return state
+
+    def write(self, state: dict):
+        sheet = state["scores"]
+        jurors = list(state.get("juror_scores") or {})
+        header = {
+            "meta": {k: v for k, v in state.items() if k not in ("scores", "juror_scores")},
+            "directions": list(sheet),
+            "lengths": [len(arr) for arr in sheet.values()],
+            "jurors": jurors,
+        }
+        cells = array("b")
+        for s in [sheet] + [state["juror_scores"][j] for j in jurors]:
+            for d in header["directions"]:
+                cells.extend(s[d])
+        head = json.dumps(header, ensure_ascii=False, separators=JSON_SEPARATORS).encode("utf-8")
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.MAGIC + struct.pack("<I", len(head)) + head)
+            cells.tofile(f)
+        stamp = _file_stamp(tmp)
+        os.replace(tmp, self.path)
+        return stamp
+
+    def write_cells(self, state: dict, cells: dict, juror: str | None = None):
+        return self.write(state)
+
+    def close(self):
+        pass
+
+
+STORES = {"json": JsonStore, "sqlite": SqliteStore, "journal": JournalStore, "packed": PackedStore}
+
+
+class Shard:
+    # One event's store (opened lazily), state cache and rubric.
+    def __init__(
+        self,
+        event: str | None,
+        rubric: Rubric,
+        data_file: str,
+        db_file: str,
+        journal_file: str,
+        packed_file: str,
+        history_file: str,
+    ):
+        self.event = event
+        self.rubric = rubric
+        self.data_file = data_file
+        self.db_file = db_file
+        self.journal_file = journal_file
+        self.packed_file = packed_file
+        self.history_file = history_file
+        self.store = None
+        self.cache = {"lock": threading.Lock(), "stamp": None, "state": None, "writes": 0}
+        # (version, juror, direction, idx) of every cell saved by this process,
+        # complete for versions in (log_floor, log_head].
+        self.log = deque()
+        self.log_floor = None
+        self.log_head = None
+        self.log_lock = threading.Lock()
+
+    def get_store(self):
+        with _STORE_LOCK:
+            if self.store is None:
+                self.store = _make_store(self)
+            return self.store
+
+    def close(self):
+        with _STORE_LOCK:
+            if self.store is not None:
+                self.store.close()
+                self.store = None
+        _cache_put(self, None, {})
+
+def _make_store(shard: Shard):
+    if STORAGE_BACKEND == "sqlite":
+        return SqliteStore(shard.db_file, import_from=shard.data_file, rubric=shard.rubric)
+    if STORAGE_BACKEND == "journal":
+        return JournalStore(
+            shard.data_file, shard.journal_file, JOURNAL_FSYNC_INTERVAL, JOURNAL_COMPACT_EVERY, shard.rubric
+        )
+    if STORAGE_BACKEND == "packed":
+        return PackedStore(shard.packed_file, import_from=shard.data_file, rubric=shard.rubric)
+    return STORES[STORAGE_BACKEND](shard.data_file)
+
+def _shard(event: str | None = None) -> Shard:
+    # Shards are opened on first use, so only the events someone actually
+    # looks at are ever read.
+    with _SHARDS_LOCK:
+        shard = _SHARDS.get(event)
+        if shard is None:
+            if event is None:
+                shard = Shard(None, RUBRIC, DATA_FILE, DB_FILE, JOURNAL_FILE, PACKED_FILE, HISTORY_FILE)
+            else:
+                paths = events.event_paths(event)
+                os.makedirs(os.path.dirname(paths["data_file"]), exist_ok=True)
+                shard = Shard(event, events.event_rubric(event), **paths)
+            _SHARDS[event] = shard
+        return shard
+
+def get_store(event: str | None = None):
+    return _shard(event).get_store()
+
+def rubric_for(event: str | None = None) -> Rubric:
+    return _shard(event).rubric
+
+def history_file(event: str | None = None) -> str:
+    return _shard(event).history_file
+
+def close_event(event: str | None = None):
+    # Drop an event's shard (after archiving it, or to pick up a new rubric).
+    with _WRITE_LOCK, _SHARDS_LOCK:
+        shard = _SHARDS.pop(event, None)
+    if shard is not None:
+        shard.close()
+
+def configure(**settings):
+    # Point the module at another backend/file, e.g. configure(backend="sqlite")
+    # or configure(data_file="event2.json"). Calling it again with the same
+    # settings is a no-op, so the app can call it on every rerun. Changing
+    # anything closes every open shard.
+    names = {
+        "backend": "STORAGE_BACKEND",
+        "data_file": "DATA_FILE",
+        "db_file": "DB_FILE",
+        "journal_file": "JOURNAL_FILE",
+        "packed_file": "PACKED_FILE",
+        "history_file": "HISTORY_FILE",
+        "journal_fsync_interval": "JOURNAL_FSYNC_INTERVAL",
+        "journal_compact_every": "JOURNAL_COMPACT_EVERY",
+        "rubric": "RUBRIC",
+    }
+    changed = {names[k]: v for k, v in settings.items() if v is not None and globals()[names[k]] != v}
+    if not changed:
+        return
+    with _WRITE_LOCK:
+        if changed.get("STORAGE_BACKEND", STORAGE_BACKEND) not in STORES:
+            raise ValueError(f"unknown storage backend: {changed['STORAGE_BACKEND']}")
+        globals().update(changed)
+        with _SHARDS_LOCK:
+            shards = list(_SHARDS.values())
+            _SHARDS.clear()
+        for shard in shards:
+            shard.close()
+
+def read_state(
+    path: str,
+    backend: str = "json",
+    journal_file: str | None = None,
+    rubric: Rubric | None = None,
+) -> dict:
+    # Read-only load for batch tools: unlike load_state() it never writes a
+    # default state back and doesn't touch the app's configured store. An
+    # event shard's rubric.json next to `path` is picked up automatically.
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    rubric = rubric or file_rubric(path)
+    if backend == "sqlite":
+        store = SqliteStore(path, rubric=rubric, read_only=True)
+    elif backend == "journal":
+        journal_file = journal_file or os.path.splitext(path)[0] + ".journal"
+        store = JournalStore(
+            path, journal_file, JOURNAL_FSYNC_INTERVAL, JOURNAL_COMPACT_EVERY, rubric, read_only=True
+        )
+    elif backend == "packed":
+        store = PackedStore(path, rubric=rubric)
+    elif backend == "json":
+        store = JsonStore(path)
+    else:
+        raise ValueError(f"unknown storage backend: {backend}")
+    try:
+        s = store.read()
+    finally:
+        store.close()
+    if not isinstance(s, dict) or "scores" not in s:
+        raise ValueError(f"{path}: not a score state")
+    return migrate_state(s, rubric)[0]
+
+def file_rubric(path: str) -> Rubric:
+    # The rubric of the state file at `path`: its event's rubric.json, if any.
+    rubric_path = os.path.join(os.path.dirname(os.path.abspath(path)), events.RUBRIC_FILE)
+    return load_rubric(rubric_path) if os.path.exists(rubric_path) else RUBRIC
+
+def import_json(path: str, store, rubric: Rubric | None = None) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        s = normalize_state(json.load(f), rubric)
+    store.write(s)
+    return s
+
+def export_json(state: dict, path: str):
+    JsonStore(path).write(state)
+
+class StaleStateError(Exception):
+    # Raised when a compare-and-swap save finds a newer version on disk.
+    def __init__(self, expected: int, current: int):
+        super().__init__(f"state version is {current}, expected {expected}")
+        self.expected = expected
+        self.current = current
+
+def _write_lock() -> threading.RLock:
+    # Held only for read-check-write inside one save, never across a rerun.
+    return _WRITE_LOCK
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def _log_changes(shard: Shard, version: int, juror: str | None, cells):
+    # cells=None: a whole-state write that may have changed any cell.
+    with shard.log_lock:
+        if cells is None:
+            shard.log.clear()
+            shard.log_floor = version
+        else:
+            if shard.log_floor is None:
+                shard.log_floor = version - 1
+            shard.log.extend((version, juror, d, i) for d, i in cells)
+            while len(shard.log) > CHANGE_LOG_SIZE:
+                shard.log_floor = shard.log.popleft()[0]
+        shard.log_head = version
+
+def changes_since(since: int | None, upto: int, juror: str | None = None, event: str | None = None) -> set | None:
+    # {(direction, idx)} of `juror`'s sheet (None = shared sheet) saved after
+    # version `since` up to `upto`, or None when the log can't tell (history
+    # trimmed, a whole-state save, a write from another process).
+    shard = _shard(event)
+    with shard.log_lock:
+        if since is None or shard.log_floor is None or since < shard.log_floor or upto > shard.log_head:
+            return None
+        changed = set()
+        for v, j, d, i in reversed(shard.log):
+            if v <= since:
+                break
+            if v <= upto and j == juror:
+                changed.add((d, i))
+        return changed
+
+def _persist(
+    state: dict,
+    cells: dict | None = None,
+    juror: str | None = None,
+    event: str | None = None,
+    changed=None,
+):
+    # `changed` overrides which cells go to the change log (default: `cells`).
+    shard = _shard(event)
+    store = shard.get_store()
+    stamp = store.write(state) if cells is None else store.write_cells(state, cells, juror)
+    _cache_put(shard, stamp, state)
+    _log_changes(shard, int(state.get("version") or 0), juror, cells if changed is None else changed)
+    for hook in SAVE_HOOKS:
+        hook(state, event, cells, juror)
+
+def save_state(state: dict, expected_version: int | None = None, event: str | None = None):
+    with _write_lock():
+        current = int(load_state(event).get("version") or 0)
+        if expected_version is not None and expected_version != current:
+            raise StaleStateError(expected_version, current)
+        state["version"] = current + 1
+        state["updated_at"] = _now()
+        _persist(state, event=event)
+
+def save_state_fields(event: str | None = None, **fields) -> dict:
+    # Non-score updates (draw, order reset) applied to the latest state, so they
+    # never carry a stale copy of the scores along with them.
+    with _write_lock():
+        state = load_state(event)
+        state.update(fields)
+        state["version"] = int(state.get("version") or 0) + 1
+        state["updated_at"] = _now()
+        touches_scores = "scores" in fields or "juror_scores" in fields
+        _persist(state, event=event, changed=None if touches_scores else ())
+        return state
+
+def save_score_cells(
+    state: dict,
+    cells: dict,
+    juror: str | None = None,
+    expected_version: int | None = None,
+    event: str | None = None,
+):
+    # cells: {(direction, idx): value} on the shared sheet or on `juror`'s
+    # sheet; only these rows are upserted (or journaled) where the backend
+    # supports it.
+    with _write_lock():
+        current = int(load_state(event).get("version") or 0)
+        if expected_version is not None and expected_version != current:
+            raise StaleStateError(expected_version, current)
+        sheet = score_sheet(state, juror, rubric_for(event))
+        for (d, i), v in cells.items():
+            sheet[d][i] = int(v)
+        state["version"] = current + 1
+        state["updated_at"] = _now()
+        _persist(state, cells, juror, event)
+
+def merge_score_cells(base: dict, edits: dict, juror: str | None = None, event: str | None = None):
+    # Three-way, per-cell merge of one session's edits into the latest state.
+    # base: {direction: [values the session started from]}
+    # edits: {(direction, idx): value} for the cells the session changed.
+    # A cell someone else changed since `base` to a different value is a
+    # conflict and is left alone; everything else is written.
+    with _write_lock():
+        latest = load_state(event)
+        sheet = score_sheet(latest, juror, rubric_for(event))
+        applied, conflicts = {}, {}
+        for (d, i), v in edits.items():
+            now = int(sheet[d][i])
+            if now == int(v):
+                continue
+            if now != int(base[d][i]):
+                conflicts[(d, i)] = now
+                continue
+            applied[(d, i)] = int(v)
+        if applied:
+            save_score_cells(latest, applied, juror, event=event)
+        return latest, applied, conflicts
+
+def reset_score_sheet(juror: str | None = None, event: str | None = None) -> dict:
+    with _write_lock():
+        state = load_state(event)
+        clear = {(d, i): UNSCORED for d, arr in empty_sheet(rubric_for(event)).items() for i in range(len(arr))}
+        save_score_cells(state, clear, juror, event=event)
+        return state
+
+def load_state(event: str | None = None):
+    # Touches only this event's shard: one stat (or one indexed row) on a
+    # cache hit, a read of that one file otherwise.
+    shard = _shard(event)
+    store = shard.get_store()
+    writes = _cache_writes(shard)
+    stamp = store.stamp()
+    cached = _cache_get(shard, stamp)
+    if cached is not None:
+        return cached
+
+    try:
+        s = store.read()
+    except Exception:
+        s = None
+
+    if not isinstance(s, dict) or "scores" not in s:
+        with _write_lock():
+            # Re-check under the lock: several sessions starting together all
+            # see no file, and a late default must not overwrite saved scores.
+            writes = _cache_writes(shard)
+            stamp = store.stamp()
+            try:
+                s = store.read()
+            except Exception:
+                s = None
+            if not isinstance(s, dict) or "scores" not in s:
+                s = default_state(shard.rubric)
+                s["updated_at"] = _now()
+                _persist(s, event=event)
+                return s
+
+    s, migrated = migrate_state(s, shard.rubric)
+    if migrated:
+        with _write_lock():
+            # One-time upgrade: store it in the current schema unless someone
+            # saved in between (then the next load migrates their state).
+            if store.stamp() == stamp:
+                stamp = store.write(s)
+                writes = None
+    _cache_put(shard, stamp, s, writes)
+    return s
+
+def _cell(x, zero_unscored: bool) -> int:
+    try:
+        v = int(x)
+    except (TypeError, ValueError):
+        return UNSCORED
+    if v < 0 or (v == 0 and zero_unscored):
+        return UNSCORED
+    return v
+
+def _normalize_sheet(scores_in, rubric: Rubric, zero_unscored: bool = False) -> dict:
+    if not isinstance(scores_in, dict):
+        scores_in = {}
+
+    scores_out = empty_sheet(rubric)
+
+    for k, v in scores_in.items():
+        kk_name = rubric.resolve(k)
+        if kk_name is None:
+            continue
+        want_len = len(rubric.criteria[kk_name])
+        if isinstance(v, list) and len(v) == want_len:
+            scores_out[kk_name] = [_cell(x, zero_unscored) for x in v]
+        elif isinstance(v, dict):
+            scores_out[kk_name] = [
+                _cell(v.get(str(i), v.get(i)), zero_unscored) for i in range(want_len)
+            ]
+
+    return scores_out
+
+def normalize_state(s: dict, rubric: Rubric | None = None) -> dict:
+    rubric = rubric or RUBRIC
+    try:
+        legacy = int(s.get("schema_version") or 1) < 3
+    except (TypeError, ValueError):
+        legacy = True
+    s["scores"] = _normalize_sheet(s.get("scores"), rubric, legacy)
+
+    jurors_in = s.get("juror_scores")
+    if not isinstance(jurors_in, dict):
+        jurors_in = {}
+    s["juror_scores"] = {
+        str(j): _normalize_sheet(sheet, rubric, legacy) for j, sheet in jurors_in.items() if str(j).strip()
+    }
+
+    po = s.get("presentation_order")
+    if not isinstance(po, list):
+        po = list(rubric.directions)
+    else:
+        mapped = []
+        for x in po:
+            kk = rubric.resolve(x)
+            if kk is not None and kk not in mapped:
+                mapped.append(kk)
+        for d in rubric.directions:
+            if d not in mapped:
+                mapped.append(d)
+        po = mapped
+    s["presentation_order"] = po
+
+    if s.get("last_draw") is not None and not isinstance(s["last_draw"], dict):
+        s["last_draw"] = None
+
+    if "updated_at" not in s:
+        s["updated_at"] = None
+
+    try:
+        s["version"] = max(0, int(s.get("version") or 0))
+    except (TypeError, ValueError):
+        s["version"] = 0
+
+    s["schema_version"] = SCHEMA_VERSION
+    s["rubric_fp"] = rubric.fingerprint
+    return s
@@ -0,0 +1,76 @@
+from .compute import fmt_score, score_tensor
+from .draw import order_revealed
+from .rubric import DEFAULT_RUBRIC, Rubric
+
+# HTML fragments for the leaderboard and order screens, built from state
+# alone. The app caches them per state version; LB_CSS styles them, both in
+# apply_base_css() and in the published static pages.
+
+LB_CSS = """
+.lb { display: flex; flex-direction: column; gap: 10px; margin-top: 12px; }
+.lbrow { display: grid; grid-template-columns: 64px 1fr 110px; align-items: center; gap: 12px; border: 1px solid rgba(0,0,0,0.08); border-radius: 16px; padding: 12px 14px; background: rgba(0,0,0,0.015); }
+.lbrow .rank { font-weight: 950; font-size: 1.05rem; opacity: 0.95; }
+.lbrow .team { line-height: 1.1; }
+.lbrow .team .kk { font-weight: 900; font-size: 1.02rem; }
+.lbrow .team .ru { color:#8a8a8a; font-size: 0.90rem; margin-top: 2px; }
+.lbrow .score { text-align: right; font-weight: 950; font-size: 1.15rem; }
+.badchip { display:inline-block; padding: 2px 10px; border-radius: 999px; border: 1px solid rgba(0,0,0,0.10); background: rgba(0,0,0,0.03); font-size: 0.85rem; color: #6f7680; margin-left: 10px; }
+"""
+
+
+def direction_bi_html(direction_kk: str, rubric: Rubric | None = None) -> str:
+    ru = (rubric or DEFAULT_RUBRIC).direction_ru.get(direction_kk, "")
+    return f"<div class='team'><div class='kk'>{direction_kk}</div><div class='ru'>{ru}</div></div>"
+
+def leaderboard_rows(state: dict, rubric: Rubric | None = None, stats: dict | None = None) -> list[dict]:
+    # `stats` (robustness.rank_stats of the same state) adds each team's rank
+    # interval and the probability of its shown rank.
+    rubric = rubric or DEFAULT_RUBRIC
+    t = score_tensor(state, rubric)
+    totals = t.totals()
+    rows = []
+    for rank, k in enumerate(t.order(), start=1):
+        name = t.teams[k]
+        row = {"rank": rank, "name": name, "ru": rubric.direction_ru.get(name, ""), "total": fmt_score(totals[k])}
+        if stats is not None:
+            row["ci"] = (int(stats["lo"][k]), int(stats["hi"][k]))
+            row["p"] = float(stats["p_rank"][k])
+        rows.append(row)
+    return rows
+
+def rank_ci_html(r: dict) -> str:
+    if "ci" not in r:
+        return ""
+    lo, hi = r["ci"]
+    span = f"{lo}" if lo == hi else f"{lo}–{hi}"
+    return (
+        "<span class='badchip' title='95% аралық және осы орынның ықтималдығы / "
+        f"95% интервал мест и вероятность этого места'>{span} • {r['p']:.0%}</span>"
+    )
+
+def leaderboard_html(rows: list[dict]) -> str:
+    parts = [
+        f"<div class='lbrow'>"
+        f"<div class='rank'>{r['rank']}</div>"
+        f"<div class='team'><div class='kk'>{r['name']}<span class='badchip'>{r['rank']}-орын</span>{rank_ci_html(r)}</div>"
+        f"<div class='ru'>{r['ru']}</div></div>"
+        f"<div class='score'>{r['total']}</div>"
+        f"</div>"
+        for r in rows
+    ]
+    return "<div class='lb'>" + "".join(parts) + "</div>"
+
+def order_list_html(state: dict, rubric: Rubric | None = None) -> str:
+    rubric = rubric or DEFAULT_RUBRIC
+    if not order_revealed(state):
+        return (
+            "<div class='lb'><div class='lbrow'><div class='rank'>…</div>"
+            "<div><b>Жеребе жүріп жатыр…</b><div class='small-muted'>Идёт жеребьёвка…</div></div>"
+            "<div class='score'></div></div></div>"
+        )
+    order = state.get("presentation_order") or list(rubric.directions)
+    parts = [
+        f"<div class='lbrow'><div class='rank'>{i}</div><div>{direction_bi_html(name, rubric)}</div><div class='score'></div></div>"
+        for i, name in enumerate(order, start=1)
+    ]
+    return "<div class='lb'>" + "".join(parts) + "</div>"
@@ -0,0 +1,21 @@
+import pytest
+
+from hackathon import storage
+
+
+# Every test gets its own state files under tmp_path; parametrize with
+# indirect=True to pick a backend ("json" by default).
+@pytest.fixture
+def store(tmp_path, request):
+    backend = getattr(request, "param", "json")
+    storage.configure(
+        backend=backend,
+        data_file=str(tmp_path / "scores.json"),
+        db_file=str(tmp_path / "scores.db"),
+        journal_file=str(tmp_path / "scores.journal"),
+        packed_file=str(tmp_path / "scores.bin"),
+        history_file=str(tmp_path / "scores.history"),
+        rubric=storage.DEFAULT_RUBRIC,
+    )
+    yield backend
+    storage.close_event(None)
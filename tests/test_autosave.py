@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from hackathon import autosave, storage
+
+D0, D1 = storage.DEFAULT_RUBRIC.directions[:2]
+
+
+@pytest.fixture
+def quick(store):
+    autosave.configure(enabled=True, delay=0.2, max_delay=5.0)
+    yield
+    autosave.flush(5)
+    autosave.configure(enabled=False, delay=1.5, max_delay=6.0)
+
+def stored(juror, d, i):
+    return storage.load_state()["juror_scores"].get(juror, {}).get(d, [storage.UNSCORED] * (i + 1))[i]
+
+def wait_for(cond, timeout=3.0):
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if cond():
+            return True
+        time.sleep(0.02)
+    return cond()
+
+def test_flush_saves_queued_cells(quick):
+    autosave.queue_cell("t-flush", None, "ali", (D0, 0), storage.UNSCORED, 1)
+    autosave.queue_cell("t-flush", None, "ali", (D0, 0), storage.UNSCORED, 2)
+    assert autosave.flush(5)
+    assert stored("ali", D0, 0) == 2
+    applied, conflicts = autosave.take_results("t-flush")
+    assert applied == {(None, "ali", D0, 0): 2} and conflicts == {}
+
+def test_quiet_window_saves_without_flush(quick):
+    autosave.queue_cell("t-quiet", None, "ali", (D0, 1), storage.UNSCORED, 2)
+    assert not autosave.status("t-quiet")["version"]
+    assert wait_for(lambda: stored("ali", D0, 1) == 2)
+    assert autosave.status("t-quiet")["version"] == storage.load_state()["version"]
+
+def test_busy_juror_does_not_delay_another(quick):
+    stop = threading.Event()
+
+    def keep_editing():
+        v = 0
+        while not stop.is_set():
+            v = 1 - v
+            autosave.queue_cell("t-busy", None, "ali", (D1, 0), storage.UNSCORED, v + 1)
+            time.sleep(0.05)
+
+    t = threading.Thread(target=keep_editing)
+    t.start()
+    try:
+        autosave.queue_cell("t-other", None, "bob", (D0, 0), storage.UNSCORED, 2)
+        # Well inside MAX_DELAY: only bob's own quiet window counts.
+        assert wait_for(lambda: stored("bob", D0, 0) == 2, timeout=1.5)
+        assert autosave.status("t-busy")["pending"]
+    finally:
+        stop.set()
+        t.join()
+
+def test_second_burst_uses_the_autosaved_base(quick):
+    autosave.queue_cell("t-again", None, "ali", (D0, 2), storage.UNSCORED, 1)
+    assert autosave.flush(5)
+    # The slider's base is still UNSCORED until the session reruns.
+    autosave.queue_cell("t-again", None, "ali", (D0, 2), storage.UNSCORED, 2)
+    assert autosave.flush(5)
+    assert stored("ali", D0, 2) == 2
+    assert autosave.take_results("t-again")[1] == {}
+
+def test_taken_results_are_dropped(quick):
+    autosave.queue_cell("t-take", None, "ali", (D0, 3), storage.UNSCORED, 1)
+    assert autosave.flush(5)
+    assert autosave.status("t-take")["version"] is not None
+    applied, _ = autosave.take_results("t-take")
+    assert applied == {(None, "ali", D0, 3): 1}
+    assert "t-take" not in autosave._RESULTS and "t-take" not in autosave._WRITTEN
+    assert autosave.status("t-take")["version"] is None
+
+def test_sessions_that_never_come_back_are_retired(quick, monkeypatch):
+    autosave.queue_cell("t-gone", None, "ali", (D0, 4), storage.UNSCORED, 1)
+    assert autosave.flush(5)
+    monkeypatch.setattr(autosave, "RESULT_TTL", 0.0)
+    autosave.queue_cell("t-here", None, "bek", (D0, 4), storage.UNSCORED, 2)
+    assert autosave.flush(5)
+    assert "t-gone" not in autosave._RESULTS and "t-gone" not in autosave._WRITTEN
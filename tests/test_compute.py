@@ -0,0 +1,49 @@
+import random
+
+import numpy as np
+
+from hackathon import robustness, storage
+from hackathon.compute import ScoreTensor
+
+R = storage.DEFAULT_RUBRIC
+D = R.directions
+
+
+def state_with(jurors: dict, shared: dict | None = None) -> dict:
+    s = storage.default_state(R)
+    s["scores"].update(shared or {})
+    s["juror_scores"] = {j: {**storage.empty_sheet(R), **sheet} for j, sheet in jurors.items()}
+    return s
+
+def test_cells_average_over_the_sheets_that_scored_them():
+    n = len(R.criteria[D[0]])
+    t = ScoreTensor.from_state(state_with({"a": {D[0]: [2] * n}, "b": {}}), R)
+    assert t.totals()[t.team_index[D[0]]] == 2 * n
+
+def test_shared_sheet_counts_next_to_juror_sheets():
+    n = len(R.criteria[D[1]])
+    t = ScoreTensor.from_state(state_with({"ali": {}}, {D[1]: [1] * n}), R)
+    assert t.totals()[t.team_index[D[1]]] == n
+
+def test_equal_means_tie_and_break_by_name():
+    # 31/6 reached two ways: (2 + 1 + 2) / 3 per cell vs whole-number cells.
+    rnd = random.Random(0)
+    for _ in range(300):
+        s = state_with({
+            f"j{k}": {d: [rnd.choice([-1, 0, 1, 2]) for _ in R.criteria[d]] for d in D}
+            for k in range(rnd.randint(2, 6))
+        })
+        t = ScoreTensor.from_state(s, R)
+        keys = [(-round(t.totals()[k], 6), t.name_rank[k]) for k in t.order()]
+        assert keys == sorted(keys)
+
+def test_float_noise_does_not_break_a_tie():
+    # Both totals are 16/3; summed as floats the first comes out one ulp lower.
+    a = [[1, 1, 2], [1, 1, 1], [1, 2, 1], [2, 2, 0], [0, 0, 1]]
+    b = [[2, 0, 2], [0, 0, 0], [1, 2, 2], [0, 0, 2], [2, 1, 2]]
+    s = state_with({f"j{k}": {D[0]: [c[k] for c in a], D[1]: [c[k] for c in b]} for k in range(3)})
+    t = ScoreTensor.from_state(s, R)
+    first, second = sorted(D[:2])
+    assert [t.teams[k] for k in t.order()[:2]] == [first, second]
+    stats = robustness.rank_stats(s, R, samples=200, mode="criteria")
+    assert np.array_equal(stats["rank"], t.ranks())
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from hackathon.rubric import DEFAULT_RUBRIC, Rubric, load_rubric
+
+
+def rubric_dict(**overrides) -> dict:
+    return dict(DEFAULT_RUBRIC.to_dict(), **overrides)
+
+
+def test_round_trip_keeps_the_rubric():
+    r = Rubric.from_dict(rubric_dict())
+    assert r.fingerprint == DEFAULT_RUBRIC.fingerprint
+    assert r.to_dict() == DEFAULT_RUBRIC.to_dict()
+
+@pytest.mark.parametrize("scale", [0, -1, 128, 200, "two", None])
+def test_scale_outside_int8_cells_is_rejected(scale):
+    with pytest.raises(ValueError, match="max_per_criterion"):
+        Rubric.from_dict(rubric_dict(max_per_criterion=scale))
+
+@pytest.mark.parametrize("scale", [1, 127, "5"])
+def test_scale_inside_the_range_is_kept(scale):
+    assert Rubric.from_dict(rubric_dict(max_per_criterion=scale)).max_per_criterion == int(scale)
+
+def test_empty_rubrics_are_rejected():
+    with pytest.raises(ValueError):
+        Rubric.from_dict({"directions": []})
+    with pytest.raises(ValueError):
+        Rubric.from_dict({"directions": [{"kk": "A", "criteria": []}]})
+    with pytest.raises(ValueError):
+        Rubric([], {}, {})
+
+def test_load_rubric_picks_up_edits(tmp_path):
+    path = tmp_path / "rubric.json"
+    path.write_text(json.dumps(rubric_dict(max_per_criterion=3)), encoding="utf-8")
+    assert load_rubric(str(path)).max_per_criterion == 3
+    path.write_text(json.dumps(rubric_dict(max_per_criterion=200)), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_rubric(str(path))
@@ -0,0 +1,214 @@
+import json
+import threading
+import time
+
+import pytest
+
+from hackathon import storage
+from hackathon.storage import UNSCORED, JournalStore, PackedStore
+
+R = storage.DEFAULT_RUBRIC
+D0, D1 = R.directions[:2]
+BACKENDS = ["json", "sqlite", "journal", "packed"]
+
+
+def sample_state() -> dict:
+    s = storage.default_state(R)
+    s["scores"][D0][:3] = [2, 0, 1]
+    s["juror_scores"] = {"ali": storage.empty_sheet(R)}
+    s["juror_scores"]["ali"][D1][0] = 2
+    s["presentation_order"] = list(reversed(R.directions))
+    s["version"] = 7
+    return s
+
+def journal(tmp_path, compact_every: int = 1000, **kw) -> JournalStore:
+    return JournalStore(str(tmp_path / "s.json"), str(tmp_path / "s.journal"), 0.01, compact_every, R, **kw)
+
+def journal_lines(tmp_path) -> list[str]:
+    return (tmp_path / "s.journal").read_text(encoding="utf-8").splitlines()
+
+
+@pytest.mark.parametrize("store", BACKENDS, indirect=True)
+def test_cells_survive_a_cold_reload(store):
+    s = storage.load_state()
+    storage.save_score_cells(s, {(D0, 0): 2, (D0, 1): 0})
+    storage.save_score_cells(storage.load_state(), {(D1, 2): 1}, "ali")
+    storage.save_state_fields(presentation_order=list(reversed(R.directions)))
+    want = storage.load_state()
+    storage.close_event(None)
+    got = storage.load_state()
+    assert got == want
+    assert got["scores"][D0][:3] == [2, 0, UNSCORED]
+    assert got["juror_scores"]["ali"][D1][2] == 1
+    assert got["version"] == 3
+
+def test_packed_round_trip(tmp_path):
+    path = tmp_path / "s.bin"
+    store = PackedStore(str(path), rubric=R)
+    state = sample_state()
+    store.write(state)
+    assert path.read_bytes()[:4] == PackedStore.MAGIC
+    assert PackedStore(str(path), rubric=R).read() == state
+
+def test_packed_rejects_other_files(tmp_path):
+    path = tmp_path / "s.bin"
+    path.write_bytes(b"{}")
+    with pytest.raises(ValueError):
+        PackedStore(str(path), rubric=R).read()
+
+def test_journal_replays_events_over_the_snapshot(tmp_path):
+    store = journal(tmp_path)
+    state = sample_state()
+    store.write(state)
+    snapshot = (tmp_path / "s.json").read_bytes()
+    state["scores"][D0][3] = 2
+    state["version"] = 8
+    store.write_cells(state, {(D0, 3): 2})
+    state["juror_scores"]["bob"] = storage.empty_sheet(R)
+    state["juror_scores"]["bob"][D1][1] = 1
+    state["version"] = 9
+    store.write_cells(state, {(D1, 1): 1}, "bob")
+    store.close()
+    # Saves only appended to the journal; the snapshot is untouched.
+    assert (tmp_path / "s.json").read_bytes() == snapshot
+    assert len(journal_lines(tmp_path)) == 6
+    reopened = journal(tmp_path)
+    assert reopened.read() == state
+    reopened.close()
+
+def test_journal_ignores_a_torn_line_and_keeps_later_writes(tmp_path):
+    store = journal(tmp_path)
+    state = sample_state()
+    store.write(state)
+    state["scores"][D0][3] = 2
+    store.write_cells(state, {(D0, 3): 2})
+    store.close()
+    with open(tmp_path / "s.journal", "a", encoding="utf-8") as f:
+        f.write('{"type": "score", "d": "')  # crash mid-append
+
+    store = journal(tmp_path)
+    assert store.read()["scores"][D0][3] == 2
+    state["scores"][D0][4] = 1
+    store.write_cells(state, {(D0, 4): 1})
+    store.close()
+    assert all(json.loads(line) for line in journal_lines(tmp_path))
+    reopened = journal(tmp_path)
+    assert reopened.read()["scores"][D0][3:5] == [2, 1]
+    reopened.close()
+
+def test_journal_compacts_into_a_new_snapshot(tmp_path):
+    store = journal(tmp_path, compact_every=4)
+    state = sample_state()
+    store.write(state)
+    for i in range(3):
+        state["scores"][D1][i] = 2
+        state["version"] += 1
+        store.write_cells(state, {(D1, i): 2})
+    end = time.monotonic() + 5
+    while store.compact_due or journal_lines(tmp_path):
+        assert time.monotonic() < end, "journal was not compacted"
+        time.sleep(0.01)
+    snap = json.loads((tmp_path / "s.json").read_text(encoding="utf-8"))
+    assert snap["journal_seq"] == store.seq
+    assert snap["scores"][D1][:3] == [2, 2, 2]
+    store.close()
+    reopened = journal(tmp_path)
+    assert reopened.read() == state
+    reopened.close()
+
+def test_journal_saves_during_compaction_neither_wait_nor_get_lost(tmp_path):
+    store = journal(tmp_path, compact_every=2)
+    state = sample_state()
+    store.write(state)
+    write_snapshot = store._write_snapshot
+    late = []
+
+    def slow_snapshot(tmp, snap, seq):
+        # A save arriving while the snapshot is on its way to disk.
+        state["scores"][D0][4] = 2
+        saver = threading.Thread(target=store.write_cells, args=(state, {(D0, 4): 2}))
+        saver.start()
+        saver.join(1)
+        late.append(not saver.is_alive())
+        write_snapshot(tmp, snap, seq)
+
+    store._write_snapshot = slow_snapshot
+    state["scores"][D1][0] = 1
+    store.write_cells(state, {(D1, 0): 1})
+    end = time.monotonic() + 5
+    while not late or store.base_seq == 0:
+        assert time.monotonic() < end, "journal was not compacted"
+        time.sleep(0.01)
+    store._write_snapshot = write_snapshot
+    assert late == [True]
+    assert any(json.loads(line).get("d") == D0 for line in journal_lines(tmp_path))
+    store.close()
+    reopened = journal(tmp_path)
+    assert reopened.read() == state
+    reopened.close()
+
+def test_journal_skips_events_already_in_the_snapshot(tmp_path):
+    # A crash between writing the snapshot and truncating the journal.
+    store = journal(tmp_path)
+    state = sample_state()
+    store.write(state)
+    state["scores"][D0][3] = 2
+    store.write_cells(state, {(D0, 3): 2})
+    store.close()
+    kept = (tmp_path / "s.journal").read_bytes()
+    state["scores"][D0][3] = 1
+    store = journal(tmp_path)
+    store._snapshot(state)
+    store.close()
+    (tmp_path / "s.journal").write_bytes(kept)
+    reopened = journal(tmp_path)
+    assert reopened.read()["scores"][D0][3] == 1
+    reopened.close()
+
+def legacy_state() -> dict:
+    # Schema 1: no schema_version or rubric_fp, Russian direction names,
+    # dict-shaped rows, 0 for "not scored yet".
+    return {
+        "scores": {
+            R.direction_ru[D0]: [2, 0, 1, 0, 0],
+            R.direction_ru[D1]: {"0": 1, "2": 2},
+        },
+        "juror_scores": {"ali": {D0: [0, 2, 0, 0, 0]}, " ": {}},
+        "presentation_order": [R.direction_ru[D1]],
+        "last_draw": None,
+        "updated_at": "2025-12-20 10:00:00",
+        "version": 4,
+    }
+
+@pytest.mark.parametrize("store", BACKENDS, indirect=True)
+def test_legacy_state_is_migrated_once(store, tmp_path):
+    (tmp_path / "scores.json").write_text(json.dumps(legacy_state(), ensure_ascii=False), encoding="utf-8")
+    s = storage.load_state()
+    assert s["schema_version"] == storage.SCHEMA_VERSION
+    assert s["rubric_fp"] == R.fingerprint
+    n0, n1 = len(R.criteria[D0]), len(R.criteria[D1])
+    assert s["scores"][D0] == [2, UNSCORED, 1] + [UNSCORED] * (n0 - 3)
+    assert s["scores"][D1] == [1, UNSCORED, 2] + [UNSCORED] * (n1 - 3)
+    assert s["juror_scores"] == {"ali": {**storage.empty_sheet(R), D0: [UNSCORED, 2] + [UNSCORED] * (n0 - 2)}}
+    assert s["version"] == 4
+    storage.close_event(None)
+    # Written back in the current schema: a cold reload needs no migration.
+    raw = storage.get_store().read()
+    assert storage.is_current(raw, R)
+    assert storage.load_state() == s
+
+def test_current_zeros_are_scores():
+    s = storage.default_state(R)
+    s["scores"][D0][0] = 0
+    s["rubric_fp"] = None  # forces normalize_state, schema stays current
+    assert storage.normalize_state(s, R)["scores"][D0][0] == 0
+
+def test_read_state_leaves_legacy_files_alone(tmp_path):
+    path = tmp_path / "snap.json"
+    path.write_text(json.dumps(legacy_state(), ensure_ascii=False), encoding="utf-8")
+    before = path.read_bytes()
+    for backend in ("json", "journal"):
+        s = storage.read_state(str(path), backend, rubric=R)
+        assert s["scores"][D0][:3] == [2, UNSCORED, 1]
+    assert path.read_bytes() == before
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["snap.json"]
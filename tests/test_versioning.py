@@ -0,0 +1,72 @@
+import pytest
+
+from hackathon import storage
+from hackathon.storage import UNSCORED, StaleStateError
+
+R = storage.DEFAULT_RUBRIC
+D0, D1 = R.directions[:2]
+BACKENDS = ["json", "sqlite", "journal", "packed"]
+
+
+def base_of(sheet: dict) -> dict:
+    return {d: list(arr) for d, arr in sheet.items()}
+
+@pytest.mark.parametrize("store", BACKENDS, indirect=True)
+def test_stale_write_is_rejected(store):
+    s = storage.load_state()
+    storage.save_score_cells(s, {(D0, 0): 1}, expected_version=0)
+    stale = storage.load_state()
+    storage.save_score_cells(storage.load_state(), {(D0, 1): 2}, expected_version=1)
+    with pytest.raises(StaleStateError) as err:
+        storage.save_score_cells(stale, {(D0, 0): 2}, expected_version=1)
+    assert (err.value.expected, err.value.current) == (1, 2)
+    with pytest.raises(StaleStateError):
+        storage.save_state(stale, expected_version=1)
+    s = storage.load_state()
+    assert s["version"] == 2
+    assert s["scores"][D0][:2] == [1, 2]
+
+def test_versions_count_every_save(store):
+    storage.save_score_cells(storage.load_state(), {(D0, 0): 1})
+    storage.save_state_fields(presentation_order=list(reversed(R.directions)))
+    storage.save_state(storage.load_state(), expected_version=2)
+    assert storage.load_state()["version"] == 3
+
+@pytest.mark.parametrize("store", BACKENDS, indirect=True)
+def test_non_conflicting_merge_keeps_both_edits(store):
+    start = base_of(storage.load_state()["scores"])
+    # Another session saves a different cell first.
+    _, applied, conflicts = storage.merge_score_cells(start, {(D1, 0): 2})
+    assert applied == {(D1, 0): 2} and conflicts == {}
+    latest, applied, conflicts = storage.merge_score_cells(start, {(D0, 0): 1, (D0, 1): 0})
+    assert applied == {(D0, 0): 1, (D0, 1): 0} and conflicts == {}
+    assert latest["scores"][D0][:3] == [1, 0, UNSCORED]
+    assert latest["scores"][D1][0] == 2
+    assert storage.load_state() == latest
+
+def test_same_value_is_not_a_conflict(store):
+    start = base_of(storage.load_state()["scores"])
+    storage.merge_score_cells(start, {(D0, 0): 2})
+    version = storage.load_state()["version"]
+    _, applied, conflicts = storage.merge_score_cells(start, {(D0, 0): 2})
+    assert applied == {} and conflicts == {}
+    assert storage.load_state()["version"] == version  # nothing to write
+
+@pytest.mark.parametrize("store", BACKENDS, indirect=True)
+def test_conflicting_merge_keeps_the_first_save(store):
+    start = base_of(storage.load_state()["scores"])
+    storage.merge_score_cells(start, {(D0, 0): 2})
+    latest, applied, conflicts = storage.merge_score_cells(start, {(D0, 0): 1, (D0, 1): 1})
+    assert conflicts == {(D0, 0): 2}
+    assert applied == {(D0, 1): 1}
+    assert storage.load_state()["scores"][D0][:2] == [2, 1]
+
+def test_juror_sheets_merge_independently(store):
+    start = base_of(storage.empty_sheet(R))
+    storage.merge_score_cells(start, {(D0, 0): 2}, "ali")
+    _, applied, conflicts = storage.merge_score_cells(start, {(D0, 0): 1}, "bob")
+    assert applied == {(D0, 0): 1} and conflicts == {}
+    s = storage.load_state()
+    assert s["juror_scores"]["ali"][D0][0] == 2
+    assert s["juror_scores"]["bob"][D0][0] == 1
+    assert s["scores"][D0][0] == UNSCORED